@@ -1,11 +1,5 @@
-from . import (
-    alpha_trader,
-    analyzer,
-    drawer,
-    history_visualizer,
-    real_trader,
-    trader,
-)
+import importlib
+from typing import Any, List
 
 __all__ = [
     "analyzer",
@@ -15,3 +9,17 @@ __all__ = [
     "trader",
     "history_visualizer",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Import the submodules at their first access,
+    so that Lambda handlers don't load what they don't use (ex. matplotlib in drawer)
+    """
+    if name in __all__:
+        return importlib.import_module(".{}".format(name), __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
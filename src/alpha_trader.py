@@ -15,13 +15,14 @@ class AlphaTrader(Trader):
     # Public
     #
     def backtest(
-        self, candles: pd.DataFrame, indicators: pd.DataFrame
+        self, candles: pd.DataFrame, indicators: pd.DataFrame, dump_csv: bool = True
     ) -> Dict[str, Union[str, pd.DataFrame]]:
         """backtest scalping trade"""
         candles["entryable_price"] = self._generate_entryable_price(candles)
         self.__generate_entry_column(candles, indicators)
 
-        candles.to_csv("./tmp/csvs/scalping_data_dump.csv")
+        if dump_csv:
+            candles.to_csv("./tmp/csvs/scalping_data_dump.csv")
         return {"result": "[Trader] Finsihed a series of backtest!", "candles": candles}
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -53,7 +54,7 @@ class AlphaTrader(Trader):
             left_index=True,
             right_index=True,
         )
-        commited_df = scalping.commit_positions_by_loop(factor_dicts=base_df.to_dict("records"))
+        commited_df = scalping.commit_positions_by_arrays(base_df)
         # OPTIMIZE: We may be able to  merge two dataframes by the way written in following article.
         #   https://ymt-lab.com/post/2020/python-pandas-insert-columns/
         # like this (but this doesn't work anyway)
@@ -0,0 +1,170 @@
+from datetime import datetime
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR: str = "tmp/candle_cache"
+
+# INFO: time is stored as int64 (epoch seconds of UTC), prices as float64,
+#   in the same order as the candles of OandaInterface (except time)
+CACHE_COLUMN_DTYPES: Dict[str, str] = {
+    "open": "<f8",
+    "high": "<f8",
+    "low": "<f8",
+    "close": "<f8",
+    "volume": "<i8",
+    "complete": "?",
+    "time": "<i8",
+}
+# INFO: values of the columns which the appended candles don't have
+MISSING_COLUMN_VALUES: Dict[str, Any] = {"volume": 0, "complete": True}
+
+
+class CandleCache:
+    """
+    Candles stored on the local disk for each (instrument, granularity).
+    Each column is a fixed-width binary file, which is read through memory mapping.
+    Only complete candles are stored.
+    """
+
+    def __init__(
+        self, instrument: str, granularity: str, cache_dir: str = DEFAULT_CACHE_DIR
+    ) -> None:
+        self.__directory: str = os.path.join(cache_dir, "{}_{}".format(instrument, granularity))
+        os.makedirs(self.__directory, exist_ok=True)
+
+    @property
+    def covered_since(self) -> Optional[datetime]:
+        """The start of the period which the cached candles cover (None if nothing is cached)"""
+        if not os.path.isfile(self.__meta_path()):
+            return None
+        with open(self.__meta_path(), "r") as meta_file:
+            meta: Dict[str, Any] = json.load(meta_file)
+        # INFO: the cache written with the other columns is regarded as empty, and is replaced
+        if meta.get("columns") != list(CACHE_COLUMN_DTYPES.keys()):
+            return None
+        return datetime.utcfromtimestamp(meta["covered_since"])
+
+    def latest_time(self) -> Optional[datetime]:
+        times: np.ndarray = self.__read_column("time")
+        if len(times) == 0:
+            return None
+        return datetime.utcfromtimestamp(int(times[-1]))
+
+    def load(self, since: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Read cached candles newer than or equal to `since`
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns (the same as OandaInterface.load_candles_by_duration):
+                Name: open,     dtype: float64
+                Name: high,     dtype: float64
+                Name: low,      dtype: float64
+                Name: close,    dtype: float64
+                Name: volume,   dtype: int64
+                Name: complete, dtype: bool
+                Name: time,     dtype: object ('yyyy-MM-dd HH:mm:ss')
+        """
+        columns: Dict[str, np.ndarray] = {
+            name: self.__read_column(name) for name in CACHE_COLUMN_DTYPES.keys()
+        }
+        start: int = 0
+        if since is not None:
+            start = int(np.searchsorted(columns["time"], _to_epoch(since), side="left"))
+
+        # INFO: prices are copied from the memory map, because FXBase replaces the latest ones
+        candles = pd.DataFrame(
+            {name: np.array(values[start:]) for name, values in columns.items() if name != "time"}
+        )
+        candles["time"] = _to_time_strings(columns["time"][start:])
+        return candles
+
+    def write(self, candles: pd.DataFrame, covered_since: datetime) -> None:
+        """Replace all the cached candles"""
+        for name in CACHE_COLUMN_DTYPES.keys():
+            open(self.__column_path(name), "wb").close()
+        with open(self.__meta_path(), "w") as meta_file:
+            json.dump(
+                {"covered_since": _to_epoch(covered_since), "columns": list(CACHE_COLUMN_DTYPES)},
+                meta_file,
+            )
+        self.append(candles)
+
+    def append(self, candles: pd.DataFrame) -> int:
+        """
+        Append the complete candles newer than the cached ones
+
+        Parameters
+        ----------
+        candles : pd.DataFrame
+            Columns:
+                Name: open, high, low, close, dtype: float64
+                Name: time,     dtype: object ('yyyy-MM-dd HH:mm:ss')
+                Name: volume,   dtype: int64 (optional, 0 if missing)
+                Name: complete, dtype: bool (optional, True if missing)
+
+        Returns
+        -------
+        int
+            the number of appended candles
+        """
+        if len(candles) == 0:
+            return 0
+
+        epochs: np.ndarray = _to_epochs(candles["time"])
+        latest: Optional[datetime] = self.latest_time()
+        is_new: np.ndarray = np.ones(len(candles), dtype=bool)
+        if latest is not None:
+            is_new = epochs > _to_epoch(latest)
+        if "complete" in candles:
+            # INFO: stop before the first incomplete candle, which will be requested again
+            is_new &= np.logical_and.accumulate(candles["complete"].to_numpy(dtype=bool))
+
+        # INFO: time is written last, so that the other columns are never shorter than it
+        for name in CACHE_COLUMN_DTYPES.keys():
+            values: np.ndarray
+            if name == "time":
+                values = epochs
+            elif name in candles:
+                values = candles[name].to_numpy()
+            else:
+                values = np.full(len(candles), MISSING_COLUMN_VALUES[name])
+            with open(self.__column_path(name), "ab") as column_file:
+                column_file.write(values[is_new].astype(CACHE_COLUMN_DTYPES[name]).tobytes())
+        return int(is_new.sum())
+
+    #
+    # private
+    #
+    def __column_path(self, name: str) -> str:
+        return os.path.join(self.__directory, "{}.bin".format(name))
+
+    def __meta_path(self) -> str:
+        return os.path.join(self.__directory, "meta.json")
+
+    def __read_column(self, name: str) -> np.ndarray:
+        dtype = np.dtype(CACHE_COLUMN_DTYPES[name])
+        # INFO: ignore the rows which the file of time doesn't have yet
+        time_path: str = self.__column_path("time")
+        length: int = os.path.getsize(time_path) // 8 if os.path.isfile(time_path) else 0
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.__column_path(name), dtype=dtype, mode="r", shape=(length,))
+
+
+def _to_epoch(time: datetime) -> int:
+    return int((time - datetime(1970, 1, 1)).total_seconds())
+
+
+def _to_epochs(times: pd.Series) -> np.ndarray:
+    return pd.to_datetime(times).to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def _to_time_strings(epochs: np.ndarray) -> np.ndarray:
+    strings: np.ndarray = np.datetime_as_string(np.asarray(epochs).astype("datetime64[s]"))
+    return np.char.replace(strings, "T", " ").astype(object)
@@ -5,35 +5,50 @@ from aws_lambda_powertools import Logger
 from oanda_accessor_pyv20 import OandaInterface
 import pandas as pd
 
+from src.candle_cache import CandleCache
 from src.candle_storage import FXBase
-from src.clients.dynamodb_accessor import DynamodbAccessor
+from src.clients.dynamodb_accessor import GRANULARITY_DELTAS, DynamodbAccessor
 import src.lib.format_converter as converter
 import src.lib.interface as i_face
 from src.trader_config import TraderConfig
+import src.warm_cache as warm_cache
 
 LOGGER = Logger()
+LIVE_CANDLES_LENGTH: int = 70
+LONG_SPAN_GRANULARITY: str = "D"
+# INFO: the latest daily candle isn't complete, so it is requested on every invocation
+#   together with the one before it (which may have been completed since it was cached)
+LONG_SPAN_REFRESH_LENGTH: int = 2
 
 
 class CandleLoader:
-    def __init__(self, config: TraderConfig, interface: OandaInterface, days: int) -> None:
+    def __init__(
+        self,
+        config: TraderConfig,
+        interface: OandaInterface,
+        days: int,
+        live_candles_length: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        live_candles_length : Optional[int]
+            number of candles requested in the live trading, `live_candles_length()` if None
+        """
         self.config: TraderConfig = config
         self.interface: OandaInterface = interface
         self.need_request: bool = self.__select_need_request(operation=config.operation)
         self.days: int = days
+        self.__live_candles_length: Optional[int] = live_candles_length
 
     def run(self) -> Dict[str, Optional[str]]:
         candles: pd.DataFrame
         if self.need_request is False:
             candles = pd.read_csv("tests/fixtures/sample_candles.csv")
         elif self.config.operation in ("backtest", "forward_test"):
-            candles = self.interface.load_candles_by_days(
-                days=self.days,
-                granularity=self.config.get_entry_rules("granularity"),  # type: ignore
-            )["candles"]
+            candles = self.__load_candles_by_days_with_cache()
         elif self.config.operation == "live":
-            candles = self.interface.load_specify_length_candles(
-                length=70, granularity=self.config.get_entry_rules("granularity")  # type: ignore
-            )["candles"]
+            candles = self.__load_live_candles()
         else:
             raise ValueError(f"trader_config.operation is invalid!: {self.config.operation}")
 
@@ -46,6 +61,69 @@ class CandleLoader:
         self.__update_latest_candle(latest_candle)
         return {"info": None}
 
+    def __load_candles_by_days_with_cache(self) -> pd.DataFrame:
+        """
+        Load candles of `self.days` days from the local cache,
+        requesting only the candles which are not cached yet
+        """
+        granularity: str = self.config.get_entry_rules("granularity")  # type: ignore
+        cache = CandleCache(self.config.get_instrument(), granularity)
+        now: datetime = datetime.utcnow()
+        since: datetime = now - timedelta(days=self.days)
+
+        covered_since: Optional[datetime] = cache.covered_since
+        need_all: bool = covered_since is None or since < covered_since
+        if need_all:
+            fetched: Optional[pd.DataFrame] = self.interface.load_candles_by_days(
+                days=self.days, granularity=granularity
+            )["candles"]
+        else:
+            latest: Optional[datetime] = cache.latest_time()
+            missing_start: datetime = covered_since if latest is None else latest
+            print("[CandleLoader] Requesting only candles after {}".format(missing_start))
+            fetched = self.interface.load_candles_by_duration(
+                missing_start + timedelta(seconds=1), now, granularity=granularity
+            )["candles"]
+
+        # INFO: None is returned if there is no period to request
+        if fetched is None:
+            fetched = pd.DataFrame(columns=[])
+        if need_all:
+            cache.write(fetched, covered_since=since)
+        else:
+            cache.append(fetched)
+
+        candles: pd.DataFrame = cache.load(since=since)
+        if len(fetched) == 0:
+            return candles
+
+        # INFO: the incomplete (latest) candle is not cached, but is necessary
+        uncached: pd.DataFrame = fetched[list(candles.columns)]
+        if len(candles) > 0:
+            uncached = uncached[uncached["time"] > candles["time"].iat[-1]]
+        return pd.concat([candles, uncached], ignore_index=True)
+
+    def __load_live_candles(self) -> pd.DataFrame:
+        """
+        Load the latest LIVE_CANDLES_LENGTH candles,
+        requesting only the bars after the cached ones of the previous (warm) invocation
+        """
+        granularity: str = self.config.get_entry_rules("granularity")  # type: ignore
+        key: Tuple[str, str] = (self.config.get_instrument(), granularity)
+        cached: Optional[pd.DataFrame] = warm_cache.CANDLES.get(key)
+        length: int = self.__live_candles_length or live_candles_length(self.config)
+        fetched: pd.DataFrame = self.interface.load_specify_length_candles(
+            length=length, granularity=granularity
+        )["candles"]
+
+        candles: pd.DataFrame = fetched
+        if cached is not None:
+            # INFO: the bars requested again (ex. incomplete one) are replaced with the new ones
+            candles = pd.concat([cached, fetched]).drop_duplicates(subset="time", keep="last")
+            candles = candles.tail(LIVE_CANDLES_LENGTH).reset_index(drop=True)
+        warm_cache.CANDLES.put(key, candles.copy())
+        return candles
+
     def __select_need_request(self, operation: str) -> bool:
         need_request: bool = True
         if operation in ("backtest", "forward_test"):
@@ -61,13 +139,34 @@ class CandleLoader:
         if self.need_request is False:
             long_span_candles = pd.read_csv("tests/fixtures/sample_candles_h4.csv")
         else:
-            long_span_candles = self.__load_long_chart(granularity="D")
+            long_span_candles = self.__load_long_span_candles_with_cache()
 
         long_span_candles["time"] = pd.to_datetime(long_span_candles["time"])
         long_span_candles.set_index("time", inplace=True)
         FXBase.set_long_span_candles(long_span_candles)
         # long_span_candles.resample('4H').ffill() # upsamplingしようとしたがいらなかった。
 
+    def __load_long_span_candles_with_cache(self) -> pd.DataFrame:
+        """
+        Load daily candles, requesting only the latest ones if the complete ones are cached
+        by the previous (warm) invocation
+        """
+        key: Tuple[str, str, int] = _long_span_key(self.config, self.days)
+        cached: Optional[pd.DataFrame] = warm_cache.LONG_SPAN_CANDLES.get(key)
+        candles: pd.DataFrame
+        if cached is None:
+            candles = self.__load_long_chart(granularity=LONG_SPAN_GRANULARITY)
+        else:
+            latest: pd.DataFrame = self.interface.load_specify_length_candles(
+                length=LONG_SPAN_REFRESH_LENGTH, granularity=LONG_SPAN_GRANULARITY
+            )["candles"]
+            candles = pd.concat([cached, latest]).drop_duplicates(subset="time", keep="last")
+            # INFO: the same length as the first load (+1 for the incomplete one)
+            candles = candles.tail(len(cached) + 1).reset_index(drop=True)
+        # INFO: the latest (incomplete) one is not cached
+        warm_cache.LONG_SPAN_CANDLES.put(key, candles.iloc[:-1].copy())
+        return candles.copy()
+
     def __load_long_chart(self, granularity: Optional[str] = None) -> pd.DataFrame:
         if granularity is None:
             granularity: str = self.config.get_entry_rules("granularity")  # type: ignore
@@ -166,3 +265,31 @@ class CandleLoader:
         missing_start: datetime = required_start if ealiest == required_start else stocked_last
         missing_end: datetime = required_end if latest == required_end else stocked_first
         return missing_start, missing_end
+
+
+def live_candles_length(config: TraderConfig) -> int:
+    """
+    The number of candles which should be requested in the live trading.
+    If candles are cached, only the bars after (and including) the latest cached one are needed.
+    """
+    granularity: str = config.get_entry_rules("granularity")  # type: ignore
+    cached: Optional[pd.DataFrame] = warm_cache.CANDLES.peek(
+        (config.get_instrument(), granularity)
+    )
+    unit: Optional[timedelta] = GRANULARITY_DELTAS.get(granularity[:1])
+    if cached is None or len(cached) == 0 or unit is None:
+        return LIVE_CANDLES_LENGTH
+
+    interval: timedelta = unit * int(granularity[1:] or "1")
+    latest: datetime = converter.to_timestamp(str(cached["time"].iat[-1])).to_pydatetime()
+    # INFO: +1 for the latest cached bar (which may be incomplete), +1 for the margin
+    new_bars: int = int((datetime.utcnow() - latest) / interval) + 2
+    return min(max(new_bars, 1), LIVE_CANDLES_LENGTH)
+
+
+def is_long_span_cached(config: TraderConfig, days: int) -> bool:
+    return warm_cache.LONG_SPAN_CANDLES.peek(_long_span_key(config, days)) is not None
+
+
+def _long_span_key(config: TraderConfig, days: int) -> Tuple[str, str, int]:
+    return (config.get_instrument(), LONG_SPAN_GRANULARITY, days)
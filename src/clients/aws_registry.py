@@ -0,0 +1,94 @@
+"""
+Process-wide boto3 clients, resources and DynamoDB tables
+
+They survive warm invocations of Lambda, so that each request doesn't
+create them (and check the existence of tables) again.
+"""
+from collections.abc import Callable
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+# INFO: the keys are (service name, endpoint url, region name)
+_CLIENTS: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+_RESOURCES: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+# INFO: the keys are (table name, endpoint url), and only the tables which surely exist are cached
+_TABLES: Dict[Tuple[str, Optional[str]], "boto3.resources.factory.dynamodb.Table"] = {}
+# INFO: creating clients with the default session is not thread safe
+_LOCK = threading.RLock()
+
+
+def get_client(
+    service_name: str, endpoint_url: Optional[str] = None, region_name: Optional[str] = None
+) -> Any:
+    """Low-level clients are thread safe, so they are shared by all threads"""
+    key = (service_name, endpoint_url, region_name)
+    with _LOCK:
+        if key not in _CLIENTS:
+            _CLIENTS[key] = boto3.client(
+                service_name, **__client_options(endpoint_url, region_name)
+            )
+        return _CLIENTS[key]
+
+
+def get_resource(
+    service_name: str, endpoint_url: Optional[str] = None, region_name: Optional[str] = None
+) -> Any:
+    key = (service_name, endpoint_url, region_name)
+    with _LOCK:
+        if key not in _RESOURCES:
+            _RESOURCES[key] = boto3.resource(
+                service_name, **__client_options(endpoint_url, region_name)
+            )
+        return _RESOURCES[key]
+
+
+def get_table(
+    table_name: str,
+    endpoint_url: Optional[str] = None,
+    create_table: Optional[
+        Callable[[Any, str], "boto3.resources.factory.dynamodb.Table"]
+    ] = None,
+) -> "boto3.resources.factory.dynamodb.Table":
+    """
+    Return the DynamoDB table, whose existence is checked only at the first call
+
+    Parameters
+    ----------
+    create_table : Optional[Callable[[ServiceResource, str], Table]]
+        called when the table doesn't exist (ResourceNotFoundException is raised if None)
+    """
+    key = (table_name, endpoint_url)
+    with _LOCK:
+        if key in _TABLES:
+            return _TABLES[key]
+
+        dynamodb = get_resource("dynamodb", endpoint_url)
+        try:
+            # INFO: describe_table needs only one round trip, unlike paginated list_tables
+            get_client("dynamodb", endpoint_url).describe_table(TableName=table_name)
+            table = dynamodb.Table(table_name)
+        except ClientError as error:
+            if create_table is None or (
+                error.response["Error"]["Code"] != "ResourceNotFoundException"
+            ):
+                raise
+            table = create_table(dynamodb, table_name)
+
+        _TABLES[key] = table
+        return table
+
+
+def reset() -> None:
+    """Forget everything (for tests, which switch mocked AWS backends)"""
+    with _LOCK:
+        _CLIENTS.clear()
+        _RESOURCES.clear()
+        _TABLES.clear()
+
+
+def __client_options(endpoint_url: Optional[str], region_name: Optional[str]) -> Dict[str, str]:
+    options: Dict[str, Optional[str]] = {"endpoint_url": endpoint_url, "region_name": region_name}
+    return {name: value for name, value in options.items() if value is not None}
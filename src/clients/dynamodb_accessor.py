@@ -1,9 +1,10 @@
-from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
 from decimal import Decimal
-import json
 import os
+import time
 import typing as t
-from typing import Dict, Optional, TypedDict
+from typing import Optional, TypedDict
 
 import boto3
 from boto3.dynamodb.conditions import Attr, Key
@@ -12,9 +13,10 @@ from botocore.exceptions import (
     EndpointConnectionError,
     WaiterError,
 )
-from numpy import nan
+import numpy as np
 import pandas as pd
 
+from src.clients import aws_registry
 import src.lib.format_converter as converter
 
 
@@ -25,10 +27,97 @@ class CandleRecord(TypedDict, total=False):
     high: Decimal
     low: Decimal
     open: Decimal
+    volume: Decimal
+    complete: bool
 
 
 QueryResult = t.Dict[str, t.Union[t.List[CandleRecord], int, t.Dict]]
 
+PRICE_COLUMNS: t.List[str] = ["open", "high", "low", "close"]
+# INFO: the number columns of the candles of Oanda, which are written by batch_insert
+NUMBER_COLUMNS: t.List[str] = PRICE_COLUMNS + ["volume"]
+# INFO: BatchWriteItem accepts at most 25 items in a request
+BATCH_WRITE_SIZE: int = 25
+BATCH_WRITE_WORKERS: int = 4
+BATCH_WRITE_MAX_RETRIES: int = 8
+BATCH_WRITE_BACKOFF_SEC: float = 0.05
+GRANULARITY_DELTAS: t.Dict[str, timedelta] = {
+    "M": timedelta(minutes=1),
+    "H": timedelta(hours=1),
+    "D": timedelta(days=1),
+}
+
+
+class CandleColumnBuffer:
+    """
+    Preallocated columns of candles,
+    which are filled with the items of DynamoDB low-level responses
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.size: int = 0
+        self.times: np.ndarray = np.empty(max(capacity, 1), dtype=object)
+        self.numbers: np.ndarray = np.full((len(NUMBER_COLUMNS), max(capacity, 1)), np.nan)
+        self.completes: np.ndarray = np.full(max(capacity, 1), None, dtype=object)
+
+    def extend(self, items: t.List[t.Dict[str, t.Dict[str, t.Any]]]) -> None:
+        """
+        Parameters
+        ----------
+        items : List[Dict[str, Dict[str, Any]]]
+            Example: [{"time": {"S": "2020-10-01T12:34:00"}, "close": {"N": "123.456"}, ...}]
+        """
+        end: int = self.size + len(items)
+        if end > len(self.times):
+            self.__grow(max(end, len(self.times) * 2))
+
+        self.times[self.size : end] = [item["time"]["S"] for item in items]
+        self.numbers[:, self.size : end] = converter.to_number_columns_from_dynamo_items(
+            items, NUMBER_COLUMNS
+        )
+        # INFO: None if an item doesn't have it (or it is NULL)
+        self.completes[self.size : end] = [item.get("complete", {}).get("BOOL") for item in items]
+        self.size = end
+
+    @classmethod
+    def concat(cls, buffers: t.List["CandleColumnBuffer"]) -> "CandleColumnBuffer":
+        result = cls(sum(buffer.size for buffer in buffers))
+        for buffer in buffers:
+            end: int = result.size + buffer.size
+            result.times[result.size : end] = buffer.times[: buffer.size]
+            result.numbers[:, result.size : end] = buffer.numbers[:, : buffer.size]
+            result.completes[result.size : end] = buffer.completes[: buffer.size]
+            result.size = end
+        return result
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns
+        -------
+        pd.DataFrame
+            The same columns as the candles of Oanda:
+                open, high, low, close (float64),
+                volume (int64, or Int64 if some items don't have it),
+                complete (bool, or object if some items don't have it),
+                time (object)
+        """
+        candles = pd.DataFrame(self.numbers[:, : self.size].T, columns=NUMBER_COLUMNS)
+        volumes: pd.Series = candles["volume"]
+        candles["volume"] = volumes.astype("Int64" if volumes.hasnans else "int64")
+        completes: np.ndarray = self.completes[: self.size]
+        candles["complete"] = completes if None in completes else completes.astype(bool)
+        candles["time"] = self.times[: self.size]
+        return candles
+
+    def __grow(self, capacity: int) -> None:
+        times: np.ndarray = np.empty(capacity, dtype=object)
+        times[: self.size] = self.times[: self.size]
+        numbers: np.ndarray = np.full((len(NUMBER_COLUMNS), capacity), np.nan)
+        numbers[:, : self.size] = self.numbers[:, : self.size]
+        completes: np.ndarray = np.full(capacity, None, dtype=object)
+        completes[: self.size] = self.completes[: self.size]
+        self.times, self.numbers, self.completes = times, numbers, completes
+
 
 class DynamodbAccessor:
     def __init__(self, pare_name: str, table_name: str = "H1_CANDLES"):
@@ -39,36 +128,75 @@ class DynamodbAccessor:
         # self._region: str = os.environ.get('AWS_DEFAULT_REGION')
 
         self.pare_name: str = pare_name
-        self._table: "boto3.resources.factory.dynamodb.Table" = self.__init_table(table_name)
+        self.table_name: str = table_name
+        # INFO: the table is prepared at the first access, and shared in the process
+        self._table: Optional["boto3.resources.factory.dynamodb.Table"] = None
 
     @property
     def table(self) -> "boto3.resources.factory.dynamodb.Table":
+        self.__ensure_table()
         return self._table
 
-    def batch_insert(self, items: pd.DataFrame) -> None:
+    def batch_insert(
+        self, items: pd.DataFrame, max_workers: int = BATCH_WRITE_WORKERS
+    ) -> t.Dict[str, float]:
         """
+        Put items in chunks of 25 (the limit of BatchWriteItem),
+        running at most `max_workers` chunks concurrently
+
         Parameters
         ----------
         items : pandas.DataFrame
             Columns :
-                pareName : String (required)
                 time     : String (required)
+                the others : float, int, bool or String (NaN and None are stored as NULL)
+            When times are duplicated, the last one is put.
+
+        Returns
+        -------
+        Dict[str, float]
+            metrics: items, chunks, retries, unprocessed, seconds, items_per_sec
         """
         print("[Dynamo] batch_insert is starting ... (records size is {})".format(len(items)))
-        print("[Dynamo] items \n {})".format(items))
-
-        items["pareName"] = self.pare_name
-        items: t.List[CandleRecord] = items.replace({nan: None}).to_dict("records")
+        started_at: float = time.perf_counter()
 
-        items = json.loads(json.dumps(items), parse_float=Decimal)
+        # INFO: a request of BatchWriteItem can't contain the same keys
+        items = items.drop(columns="pareName", errors="ignore").drop_duplicates(
+            subset="time", keep="last"
+        )
+        columns: t.Dict[str, np.ndarray] = {name: items[name].to_numpy() for name in items.columns}
+        chunk_starts: t.Iterator[int] = iter(range(0, len(items), BATCH_WRITE_SIZE))
+        metrics: t.Dict[str, float] = {
+            "items": len(items),
+            "chunks": 0,
+            "retries": 0,
+            "unprocessed": 0,
+        }
+
+        self.__ensure_table()
+        client = self.__init_dynamo_client()
         try:
-            with self.table.batch_writer(overwrite_by_pkeys=["pareName", "time"]) as batch:
-                for item in items:
-                    batch.put_item(Item=item)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # INFO: chunks are built only when they are submitted, not all at once
+                running: t.Set[Future] = set()
+                for start in chunk_starts:
+                    if len(running) >= max_workers:
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        self.__collect_chunk_results(done, metrics)
+                    chunk = self.__to_dynamo_items(columns, start, start + BATCH_WRITE_SIZE)
+                    running.add(executor.submit(self.__write_chunk, client, chunk))
+                self.__collect_chunk_results(running, metrics)
         except ClientError as error:
             print(error.response["Error"]["Message"])
-        else:
-            print("[Dynamo] batch_insert is finished !")
+
+        metrics["seconds"] = time.perf_counter() - started_at
+        metrics["items_per_sec"] = metrics["items"] / metrics["seconds"]
+        print(
+            "[Dynamo] batch_insert is finished ! "
+            "({items} items, {chunks} chunks, {retries} retries, {unprocessed} unprocessed, "
+            "{items_per_sec:.1f} items/sec)".format(**metrics)
+        )
+        return metrics
 
     def list_records(self, from_str: str, to_str: str) -> t.List[CandleRecord]:
         """
@@ -91,27 +219,69 @@ class DynamodbAccessor:
         """
 
         to_edge: str = "{}.999999".format(to_str[:19])
-        try:
-            response: QueryResult = self.table.query(
-                KeyConditionExpression=Key("pareName").eq(self.pare_name)
-                & Key("time").between(from_str, to_edge)
+        query_params: t.Dict[str, t.Any] = {
+            "KeyConditionExpression": Key("pareName").eq(self.pare_name)
+            & Key("time").between(from_str, to_edge)
+        }
+        records: t.List[CandleRecord] = []
+        # INFO: a response contains at most 1MB of items, and the rest is paginated
+        while True:
+            try:
+                response: QueryResult = self.table.query(**query_params)
+            except ClientError as error:
+                print(error.response["Error"]["Message"])
+                raise
+            records.extend(response["Items"])
+            if "LastEvaluatedKey" not in response:
+                return records
+            query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def list_candle_columns(
+        self, from_str: str, to_str: str, segments: int = 4
+    ) -> CandleColumnBuffer:
+        """
+        Query candles from_str ~ to_str,
+        splitting the period into `segments` and querying them concurrently
+
+        Parameters
+        ----------
+        from_str : str
+            example: '2020-12-08T00:00:00'
+        to_str : str
+            example: '2020-12-15T15:22:21'
+        segments : int
+            the number of time segments (and threads)
+
+        Returns
+        -------
+        CandleColumnBuffer
+        """
+        bounds: t.List[str] = self.__split_period(from_str, to_str, segments)
+        # INFO: low-level clients are thread safe, but resources (self.table) are not.
+        #   (self.table.meta.client isn't used, because it (de)serializes items as the resource)
+        self.__ensure_table()
+        client = self.__init_dynamo_client()
+        with ThreadPoolExecutor(max_workers=len(bounds) - 1) as executor:
+            buffers: t.List[CandleColumnBuffer] = list(
+                executor.map(
+                    lambda i: self.__query_segment(
+                        client, bounds[i], bounds[i + 1], is_last=(i == len(bounds) - 2)
+                    ),
+                    range(len(bounds) - 1),
+                )
             )
-        except ClientError as error:
-            print(error.response["Error"]["Message"])
-            raise
-        else:
-            records: t.List[CandleRecord] = response["Items"]
-            return records
+        return CandleColumnBuffer.concat(buffers)
 
     def list_candles(self, from_str: str, to_str: str) -> pd.DataFrame:
-        records: t.List[CandleRecord] = self.list_records(from_str, to_str)
-        return converter.to_candles_from_dynamo(records)
+        candles: pd.DataFrame = self.list_candle_columns(from_str, to_str).to_frame()
+        candles["time"] = converter.convert_to_m10_array(candles["time"])
+        return candles
 
     def batch_delete(self, from_str: str, to_str: str) -> None:
         records: t.List[CandleRecord] = self.list_records(from_str, to_str)
         print("target length: ", len(records))
         for record in records:
-            result = self._table.delete_item(
+            result = self.table.delete_item(
                 Key={"pareName": self.pare_name, "time": record["time"]}
             )
             print("Deletion target: ", record["time"], ", Result: ", result)
@@ -136,36 +306,129 @@ class DynamodbAccessor:
             )
             self.batch_insert(sample_candles)
 
-    def __init_table(self, table_name: str) -> "boto3.resources.factory.dynamodb.Table":
-        dynamodb: "boto3.resources.factory.dynamodb.ServiceResource" = self.__init_dynamo_resource()
+    def __to_dynamo_items(
+        self, columns: t.Dict[str, np.ndarray], start: int, end: int
+    ) -> t.List[t.Dict[str, t.Dict[str, t.Any]]]:
+        typed_columns: t.List[t.List[t.Dict[str, t.Any]]] = [
+            _to_dynamo_values(values[start:end]) for values in columns.values()
+        ]
+        names: t.List[str] = ["pareName"] + list(columns.keys())
+        pare_name: t.Dict[str, str] = {"S": self.pare_name}
+        return [dict(zip(names, (pare_name,) + values)) for values in zip(*typed_columns)]
+
+    def __write_chunk(
+        self, client, chunk: t.List[t.Dict[str, t.Dict[str, t.Any]]]
+    ) -> t.Tuple[int, int]:
+        """
+        Returns
+        -------
+        Tuple[int, int]
+            the number of retries, the number of items which couldn't be put
+        """
+        requests: t.List[t.Dict[str, t.Any]] = [{"PutRequest": {"Item": item}} for item in chunk]
+        for retry in range(BATCH_WRITE_MAX_RETRIES + 1):
+            if retry > 0:
+                # INFO: exponential backoff for throttled items
+                time.sleep(min(BATCH_WRITE_BACKOFF_SEC * 2 ** (retry - 1), 5.0))
+            response: t.Dict[str, t.Any] = client.batch_write_item(
+                RequestItems={self.table_name: requests}
+            )
+            requests = response.get("UnprocessedItems", {}).get(self.table_name, [])
+            if requests == []:
+                return retry, 0
+        print("[Dynamo] {} items are unprocessed".format(len(requests)))
+        return BATCH_WRITE_MAX_RETRIES, len(requests)
+
+    @staticmethod
+    def __collect_chunk_results(
+        futures: t.Iterable[Future], metrics: t.Dict[str, float]
+    ) -> None:
+        for future in futures:
+            retries, unprocessed = future.result()
+            metrics["chunks"] += 1
+            metrics["retries"] += retries
+            metrics["unprocessed"] += unprocessed
+
+    def __split_period(self, from_str: str, to_str: str, segments: int) -> t.List[str]:
+        """
+        Split from_str ~ to_str into segments,
+        each of which is [bounds[i], bounds[i + 1]) in the order of strings
+        """
+        to_edge: str = "{}.999999".format(to_str[:19])
+        start: datetime = datetime.fromisoformat(from_str[:19])
+        end: datetime = datetime.fromisoformat(to_str[:19])
+        inner_bounds: t.List[str] = [
+            (start + (end - start) * i / segments).isoformat(timespec="seconds")
+            for i in range(1, segments)
+        ]
+        inner_bounds = [bound for bound in inner_bounds if from_str < bound < to_edge]
+        return [from_str] + sorted(set(inner_bounds)) + [to_edge]
+
+    def __query_segment(
+        self, client, from_str: str, to_str: str, is_last: bool
+    ) -> CandleColumnBuffer:
+        capacity: int = self.__estimate_length(from_str, to_str)
+        buffer = CandleColumnBuffer(capacity)
+        query_params: t.Dict[str, t.Any] = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pareName = :pare_name AND #time BETWEEN :from AND :to",
+            "ExpressionAttributeNames": {"#time": "time"},
+            "ExpressionAttributeValues": {
+                ":pare_name": {"S": self.pare_name},
+                ":from": {"S": from_str},
+                ":to": {"S": to_str},
+            },
+        }
+        while True:
+            try:
+                response: t.Dict[str, t.Any] = client.query(**query_params)
+            except ClientError as error:
+                print(error.response["Error"]["Message"])
+                raise
+            items: t.List[t.Dict[str, t.Any]] = response["Items"]
+            if not is_last:
+                # INFO: `to_str` is the start of the next segment
+                items = [item for item in items if item["time"]["S"] != to_str]
+            buffer.extend(items)
+            if "LastEvaluatedKey" not in response:
+                return buffer
+            query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def __estimate_length(self, from_str: str, to_str: str) -> int:
+        """Estimate the number of candles by the granularity in table_name (ex. 'H1_CANDLES')"""
+        granularity: str = self.table_name.split("_")[0]
+        unit: Optional[timedelta] = GRANULARITY_DELTAS.get(granularity[:1])
+        if unit is None or not (granularity[1:] or "1").isdigit():
+            return 1024
+        interval: timedelta = unit * int(granularity[1:] or "1")
+        period: timedelta = datetime.fromisoformat(to_str[:19]) - datetime.fromisoformat(
+            from_str[:19]
+        )
+        return max(int(period / interval) + 1, 1)
 
+    def __ensure_table(self) -> None:
+        """Create the table if it doesn't exist (low-level clients don't create it)"""
+        if self._table is None:
+            self._table = self.__init_table(self.table_name)
+
+    def __init_table(self, table_name: str) -> "boto3.resources.factory.dynamodb.Table":
         try:
-            table_names: t.List[str] = self.__init_dynamo_client().list_tables()["TableNames"]
-            if table_name not in table_names:
-                table: "boto3.resources.factory.dynamodb.Table" = self.__create_table(
-                    dynamodb, table_name
-                )
-            else:
-                table = dynamodb.Table(table_name)
+            table: "boto3.resources.factory.dynamodb.Table" = aws_registry.get_table(
+                table_name, endpoint_url=self.__endpoint_url(), create_table=self.__create_table
+            )
         except (ClientError, EndpointConnectionError, WaiterError) as error:
             print(error)
             raise Exception("[Dynamo] can`t have reached DynamoDB !")
 
         return table
 
-    def __init_dynamo_resource(self) -> "boto3.resources.factory.dynamodb.ServiceResource":
-        resource_info: Dict[str, Optional[str]] = {}
-        if self._environment == "localhost":
-            resource_info = {"endpoint_url": self._endpoint_url}
-
-        return boto3.resource("dynamodb", **resource_info)
-
     def __init_dynamo_client(self):
-        resource_info: Dict[str, Optional[str]] = {}
-        if self._environment == "localhost":
-            resource_info = {"endpoint_url": self._endpoint_url}
+        return aws_registry.get_client("dynamodb", endpoint_url=self.__endpoint_url())
 
-        return boto3.client("dynamodb", **resource_info)
+    def __endpoint_url(self) -> Optional[str]:
+        if self._environment == "localhost":
+            return self._endpoint_url
+        return None
 
     def __create_table(
         self, dynamodb: "boto3.resources.factory.dynamodb.ServiceResource", table_name: str
@@ -186,6 +449,30 @@ class DynamodbAccessor:
         return table
 
 
+def _to_dynamo_values(values: np.ndarray) -> t.List[t.Dict[str, t.Any]]:
+    """Convert a column into the values of DynamoDB low-level requests"""
+    if values.dtype.kind == "f":
+        # INFO: repr() of float is the same as the text which json.dumps generated
+        return [
+            {"NULL": True} if value != value else {"N": repr(value)} for value in values.tolist()
+        ]
+    if values.dtype.kind in "iu":
+        return [{"N": str(value)} for value in values.tolist()]
+    if values.dtype.kind == "b":
+        return [{"BOOL": value} for value in values.tolist()]
+    return [_to_dynamo_value(value) for value in values.tolist()]
+
+
+def _to_dynamo_value(value: t.Any) -> t.Dict[str, t.Any]:
+    if value is None or (isinstance(value, float) and value != value):
+        return {"NULL": True}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float)):
+        return {"N": repr(value)}
+    return {"S": str(value)}
+
+
 def loading_sample(startdate: str = None, enddate: str = None) -> pd.DataFrame:
     """
     Usage example of this class
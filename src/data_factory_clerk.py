@@ -1,22 +1,45 @@
+from typing import Any, Dict, Hashable, Optional, Tuple
+
 import pandas as pd
 
-from src.analyzer import Analyzer
+from src.analyzer import Analyzer, required_lookback
 from src.candle_storage import FXBase
+from src.indicator_state import IndicatorState
 import src.trade_rules.base as base_rules
+import src.warm_cache as warm_cache
+
+# INFO: long indicators which depend only on a fixed number of candles before
+LONG_ROLLING_INDICATORS: Tuple[str, ...] = ("stoD", "stoSD", "20SMA")
 
 
 # -------------------------------------------------------------
 # Public methods
 # -------------------------------------------------------------
-def prepare_indicators() -> pd.DataFrame:
+def prepare_indicators(state_key: Optional[Hashable] = None) -> pd.DataFrame:
+    """
+    Parameters
+    ----------
+    state_key : Optional[Hashable]
+        If given, indicators are updated from the IndicatorState cached with this key
+        (only the last IndicatorState.TAIL_LENGTH rows are the same as a full calculation)
+    """
+    candles: pd.DataFrame = FXBase.get_candles()
+    long_span_candles: Optional[pd.DataFrame] = FXBase.get_long_span_candles()
+
     ana = Analyzer()
-    ana.calc_indicators(
-        FXBase.get_candles(),
-        long_span_candles=FXBase.get_long_span_candles(),
+    ana.calc_indicators(candles, stoc_only=state_key is not None)
+    indicators: pd.DataFrame
+    if state_key is None:
+        indicators = ana.get_indicators()
+    else:
+        indicators = _update_indicator_state(state_key, candles)
+    long_indicators: pd.DataFrame = (
+        ana.get_long_indicators()
+        if long_span_candles is None
+        else _calc_long_indicators(candles, long_span_candles)
     )
-    indicators: pd.DataFrame = ana.get_indicators()
 
-    candles: pd.DataFrame = _merge_long_indicators(ana.get_long_indicators())
+    candles = _merge_long_indicators(long_indicators)
     FXBase.set_candles(candles)
     return indicators
 
@@ -24,6 +47,70 @@ def prepare_indicators() -> pd.DataFrame:
 # -------------------------------------------------------------
 # Private methods
 # -------------------------------------------------------------
+def _calc_long_indicators(candles: pd.DataFrame, long_span_candles: pd.DataFrame) -> pd.DataFrame:
+    """
+    The long indicators of the complete long span candles are cached,
+    and only the ones of the latest (incomplete) candle are calculated on each invocation
+    """
+    lookback: int = required_lookback(LONG_ROLLING_INDICATORS)
+    if len(long_span_candles) <= lookback + 1:
+        return _analyze_long_span(candles, long_span_candles)
+
+    complete_candles: pd.DataFrame = long_span_candles.iloc[:-1]
+    key: Hashable = _long_indicators_key(complete_candles)
+    complete_indicators: Optional[pd.DataFrame] = warm_cache.LONG_INDICATORS.get(key)
+    if complete_indicators is None:
+        complete_indicators = _analyze_long_span(candles, complete_candles)
+        warm_cache.LONG_INDICATORS.put(key, complete_indicators)
+
+    # INFO: the rolling ones of the latest candle need only `lookback` candles before it,
+    #   and 10EMA continues the one of the previous candle
+    latest: pd.DataFrame = _analyze_long_span(
+        candles, long_span_candles.iloc[-(lookback + 1) :]
+    ).iloc[[-1]]
+    latest = latest.assign(
+        long_10EMA=_next_adjusted_ema(
+            complete_indicators["long_10EMA"].iat[-1],
+            terms=len(complete_candles),
+            close=long_span_candles["close"].iat[-1],
+            span=10,
+        )
+    )
+    return pd.concat([complete_indicators, latest], ignore_index=True)
+
+
+def _analyze_long_span(candles: pd.DataFrame, long_span_candles: pd.DataFrame) -> pd.DataFrame:
+    ana = Analyzer()
+    ana.calc_indicators(candles, long_span_candles=long_span_candles, stoc_only=True)
+    return ana.get_long_indicators()
+
+
+def _long_indicators_key(long_span_candles: pd.DataFrame) -> Hashable:
+    """Long indicators depend only on long span candles, so they are identified by the contents"""
+    hashes: pd.Series = pd.util.hash_pandas_object(long_span_candles, index=True)
+    return (len(long_span_candles), int(hashes.sum()))
+
+
+def _next_adjusted_ema(last_ema: float, terms: int, close: float, span: int) -> float:
+    """
+    `ewm(span).mean()` (adjust=True) of `terms` + 1 closes,
+    from the one of the first `terms` closes (without NaN)
+    """
+    decay: float = 1 - 2 / (span + 1)
+    last_weights: float = (1 - decay**terms) / (1 - decay)
+    return (close + decay * last_ema * last_weights) / (1 + decay * last_weights)
+
+
+def _update_indicator_state(state_key: Hashable, candles: pd.DataFrame) -> pd.DataFrame:
+    """Resume the state of the previous invocation, or build it if candles don't continue it"""
+    saved: Optional[Dict[str, Any]] = warm_cache.INDICATOR_STATES.get(state_key)
+    state: Optional[IndicatorState] = None if saved is None else IndicatorState.from_dict(saved)
+    if state is None or not state.sync(candles):
+        state = IndicatorState.from_candles(candles)
+    warm_cache.INDICATOR_STATES.put(state_key, state.to_dict())
+    return state.get_indicators(index=candles.index)
+
+
 def _merge_long_indicators(long_indicators: pd.DataFrame) -> pd.DataFrame:
     candles: pd.DataFrame = FXBase.get_candles()
     if "stoD_over_stoSD" in candles.columns:
@@ -279,11 +279,14 @@ class FigureDrawer:
         self.__axes[0].vlines(indexes, vmin, vmax, color="yellow", linewidth=0.5)
         self.__axes[1].vlines(indexes, 0, 100, color="yellow", linewidth=0.5)
 
-    def create_png(self, granularity, sr_time, num=0, filename=None):
+    def create_png(self, granularity, sr_time, num=0, filename=None, candles_length=None):
         """描画済みイメージをpngファイルに書き出す"""
+        # INFO: worker processes pass the length, since FXBase isn't shared with them
+        if candles_length is None:
+            candles_length = len(FXBase.get_candles())
         self.__axes[0].set_title(
             "{inst}-{granularity} candles (len={len})".format(
-                inst=self._instrument, granularity=granularity, len=len(FXBase.get_candles())
+                inst=self._instrument, granularity=granularity, len=candles_length
             )
         )
         xticks_number, xticks_index = self.__prepare_xticks(sr_time)
@@ -0,0 +1,218 @@
+"""
+Run backtests of many parameter combinations on worker processes.
+
+Indicators and trade signs are prepared only once for each (rule, spread),
+and their numeric columns are shared with workers through shared memory.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import dataclasses
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from src.lib.results_store import ResultsStore
+import src.lib.statistics_module as statistics
+from src.trader import Trader
+from src.trader_config import FILTER_ELEMENTS, TraderConfig
+
+POSITIONS_COLUMNS: List[str] = ["time", "position", "entry_price", "exitable_price"]
+
+# INFO: the state of each worker process (set by `_init_worker`)
+_WORKER: Dict[str, Any] = {}
+
+
+@dataclasses.dataclass(frozen=True)
+class GridConfig:
+    rule: str
+    entry_filters: Tuple[str, ...]
+    stoploss_buffer: float
+    spread: float
+
+
+def build_grid(
+    rule: str,
+    filter_sets: Iterable[Iterable[str]],
+    stoploss_buffers: Iterable[float],
+    spreads: Iterable[float],
+) -> List[GridConfig]:
+    """Generate all combinations of the parameters"""
+    return [
+        GridConfig(rule, tuple(filters), stoploss_buffer, spread)
+        for spread in spreads
+        for filters in filter_sets
+        for stoploss_buffer in stoploss_buffers
+    ]
+
+
+def run_grid(
+    trader: Trader,
+    grid: Iterable[GridConfig],
+    max_workers: Optional[int] = None,
+    store: Optional[ResultsStore] = None,
+) -> pd.DataFrame:
+    """
+    Backtest all the GridConfigs on a process pool
+
+    Parameters
+    ----------
+    trader : Trader
+        Its config is used as the template of each run, and isn't changed.
+    grid : Iterable[GridConfig]
+    max_workers : Optional[int]
+        the number of worker processes, os.cpu_count() if None
+    store : Optional[ResultsStore]
+        all the results are appended to it at once
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: TRADE_RESULT_ITEMS + FILTER_ELEMENTS (a row per GridConfig, in the order of grid)
+    """
+    grid = list(grid)
+    if len(grid) == 0:
+        return pd.DataFrame(columns=statistics.TRADE_RESULT_ITEMS + FILTER_ELEMENTS)
+
+    summaries: Dict[GridConfig, pd.DataFrame] = {}
+    # INFO: trade signs depend on spread (entryable prices), but not on filters and stoploss
+    groups: Dict[Tuple[str, float], List[GridConfig]] = {}
+    for grid_config in grid:
+        groups.setdefault((grid_config.rule, grid_config.spread), []).append(grid_config)
+
+    for (rule, spread), group in groups.items():
+        print("[GridRunner] rule: {}, spread: {}, {} runs".format(rule, spread, len(group)))
+        summaries.update(zip(group, __run_group(trader, rule, spread, group, max_workers)))
+
+    results: pd.DataFrame = pd.concat(
+        [summaries[grid_config] for grid_config in grid], ignore_index=True
+    )
+    if store is not None:
+        store.append(results)
+    return results
+
+
+def __run_group(
+    trader: Trader,
+    rule: str,
+    spread: float,
+    group: List[GridConfig],
+    max_workers: Optional[int],
+) -> List[pd.DataFrame]:
+    template: TraderConfig = copy.deepcopy(trader.config)
+    template.set_entry_rules("static_spread", spread)
+    signs_trader: Trader = type(trader)(
+        o_interface=trader._oanda_interface, config=template, result_processor=None
+    )
+    candles, indicators = signs_trader.prepare_signs(rule)
+
+    shared_frames: List[_SharedFrame] = [_SharedFrame(candles), _SharedFrame(indicators)]
+    try:
+        with ProcessPoolExecutor(
+            max_workers,
+            initializer=_init_worker,
+            initargs=(type(trader), template, *[frame.handle for frame in shared_frames]),
+        ) as executor:
+            return list(executor.map(_run_backtest, group))
+    finally:
+        for frame in shared_frames:
+            frame.release()
+
+
+class _SharedFrame:
+    """
+    Numeric columns of a DataFrame copied into a shared memory block.
+    The other (object) columns are contained in `handle`,
+    so they are pickled only once per worker.
+    """
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        specs: List[Tuple[str, str, int]] = []  # INFO: (column name, dtype, offset)
+        offset: int = 0
+        for name, dtype in frame.dtypes.items():
+            if dtype.kind not in "biuf":
+                continue
+            specs.append((name, dtype.str, offset))
+            # INFO: keep every column aligned to 8 bytes
+            offset += -(-len(frame) * dtype.itemsize // 8) * 8
+
+        self.__memory = SharedMemory(create=True, size=max(offset, 1))
+        for name, dtype, offset in specs:
+            np.ndarray(len(frame), dtype=dtype, buffer=self.__memory.buf, offset=offset)[:] = frame[
+                name
+            ].to_numpy()
+
+        shared_names = [spec[0] for spec in specs]
+        self.handle: Dict[str, Any] = {
+            "memory_name": self.__memory.name,
+            "index": frame.index,
+            "columns": list(frame.columns),
+            "specs": specs,
+            "objects": frame.drop(columns=shared_names),
+        }
+
+    def release(self) -> None:
+        self.__memory.close()
+        self.__memory.unlink()
+
+
+def _attach_frame(handle: Dict[str, Any]) -> Tuple[SharedMemory, pd.DataFrame]:
+    """Rebuild the DataFrame whose numeric columns are views of the shared memory"""
+    memory = SharedMemory(name=handle["memory_name"])
+    length: int = len(handle["index"])
+    columns: Dict[str, Any] = {
+        name: np.ndarray(length, dtype=dtype, buffer=memory.buf, offset=offset)
+        for name, dtype, offset in handle["specs"]
+    }
+    objects: pd.DataFrame = handle["objects"]
+    frame = pd.DataFrame(
+        {
+            name: columns[name] if name in columns else objects[name].to_numpy()
+            for name in handle["columns"]
+        },
+        index=handle["index"],
+        copy=False,
+    )
+    return memory, frame
+
+
+def _init_worker(
+    trader_class: Type[Trader],
+    template: TraderConfig,
+    candles_handle: Dict[str, Any],
+    indicators_handle: Dict[str, Any],
+) -> None:
+    candles_memory, candles = _attach_frame(candles_handle)
+    indicators_memory, indicators = _attach_frame(indicators_handle)
+    _WORKER.update(
+        trader_class=trader_class,
+        template=template,
+        candles=candles,
+        indicators=indicators,
+        # INFO: the shared memory must be alive while the views are used
+        memories=[candles_memory, indicators_memory],
+    )
+
+
+def _run_backtest(grid_config: GridConfig) -> pd.DataFrame:
+    config: TraderConfig = copy.deepcopy(_WORKER["template"])
+    config.set_entry_rules("entry_filters", list(grid_config.entry_filters))
+    config.set_entry_rules("stoploss_buffer_pips", grid_config.stoploss_buffer)
+
+    trader: Trader = _WORKER["trader_class"](o_interface=None, config=config, result_processor=None)
+    # INFO: the workers would write the same dump at once
+    result: Dict[str, Any] = trader.backtest_with_signs(
+        grid_config.rule, _WORKER["candles"], _WORKER["indicators"], dump_csv=False
+    )
+    df_positions: pd.DataFrame
+    if result["result"] == "no position":
+        # INFO: a row without entries, so that every GridConfig has its summary
+        df_positions = (
+            _WORKER["candles"]
+            .reindex(columns=POSITIONS_COLUMNS)
+            .astype({"position": object, "entry_price": float, "exitable_price": float})
+        )
+    else:
+        df_positions = result["candles"].reindex(columns=POSITIONS_COLUMNS)
+    return statistics.summarize_backtest_result(grid_config.rule, df_positions, config)
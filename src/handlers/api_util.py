@@ -1,4 +1,6 @@
-from typing import Dict, Optional
+import base64
+import gzip
+from typing import Any, Dict, Optional
 
 
 def headers(method: str, allow_credentials: Optional[str] = None) -> Dict[str, str]:
@@ -13,3 +15,29 @@ def headers(method: str, allow_credentials: Optional[str] = None) -> Dict[str, s
         headers = dict(**headers, **{"Access-Control-Allow-Credentials": "true"})
 
     return headers
+
+
+# INFO: API Gateway returns a body with `isBase64Encoded` as binary only when the Accept header
+#   of the request matches binaryMediaTypes, so this is the only one listed there (serverless.yml).
+#   Other requests (ex. the preflight of CORS) are never regarded as binary.
+GZIP_MEDIA_TYPE: str = "application/vnd.tradehist.columnar+gzip"
+
+
+def accepts_gzip(event: Dict[str, Any]) -> bool:
+    """Whether the client asks for the gzip body, with both Accept-Encoding and Accept"""
+    return "gzip" in _header(event, "Accept-Encoding") and GZIP_MEDIA_TYPE in _header(
+        event, "Accept"
+    )
+
+
+def _header(event: Dict[str, Any], name: str) -> str:
+    request_headers: Dict[str, str] = event.get("headers") or {}
+    return next(
+        (value for key, value in request_headers.items() if key.lower() == name.lower()), ""
+    )
+
+
+def gzip_body(body: str) -> str:
+    """Compress the body, which API Gateway returns as binary with `isBase64Encoded`"""
+    # INFO: the level 1 is 5 times faster than 6, and only about 10% larger for tradehist
+    return base64.b64encode(gzip.compress(body.encode(), compresslevel=1)).decode()
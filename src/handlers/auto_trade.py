@@ -1,4 +1,5 @@
 import sys
+import time
 import traceback
 from typing import Dict, Union
 
@@ -9,10 +10,12 @@ from requests.exceptions import ConnectionError, SSLError
 
 from src.clients.error_module import _notify_error
 from src.real_trader import RealTrader
+import src.warm_cache as warm_cache
 from tools.trade_lab import create_trader_instance
 
 
 def lambda_handler(_event: EventBridgeEvent, _context: LambdaContext) -> Dict[str, Union[int, str]]:
+    started_at: float = time.perf_counter()
     try:
         trader, _ = create_trader_instance(RealTrader, operation="live", days=60)
         if trader is None:
@@ -20,6 +23,8 @@ def lambda_handler(_event: EventBridgeEvent, _context: LambdaContext) -> Dict[st
             return {"statusCode": 204, "body": msg}
 
         trader.apply_trading_rule()
+        print("[Trader] the live cycle took {:.3f} sec".format(time.perf_counter() - started_at))
+        warm_cache.log_stats()
         msg = "lambda function is correctly finished."
     except (V20Error, SSLError, ConnectionError) as error:
         type_, value, traceback_ = sys.exc_info()
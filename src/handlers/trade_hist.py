@@ -1,16 +1,21 @@
 from datetime import datetime
 import json
-from typing import Dict, List, Tuple
+import time
+from typing import Any, Dict, List, Tuple, Union
 
 from aws_lambda_powertools.utilities.data_classes import (
     APIGatewayProxyEvent,)  # SQSEvent, event_source
 from aws_lambda_powertools.utilities.typing import LambdaContext
-import numpy as np
 import pandas as pd
 
 from src.history_visualizer import Visualizer
+import src.lib.format_converter as converter
 
-from . import api_util
+from . import api_util, tradehist_cache
+
+
+# INFO: records is a list of rows, and columnar is a list per column (without repeated names)
+PAYLOAD_FORMATS: Tuple[str, ...] = ("records", "columnar")
 
 
 def api_handler(event: APIGatewayProxyEvent, _context: LambdaContext) -> Dict:
@@ -22,22 +27,30 @@ def api_handler(event: APIGatewayProxyEvent, _context: LambdaContext) -> Dict:
     body: str
     status: int
     valid, body, status = __tradehist_params_valid(params, multi_value_params)
+    headers: Dict[str, str] = api_util.headers(method="GET", allow_credentials="true")
+    response: Dict[str, Any] = {}
     if valid:
-        body = __drive_generating_tradehist(params, multi_value_params)
+        started_at: float = time.perf_counter()
+        payload_format: str = params.get("format") or "records"
+        body = __drive_generating_tradehist(params, multi_value_params, payload_format)
         status = 200
+        # INFO: only columnar is compressed, so that the clients of records work as they are
+        #   (the clients of gzip send `Accept: api_util.GZIP_MEDIA_TYPE`)
+        if payload_format == "columnar" and api_util.accepts_gzip(event):
+            body = api_util.gzip_body(body)
+            headers = dict(headers, **{"Content-Encoding": "gzip"})
+            response["isBase64Encoded"] = True
+        tradehist_cache.log_stats(latency_sec=time.perf_counter() - started_at)
     print("[Main] lambda function is correctly finished.")
 
-    return {
-        "statusCode": status,
-        "headers": api_util.headers(method="GET", allow_credentials="true"),
-        "body": body,
-    }
+    return {"statusCode": status, "headers": headers, "body": body, **response}
 
 
 def __tradehist_params_valid(
     params: Dict[str, str], _multi_value_params: Dict[str, List]
 ) -> Tuple[bool, str, int]:
     requested_period: int = __period_between_from_to(params["from"], params["to"])
+    payload_format: str = params.get("format") or "records"
     if requested_period >= 60:
         msg: str = "Maximum days between FROM and TO is 60 days. You requested {} days!".format(
             requested_period
@@ -45,6 +58,11 @@ def __tradehist_params_valid(
         body: str = json.dumps({"message": msg})
         status: int = 400
         result = {"valid": False, "body": body, "status": status}
+    elif payload_format not in PAYLOAD_FORMATS:
+        msg = "FORMAT must be one of {}. You requested {}!".format(
+            ", ".join(PAYLOAD_FORMATS), payload_format
+        )
+        result = {"valid": False, "body": json.dumps({"message": msg}), "status": 400}
     else:
         result = {"valid": True, "body": None, "status": None}
     return result["valid"], result["body"], result["status"]  # type: ignore
@@ -58,28 +76,32 @@ def __period_between_from_to(from_str: str, to_str: str) -> int:
 
 
 def __drive_generating_tradehist(
-    params: Dict[str, str], multi_value_params: Dict[str, List]
+    params: Dict[str, str], multi_value_params: Dict[str, List], payload_format: str = "records"
 ) -> str:
-    pare_name: str = params["pareName"]
-    from_str: str = params["from"]
-    to_str: str = params["to"]
-    indicator_names: List[str] = multi_value_params.get("indicator_names[]") or []
+    request: tradehist_cache.TradehistRequest = tradehist_cache.normalize_params(
+        params, multi_value_params
+    )
+    tradehist: pd.DataFrame = tradehist_cache.load_history(request, build=__build_tradehist)
+    # INFO: np.nan is written as null, because `json` can't realize np.nan(Nan)
+    #   to_json ならこの問題は起きないが、dumps と組み合わせると文字列になってしまうのでしない
+    history: Union[List[Dict[str, Any]], Dict[str, List[Any]]]
+    if payload_format == "columnar":
+        history = converter.to_nullable_columns(tradehist)
+    else:
+        history = converter.to_nullable_records(tradehist)
+    return json.dumps({"history": history})
+
 
+def __build_tradehist(
+    request: tradehist_cache.TradehistRequest, from_str: str, to_str: str
+) -> pd.DataFrame:
     visualizer: Visualizer = Visualizer(
         from_str,
         to_str,
-        instrument=pare_name,
-        indicator_names=tuple(indicator_names),
+        instrument=request.pare_name,
+        indicator_names=request.indicator_names,
     )
-    tradehist: pd.DataFrame = visualizer.run()
-    result: str = json.dumps(
-        {
-            # HACK: use replace np.nan into None because `json` can't realize np.nan(Nan)
-            #   to_json ならこの問題は起きないが、dumps と組み合わせると文字列になってしまうのでしない
-            "history": (tradehist.replace({np.nan: None}).to_dict(orient="records"))
-        }
-    )
-    return result
+    return visualizer.run()
 
 
 # For local console
@@ -0,0 +1,238 @@
+"""
+Cache of the trade histories served by tradehist API
+
+A window which ends SETTLE_MARGIN before the latest H1 boundary no longer changes,
+so its history is stored on the local disk (/tmp of Lambda, which survives warm invocations).
+For a window which is still open, the history before that settled boundary is stored
+in the same way, and only the rows after it (the right edge) are calculated on each request.
+Stored windows are aligned to H1 candles, so that the requests in the same hour share them.
+"""
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+import pandas as pd
+
+import src.lib.format_converter as converter
+
+LOGGER = Logger()
+DEFAULT_CACHE_DIR: str = "/tmp/tradehist_cache"
+DEFAULT_MAX_ENTRIES: int = 200
+# INFO: the right edge is calculated with the candles and transactions of this period before it,
+#   so that indicators and stoplosses continue from the stored history
+EDGE_LOOKBACK: timedelta = timedelta(hours=100)
+# INFO: the latest candles and transactions may not be ingested into DynamoDB / Oanda yet,
+#   so the history of this period before the open candle is calculated on each request
+SETTLE_MARGIN: timedelta = timedelta(hours=2)
+H1: timedelta = timedelta(hours=1)
+ISO_FORMAT: str = "%Y-%m-%dT%H:%M:%S.%fZ"
+TIME_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+
+# INFO: (request, from_iso, to_iso) -> history (the result of Visualizer.run)
+HistoryBuilder = Callable[["TradehistRequest", str, str], pd.DataFrame]
+
+STATS: Dict[str, int] = {"hits": 0, "misses": 0, "edge_refreshes": 0}
+
+
+class TradehistRequest(NamedTuple):
+    pare_name: str
+    from_iso: str
+    to_iso: str
+    indicator_names: Tuple[str, ...]
+
+    def replace_to(self, to_time: datetime) -> "TradehistRequest":
+        return self._replace(to_iso=to_time.strftime(ISO_FORMAT))
+
+    def cache_key(self) -> "TradehistRequest":
+        """
+        The same key for the requests whose `from` are in the same H1 candle
+        (the history starts from the candle including `from` anyway).
+        `from_iso` itself is passed to HistoryBuilder as it is,
+        so that the transactions before `from` are not requested.
+        """
+        return self._replace(
+            from_iso=latest_boundary(parse_iso(self.from_iso)).strftime(ISO_FORMAT)
+        )
+
+
+def normalize_params(
+    params: Dict[str, str], multi_value_params: Dict[str, List]
+) -> TradehistRequest:
+    """
+    Make the requests for the same history equal, ignoring the order of indicator names.
+    `from` is aligned only in the key of the stored window (see `TradehistRequest.cache_key`),
+    and `to` is aligned when the window is stored (see `load_history`).
+    """
+    indicator_names: List[str] = multi_value_params.get("indicator_names[]") or []
+    return TradehistRequest(
+        pare_name=params["pareName"].strip().upper(),
+        from_iso=parse_iso(params["from"]).strftime(ISO_FORMAT),
+        to_iso=parse_iso(params["to"]).strftime(ISO_FORMAT),
+        indicator_names=tuple(sorted(set(indicator_names))),
+    )
+
+
+def parse_iso(iso_str: str) -> datetime:
+    return datetime.fromisoformat(iso_str.strip()[:26].rstrip("Z"))
+
+
+class TradehistStore:
+    """Histories of closed windows, each of which is a JSON file of columns"""
+
+    def __init__(
+        self, cache_dir: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.__directory: str = cache_dir or os.environ.get(
+            "TRADEHIST_CACHE_DIR", DEFAULT_CACHE_DIR
+        )
+        self.__max_entries: int = max_entries
+        os.makedirs(self.__directory, exist_ok=True)
+
+    def get(self, request: TradehistRequest) -> Optional[pd.DataFrame]:
+        path: str = self.__path(request)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r") as history_file:
+            columns: Dict[str, List[Any]] = json.load(history_file)
+        return pd.DataFrame(columns)
+
+    def put(self, request: TradehistRequest, history: pd.DataFrame) -> None:
+        # INFO: written into another file first, so that readers never see a half-written one
+        path: str = self.__path(request)
+        writing_path: str = "{}.{}.tmp".format(path, os.getpid())
+        with open(writing_path, "w") as history_file:
+            json.dump(converter.to_nullable_columns(history), history_file)
+        os.replace(writing_path, path)
+        self.__evict()
+
+    #
+    # private
+    #
+    def __path(self, request: TradehistRequest) -> str:
+        digest: str = hashlib.sha256(json.dumps(request.cache_key()).encode()).hexdigest()
+        return os.path.join(self.__directory, "{}.json".format(digest))
+
+    def __evict(self) -> None:
+        """Remove the least recently written files over `max_entries`"""
+        paths: List[str] = [
+            os.path.join(self.__directory, name)
+            for name in os.listdir(self.__directory)
+            if name.endswith(".json")
+        ]
+        if len(paths) <= self.__max_entries:
+            return
+
+        paths.sort(key=os.path.getmtime)
+        for path in paths[: len(paths) - self.__max_entries]:
+            os.remove(path)
+
+
+def load_history(
+    request: TradehistRequest,
+    build: HistoryBuilder,
+    store: Optional[TradehistStore] = None,
+    now: Optional[datetime] = None,
+) -> pd.DataFrame:
+    """
+    Return the history of `request`, building only what is not stored yet
+
+    Parameters
+    ----------
+    build : HistoryBuilder
+        makes the history of the window between from_iso and to_iso (Visualizer.run)
+    now : Optional[datetime]
+        UTC, datetime.utcnow() if None
+    """
+    store = store or TradehistStore()
+    settled: datetime = latest_boundary(now or datetime.utcnow()) - SETTLE_MARGIN
+    to_time: datetime = parse_iso(request.to_iso)
+    if to_time < settled:
+        # INFO: the window is extended to the end of the candle including `to`
+        return _load_closed_history(request.replace_to(_next_boundary(to_time)), build, store)
+    if parse_iso(request.from_iso) >= settled:
+        # INFO: nothing is settled yet
+        STATS["misses"] += 1
+        return build(request, request.from_iso, request.to_iso)
+
+    closed_history: pd.DataFrame = _load_closed_history(
+        request.replace_to(settled), build, store
+    )
+    STATS["edge_refreshes"] += 1
+    edge_history: pd.DataFrame = build(
+        request, (settled - EDGE_LOOKBACK).strftime(ISO_FORMAT), request.to_iso
+    )
+    return _join_edge(closed_history, edge_history, settled)
+
+
+def latest_boundary(now: datetime) -> datetime:
+    """The start of the H1 candle (Visualizer.run makes H1 history) which is not complete yet"""
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def log_stats(latency_sec: float) -> None:
+    requests: int = STATS["hits"] + STATS["misses"]
+    LOGGER.info(
+        {
+            "[TradehistCache]": dict(
+                STATS,
+                hit_rate=round(STATS["hits"] / requests, 3) if requests > 0 else None,
+                latency_sec=round(latency_sec, 3),
+            )
+        }
+    )
+
+
+def reset_stats() -> None:
+    for name in STATS.keys():
+        STATS[name] = 0
+
+
+def _load_closed_history(
+    request: TradehistRequest, build: HistoryBuilder, store: TradehistStore
+) -> pd.DataFrame:
+    history: Optional[pd.DataFrame] = store.get(request)
+    if history is not None:
+        STATS["hits"] += 1
+        return history
+
+    STATS["misses"] += 1
+    # INFO: `to` is on a boundary, and the candle starting at it is not a part of the window
+    history = _rows_before(
+        build(request, request.from_iso, request.to_iso), parse_iso(request.to_iso)
+    )
+    store.put(request, history)
+    return history
+
+
+def _join_edge(
+    closed_history: pd.DataFrame, edge_history: pd.DataFrame, boundary: datetime
+) -> pd.DataFrame:
+    """Append the rows after `boundary`, continuing the gross of the closed history"""
+    closed_rows: pd.DataFrame = _rows_before(closed_history, boundary)
+    if "time" not in edge_history:
+        return closed_rows
+
+    edge_rows: pd.DataFrame = edge_history[
+        edge_history["time"] >= boundary.strftime(TIME_FORMAT)
+    ].copy()
+    if "pl" in edge_rows:
+        grosses: pd.Series = closed_rows.get("gross", pd.Series(dtype=float)).dropna()
+        last_gross: float = grosses.iat[-1] if len(grosses) > 0 else 0.0
+        # INFO: NaN where pl is NaN, as `result["pl"].cumsum()` of Visualizer
+        edge_rows["gross"] = last_gross + edge_rows["pl"].cumsum()
+    return pd.concat([closed_rows, edge_rows], ignore_index=True)
+
+
+def _rows_before(history: pd.DataFrame, time: datetime) -> pd.DataFrame:
+    if "time" not in history:
+        return history
+    return history[history["time"] < time.strftime(TIME_FORMAT)].reset_index(drop=True)
+
+
+def _next_boundary(time: datetime) -> datetime:
+    """The end of the H1 candle including `time`"""
+    return latest_boundary(time) + H1
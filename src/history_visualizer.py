@@ -1,12 +1,12 @@
-import datetime
 from datetime import timedelta
 from typing import List, Optional, Tuple, TypedDict
 
+import numpy as np
 from oanda_accessor_pyv20 import OandaInterface
 import oanda_accessor_pyv20.preprocessor as prepro
 import pandas as pd
 
-from src.analyzer import Analyzer
+from src.analyzer import Analyzer, required_lookback
 from src.candle_loader import CandleLoader
 from src.candle_storage import FXBase
 from src.drawer import FigureDrawer
@@ -14,6 +14,10 @@ import src.lib.format_converter as converter
 from src.lib.interface import select_instrument
 from src.trader_config import TraderConfig
 
+# INFO: the position of the separator of date and time ('T' of Oanda, ' ' of candles)
+DATE_END: int = 10
+TIME_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+
 
 class DstSwitch(TypedDict):
     time: str
@@ -38,7 +42,8 @@ class Visualizer:
         self.__candle_loader: "CandleLoader" = CandleLoader(
             TraderConfig("unittest", instrument), self.__client, 0
         )
-        self.__ana: Analyzer = Analyzer(indicator_names)
+        self.__indicator_names: Tuple[str, ...] = indicator_names or Analyzer.INDICATOR_NAMES
+        self.__ana: Analyzer = Analyzer(self.__indicator_names)
         self._indicators: pd.DataFrame = None
 
     @property
@@ -120,7 +125,10 @@ class Visualizer:
 
     def __prepare_candles(self, granularity: str) -> pd.DataFrame:
         buffer_td: timedelta = prepro.granularity_to_timedelta(granularity)
-        possible_start_dt: pd.Timestamp = converter.to_timestamp(self.__from_iso) - buffer_td * 20
+        # INFO: only the candles which the requested indicators need before `from`
+        lookback: int = required_lookback(self.__indicator_names)
+        from_dt: pd.Timestamp = converter.to_timestamp(self.__from_iso)
+        possible_start_dt: pd.Timestamp = from_dt - buffer_td * lookback
         # TODO: 400 が適切かどうかはよく検討が必要
         #   400本分なのに、220本しか出てこない。なんか足りない。（休日分の足が存在しないからかも）
         end_dt: pd.Timestamp = converter.to_timestamp(self.__to_iso)
@@ -134,12 +142,12 @@ class Visualizer:
             granularity=granularity,
         )
 
-        return result
+        return _drop_needless_warmup(result, from_dt, lookback)
 
     def __adjust_time_for_merging(
         self, candles: pd.DataFrame, history_df: pd.DataFrame, granularity: str
     ) -> pd.DataFrame:
-        dict_dst_switches: List[DstSwitch] = None
+        dict_dst_switches: List[DstSwitch] = []
         if granularity in ("H4",) and len(history_df) > 0:
             # TODO: dict_dst_switches は H4 candles でのみしか使えない形になっている
             dict_dst_switches = self.__detect_dst_switches(candles)
@@ -149,19 +157,21 @@ class Visualizer:
 
         # make time smooth, adaptively to Daylight Saving Time
         if granularity == "M10":  # TODO: M15, 30 も対応できるようにする
-            history_df["time"] = [converter.convert_to_m10(time) for time in history_df.time]
+            history_df["time"] = converter.convert_to_m10_array(history_df.time)
         elif granularity in ("H1", "H4"):
-            history_df["time"] = [
-                self.__convert_time_str_to(granularity, time, dict_dst_switches)
-                for time in history_df.time
-            ]
+            history_df["time"] = self.__convert_times_to(
+                granularity, history_df.time.to_numpy(dtype=str), dict_dst_switches
+            )
         return history_df
 
     def __detect_dst_switches(self, candles: pd.DataFrame) -> List[DstSwitch]:
         """
         daylight saving time の切り替わりタイミングを見つける
         """
-        candles["summer_time"] = pd.to_numeric(candles.time.str[12], downcast="signed") % 2 == 1
+        times: np.ndarray = candles["time"].to_numpy(dtype="U19")
+        # INFO: the ones place of hour is odd in summer time ([1,5,9,13,17,21] of H4)
+        hour_ones: np.ndarray = times.view("U1").reshape(len(times), 19)[:, 12]
+        candles["summer_time"] = hour_ones.astype(np.int8) % 2 == 1
         switch_points = candles[candles.summer_time != candles.summer_time.shift(1)][
             ["time", "summer_time"]
         ]
@@ -183,49 +193,60 @@ class Visualizer:
             ]
         """
         hist_df = original_df.copy()
-        switch_count = len(dst_switches)
-
-        for i, dst_switching_point in enumerate(dst_switches):
-            is_dst = dst_switching_point["summer_time"]
-            if i == (switch_count - 1):
-                target_row_index = dst_switching_point["time"] <= hist_df["time"]
-            else:
-                target_row_index = (dst_switching_point["time"] <= hist_df["time"]) & (
-                    hist_df["time"] < dst_switches[i + 1]["time"]
-                )
-            hist_df.loc[target_row_index, "dst"] = is_dst
+        switch_times, summer_times = _to_switch_arrays(dst_switches)
+        # INFO: the index of the latest switch at or before each time (-1 if before all of them)
+        indexes: np.ndarray = (
+            np.searchsorted(switch_times, hist_df["time"].to_numpy(dtype=str), side="right") - 1
+        )
+        # INFO: the rows before the first switch keep their values (NaN if the column is new)
+        is_switched: np.ndarray = indexes >= 0
+        hist_df.loc[is_switched, "dst"] = summer_times[indexes[is_switched]]
 
         hist_df["dst"] = hist_df["dst"].astype(bool)
         return hist_df
 
-    def __convert_time_str_to(
-        self,
-        granularity: str,
-        oanda_time: str,
-        dict_dst_switches: Optional[List[DstSwitch]],
-    ) -> str:
-        time_str: str = oanda_time.replace("T", " ")
+    def __convert_times_to(
+        self, granularity: str, oanda_times: np.ndarray, dict_dst_switches: List[DstSwitch]
+    ) -> np.ndarray:
+        """
+        Floor Oanda times to the start of H1 or H4 candles
+
+        Returns
+        -------
+        np.ndarray
+            dtype: object ('yyyy-MM-dd HH:00:00')
+        """
+        time_strs: np.ndarray = _with_char_at(oanda_times, DATE_END, " ")
         # INFO: 12文字目までで hour まで取得できる
-        time: datetime.datetime = datetime.datetime.strptime(time_str[:13], "%Y-%m-%d %H")
+        hours: np.ndarray = _with_char_at(time_strs.astype("U13"), DATE_END, "T").astype(
+            "datetime64[h]"
+        )
 
         # INFO: adjust according to day light saving time
         if granularity in ("H4",):
-            if self.__is_summer_time(time_str, dict_dst_switches):
-                # INFO: OandaのH4は [1,5,9,13,17,21] を取り得るので、それをはみ出した時間を切り捨て
-                minus = (time.hour + 3) % 4
-            else:
-                minus = time.hour % 4
-            time -= datetime.timedelta(hours=minus)
-
-        hour_str: str = time.strftime("%Y-%m-%d %H:%M:%S")
-        return hour_str
-
-    def __is_summer_time(self, time_str: str, dict_dst_switches: List[DstSwitch]) -> bool:
-        for i, switch_dict in enumerate(dict_dst_switches):
-            if dict_dst_switches[-1]["time"] < time_str:
-                return dict_dst_switches[-1]["summer_time"]
-            elif switch_dict["time"] < time_str and time_str < dict_dst_switches[i + 1]["time"]:
-                return switch_dict["summer_time"]
+            hour_of_day: np.ndarray = hours.astype(np.int64) % 24
+            # INFO: OandaのH4は [1,5,9,13,17,21] を取り得るので、それをはみ出した時間を切り捨て
+            # TODO: winter candles start at [2,6,10,14,18,22], but they are floored to [0,4,8,...]
+            minus: np.ndarray = np.where(
+                self.__is_summer_time(time_strs, dict_dst_switches),
+                (hour_of_day + 3) % 4,
+                hour_of_day % 4,
+            )
+            hours = hours - minus.astype("timedelta64[h]")
+
+        hour_strs: np.ndarray = np.datetime_as_string(hours.astype("datetime64[s]"))
+        return _with_char_at(hour_strs, DATE_END, " ").astype(object)
+
+    def __is_summer_time(
+        self, time_strs: np.ndarray, dict_dst_switches: List[DstSwitch]
+    ) -> np.ndarray:
+        switch_times, summer_times = _to_switch_arrays(dict_dst_switches)
+        # INFO: the index of the latest switch strictly before each time
+        indexes: np.ndarray = np.searchsorted(switch_times, time_strs, side="left") - 1
+        # INFO: the times just on a switch (and before the first one) are regarded as winter
+        is_summer: np.ndarray = (indexes >= 0) & ~np.isin(time_strs, switch_times)
+        is_summer[is_summer] = summer_times[indexes[is_summer]]
+        return is_summer
 
     def __extract_pl(self, granularity: str, original_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -368,3 +389,36 @@ class Visualizer:
         candles_and_hist["gross"].fillna(method="ffill", inplace=True)
         drawer.draw_df(candles_and_hist[["gross"]], names=["gross"])
         drawer.draw_df(candles_and_hist[["pl"]], names=["profit"])
+
+
+def _to_switch_arrays(dst_switches: List[DstSwitch]) -> Tuple[np.ndarray, np.ndarray]:
+    """The times (sorted, as candles are) and the flags of summer time of the switches"""
+    switch_times: np.ndarray = np.array([switch["time"] for switch in dst_switches], dtype=str)
+    summer_times: np.ndarray = np.array(
+        [switch["summer_time"] for switch in dst_switches], dtype=bool
+    )
+    return switch_times, summer_times
+
+
+def _with_char_at(strings: np.ndarray, position: int, char: str) -> np.ndarray:
+    """Copy of the fixed-width strings, whose characters at `position` are replaced"""
+    result: np.ndarray = np.array(strings, dtype=str)
+    # INFO: each character is rewritten in place through the view of the fixed-width strings
+    chars: np.ndarray = result.view("U1").reshape(len(result), result.itemsize // 4)
+    chars[:, position] = char
+    return result
+
+
+def _drop_needless_warmup(
+    candles: pd.DataFrame, from_dt: pd.Timestamp, lookback: int
+) -> pd.DataFrame:
+    """
+    Drop the candles before `from` except for the last `lookback` ones
+    (and the one including `from`), which are loaded by the margin of days for holidays
+    """
+    if "time" not in candles:
+        return candles
+
+    before_from: int = int((candles["time"] <= from_dt.strftime(TIME_FORMAT)).sum())
+    needless: int = max(before_from - lookback - 1, 0)
+    return candles.iloc[needless:].reset_index(drop=True)
@@ -0,0 +1,327 @@
+from collections import deque
+from itertools import islice
+import math
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analyzer import Analyzer
+from src.lib.indicator_kernels import parabolic_sar
+
+CandleDict = Dict[str, Any]
+# INFO: (absolute index of the candle, its low or high)
+SupRegiPoint = Tuple[int, float]
+
+
+class IndicatorState:
+    """
+    Indicators of the latest `window` candles, which are updated candle by candle.
+
+    `update` costs O(1) per indicator regardless of `window`, except for SAR,
+    whose path depends on the first candles of the window and is recalculated by the kernel.
+    The last TAIL_LENGTH rows are always the same as `Analyzer.get_indicators()` of the window.
+    The older rows keep the values they had when they left the tail
+    (EMAs and SAR of a full recalculation move as the first candle of the window drops).
+
+    Usage
+    -----
+    >>> state = IndicatorState.from_candles(FXBase.get_candles())
+    >>> state.update({"time": ..., "high": ..., "low": ..., "close": ...})
+    >>> saved = state.to_dict()  # json serializable
+    >>> state = IndicatorState.from_dict(saved)  # resume on the next invocation
+    """
+
+    # INFO: the live rules read at most the last 3 rows (band expansion, repulsion)
+    TAIL_LENGTH = 3
+    SMA_WINDOW = 20
+    EMA_SPANS = {"10EMA": 10, "60EMA": 60}
+    BAND_WIDTHS = {"sigma*1_band": 1, "sigma*-1_band": -1, "sigma*2_band": 2, "sigma*-2_band": -2}
+    STOC_WINDOW = 5
+    STOC_SMA_WINDOW = 3
+    SUP_REGI_WINDOW = 7
+    COLUMNS = [Analyzer.COLUMN_NAMES.get(name, name) for name in Analyzer.INDICATOR_NAMES]
+
+    def __init__(self, window: int) -> None:
+        self.__window: int = window
+        # INFO: the number of candles pushed so far (absolute index of the next candle)
+        self.__count: int = 0
+        self.__times: Deque[str] = deque(maxlen=window)
+        self.__highs: Deque[float] = deque(maxlen=window)
+        self.__lows: Deque[float] = deque(maxlen=window)
+        self.__closes: Deque[float] = deque(maxlen=window)
+        self.__rows: Deque[List[float]] = deque(maxlen=window)
+        # INFO: numerators of the EMAs on the tail rows (adjusted, from the first candle)
+        self.__ema_sums: Dict[str, List[float]] = {name: [] for name in self.EMA_SPANS}
+        self.__points: Dict[str, List[SupRegiPoint]] = {"support": [], "regist": []}
+        # INFO: what the last push changed, which is restored to replace the last candle
+        self.__undo: Optional[Dict[str, Any]] = None
+
+    #
+    # Public
+    #
+    @classmethod
+    def from_candles(cls, candles: pd.DataFrame) -> "IndicatorState":
+        """
+        Parameters
+        ----------
+        candles : pd.DataFrame
+            Columns: time, high, low, close (required, len >= TAIL_LENGTH)
+        """
+        if len(candles) < cls.TAIL_LENGTH:
+            raise ValueError("IndicatorState needs at least 3 candles, but {}".format(len(candles)))
+
+        state = cls(window=len(candles))
+        for candle in candles[["time", "high", "low", "close"]].to_dict("records"):
+            state.__push(candle, with_sar=False)
+        # INFO: the window starts at the first candle, so every row is the same as Analyzer's
+        sar: np.ndarray = state.__calc_sar()
+        for row, value in zip(state.__rows, sar.tolist()):
+            row[state.__column("SAR")] = value
+        return state
+
+    @classmethod
+    def from_dict(cls, dic: Dict[str, Any]) -> "IndicatorState":
+        state = cls(window=dic["window"])
+        state.__count = dic["count"]
+        state.__times.extend(dic["times"])
+        state.__highs.extend(dic["highs"])
+        state.__lows.extend(dic["lows"])
+        state.__closes.extend(dic["closes"])
+        state.__rows.extend(list(row) for row in dic["rows"])
+        state.__ema_sums = {name: list(sums) for name, sums in dic["ema_sums"].items()}
+        state.__points = {
+            name: [(index, value) for index, value in points]
+            for name, points in dic["points"].items()
+        }
+        state.__undo = dic["undo"]
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        """json serializable (NaN is written as NaN by `json.dumps`)"""
+        return {
+            "window": self.__window,
+            "count": self.__count,
+            "times": list(self.__times),
+            "highs": list(self.__highs),
+            "lows": list(self.__lows),
+            "closes": list(self.__closes),
+            "rows": [list(row) for row in self.__rows],
+            "ema_sums": {name: list(sums) for name, sums in self.__ema_sums.items()},
+            "points": {
+                name: [list(point) for point in points] for name, points in self.__points.items()
+            },
+            "undo": self.__undo,
+        }
+
+    @property
+    def window(self) -> int:
+        return self.__window
+
+    def update(self, candle: CandleDict) -> None:
+        """
+        Push a new candle, or replace the last candle if `candle` has the same time
+        (e.g. the latest candle patched by CandleLoader.__update_latest_candle)
+
+        Parameters
+        ----------
+        candle : dict or pd.Series
+            keys: time, high, low, close
+        """
+        time: str = str(candle["time"])
+        if len(self.__times) > 0 and time == self.__times[-1]:
+            self.__pop()
+        elif len(self.__times) > 0 and time < self.__times[-1]:
+            raise ValueError("[IndicatorState] {} is older than {}".format(time, self.__times[-1]))
+        self.__push(candle)
+
+    def sync(self, candles: pd.DataFrame) -> bool:
+        """
+        Apply the latest `window` candles, which continue the ones already applied
+
+        Returns
+        -------
+        bool
+            False if `candles` don't continue them (then the state should be rebuilt)
+        """
+        if len(candles) != self.__window or len(self.__times) == 0:
+            return False
+        times: pd.Series = candles["time"].map(str)
+        start: int = int(times.searchsorted(self.__times[-1]))
+        if start == len(times) or times.iat[start] != self.__times[-1]:
+            return False
+
+        # INFO: the first one replaces the last candle, which may have been patched or completed
+        for candle in candles.iloc[start:][["time", "high", "low", "close"]].to_dict("records"):
+            self.update(candle)
+        return self.__times[0] == times.iat[0]
+
+    def get_indicators(self, index: Optional[pd.Index] = None) -> pd.DataFrame:
+        """
+        Returns
+        -------
+        pd.DataFrame
+            The same columns as `Analyzer.get_indicators()`
+        """
+        indicators = pd.DataFrame(
+            np.array(self.__rows, dtype=np.float64).reshape(len(self.__rows), len(self.COLUMNS)),
+            index=index,
+            columns=self.COLUMNS,
+        )
+        indicators.insert(0, "time", list(self.__times))
+        return indicators
+
+    #
+    # Private
+    #
+    def __push(self, candle: CandleDict, with_sar: bool = True) -> None:
+        tail_length: int = min(len(self.__rows), self.TAIL_LENGTH)
+        self.__undo = {
+            "dropped": None,
+            "tail": [list(row) for row in islice(reversed(self.__rows), tail_length)][::-1],
+            "ema_sums": {name: list(sums) for name, sums in self.__ema_sums.items()},
+            "points": {name: list(points) for name, points in self.__points.items()},
+        }
+        dropped_close: Optional[float] = None
+        if len(self.__times) == self.__window:
+            dropped_close = self.__closes[0]
+            self.__undo["dropped"] = [
+                self.__times[0],
+                self.__highs[0],
+                self.__lows[0],
+                self.__closes[0],
+                list(self.__rows[0]),
+            ]
+
+        self.__times.append(str(candle["time"]))
+        self.__highs.append(float(candle["high"]))
+        self.__lows.append(float(candle["low"]))
+        self.__closes.append(float(candle["close"]))
+        self.__count += 1
+        self.__rows.append(self.__calc_rolling_row())
+
+        self.__update_emas(dropped_close)
+        self.__update_sup_regi()
+        if with_sar:
+            sar: np.ndarray = self.__calc_sar()
+            for offset in range(1, min(len(self.__rows), self.TAIL_LENGTH) + 1):
+                self.__rows[-offset][self.__column("SAR")] = float(sar[-offset])
+
+    def __pop(self) -> None:
+        """Undo the last push"""
+        if self.__undo is None:
+            raise ValueError("[IndicatorState] the last candle can't be replaced")
+
+        for candles in [self.__times, self.__highs, self.__lows, self.__closes, self.__rows]:
+            candles.pop()
+        self.__count -= 1
+        if self.__undo["dropped"] is not None:
+            time, high, low, close, row = self.__undo["dropped"]
+            self.__times.appendleft(time)
+            self.__highs.appendleft(high)
+            self.__lows.appendleft(low)
+            self.__closes.appendleft(close)
+            self.__rows.appendleft(list(row))
+        for offset, row in enumerate(reversed(self.__undo["tail"]), start=1):
+            self.__rows[-offset] = list(row)
+        self.__ema_sums = {name: list(sums) for name, sums in self.__undo["ema_sums"].items()}
+        self.__points = {
+            name: [(index, value) for index, value in points]
+            for name, points in self.__undo["points"].items()
+        }
+        self.__undo = None
+
+    def __calc_rolling_row(self) -> List[float]:
+        """Indicators of the new candle, which depend only on the last few candles"""
+        row: List[float] = [math.nan] * len(self.COLUMNS)
+        length: int = len(self.__closes)
+
+        if length >= self.SMA_WINDOW:
+            closes = np.array(list(islice(reversed(self.__closes), self.SMA_WINDOW)))
+            mean: float = float(closes.mean())
+            std: float = float(closes.std(ddof=1))
+            row[self.__column("20SMA")] = mean
+            for name, width in self.BAND_WIDTHS.items():
+                row[self.__column(name)] = mean + std * width
+
+        # INFO: %D is the mean of the last 3 %K, and %SD is the mean of the last 3 %D
+        stod: float = float(np.mean([self.__stok(offset) for offset in range(3)]))
+        row[self.__column("stoD_3")] = stod
+        if len(self.__rows) >= 2:
+            stods: List[float] = [self.__rows[-offset][self.__column("stoD_3")] for offset in (2, 1)]
+            row[self.__column("stoSD_3")] = float(np.mean(stods + [stod]))
+        return row
+
+    def __stok(self, offset: int) -> float:
+        """%K of the candle `offset` candles before the last one"""
+        end: int = len(self.__closes) - offset
+        if end - self.STOC_WINDOW < 0:
+            return math.nan
+        lowest: float = min(islice(self.__lows, end - self.STOC_WINDOW, end))
+        highest: float = max(islice(self.__highs, end - self.STOC_WINDOW, end))
+        # INFO: divided in float64 like pandas (x / 0.0 is inf or nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(
+                (np.float64(self.__closes[end - 1]) - lowest) / np.float64(highest - lowest) * 100
+            )
+
+    def __update_emas(self, dropped_close: Optional[float]) -> None:
+        """
+        Same as pd.Series.ewm(span=span, adjust=True).mean() over the window:
+        sum(decay ** (t - k) * close[k]) / sum(decay ** (t - k)) from the first candle
+        """
+        length: int = len(self.__closes)
+        for name, span in self.EMA_SPANS.items():
+            decay: float = 1.0 - 2.0 / (span + 1)
+            sums: List[float] = self.__ema_sums[name]
+            if dropped_close is not None:
+                # INFO: the row `offset` candles before the last one had (window - offset) terms
+                for offset, _ in enumerate(reversed(sums), start=1):
+                    sums[-offset] -= decay ** (self.__window - offset) * dropped_close
+            last_sum: float = sums[-1] if len(sums) > 0 else 0.0
+            sums.append(decay * last_sum + self.__closes[-1])
+            del sums[: -self.TAIL_LENGTH]
+
+            for offset, numerator in enumerate(reversed(sums), start=1):
+                terms: int = length - offset + 1
+                denominator: float = (1.0 - decay**terms) / (1.0 - decay)
+                self.__rows[-offset][self.__column(name)] = numerator / denominator
+
+    def __update_sup_regi(self) -> None:
+        """
+        The previous candle is judged whether it is support (or regist),
+        because the judgement needs the next candle
+        """
+        length: int = len(self.__closes)
+        if length >= self.SUP_REGI_WINDOW + 1:
+            index: int = self.__count - 2
+            lows: List[float] = list(islice(self.__lows, length - 8, length))
+            highs: List[float] = list(islice(self.__highs, length - 8, length))
+            if min(lows[:-1]) == lows[-2] and lows[-3] > lows[-2] < lows[-1]:
+                self.__points["support"].append((index, lows[-2]))
+            if max(highs[:-1]) == highs[-2] and highs[-3] < highs[-2] > highs[-1]:
+                self.__points["regist"].append((index, highs[-2]))
+
+        # INFO: a point is found only if the 6 candles before it are in the window
+        first_found: int = self.__count - length + self.SUP_REGI_WINDOW - 1
+        last: int = self.__count - 1
+        for name, points in self.__points.items():
+            # INFO: points aren't next to each other, so the tail needs at most the last 4 points
+            del points[: -(self.TAIL_LENGTH + 1)]
+            for offset in range(1, min(length, self.TAIL_LENGTH) + 1):
+                found: List[float] = [
+                    value for index, value in points if first_found <= index <= last - offset + 1
+                ]
+                self.__rows[-offset][self.__column(name)] = found[-1] if found else math.nan
+
+    def __calc_sar(self) -> np.ndarray:
+        return parabolic_sar(
+            np.array(self.__highs, dtype=np.float64),
+            np.array(self.__lows, dtype=np.float64),
+            initial_af=Analyzer.INITIAL_AF,
+            max_af=Analyzer.MAX_AF,
+        )
+
+    @classmethod
+    def __column(cls, name: str) -> int:
+        return cls.COLUMNS.index(name)
@@ -0,0 +1,84 @@
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+ParabolicState = Dict[str, Union[bool, float]]
+
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+#                           Parabolic SAR
+# - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+def parabolic_sar(
+    highs: np.ndarray, lows: np.ndarray, initial_af: float = 0.02, max_af: float = 0.2
+) -> np.ndarray:
+    """
+    Calculate Parabolic SAR over contiguous float64 arrays
+
+    Parameters
+    ----------
+    highs : np.ndarray
+    lows : np.ndarray
+        Both have the same length (>= 2)
+    initial_af : float
+        initial (and step of) acceleration factor
+    max_af : float
+
+    Returns
+    -------
+    np.ndarray (dtype: float64)
+    """
+    sar, _ = parabolic_sar_with_state(highs, lows, initial_af, max_af)
+    return sar
+
+
+def parabolic_sar_with_state(
+    highs: np.ndarray, lows: np.ndarray, initial_af: float = 0.02, max_af: float = 0.2
+) -> Tuple[np.ndarray, ParabolicState]:
+    """
+    Same as `parabolic_sar`, but also return the state after the last candle
+    so that the calculation can be continued candle by candle.
+
+    NOTE: On i = 0 and 1, SAR is clamped by highs[i - 1] and highs[i - 2] (or lows)
+        as the former row-by-row implementation did, so they refer to the last rows.
+    """
+    # INFO: iterating python floats is much faster than indexing np.ndarray one by one
+    high_list: List[float] = np.ascontiguousarray(highs, dtype=np.float64).tolist()
+    low_list: List[float] = np.ascontiguousarray(lows, dtype=np.float64).tolist()
+
+    # INFO: 初期状態は上昇トレンドと仮定して計算
+    bull: bool = True
+    acceleration_factor: float = initial_af
+    extreme_price: float = high_list[0]
+    last_sar: float = low_list[0]
+
+    sar_list: List[float] = []
+    for i, (current_high, current_low) in enumerate(zip(high_list, low_list)):
+        # INFO: レートがparabolicに触れたときの処理
+        if (bull and last_sar > current_low) or (not bull and last_sar < current_high):
+            last_sar = extreme_price
+            acceleration_factor = initial_af
+            extreme_price = current_low if bull else current_high
+            bull = not bull
+        else:
+            # INFO: SARの仮決め
+            last_sar += acceleration_factor * (extreme_price - last_sar)
+            # INFO: AFの更新
+            if (bull and extreme_price < current_high) or (not bull and extreme_price > current_low):
+                acceleration_factor = min(acceleration_factor + initial_af, max_af)
+
+            # INFO: SARの調整 値が更新されすぎないように抑える & 極値(extreme_price)の更新
+            if bull:
+                last_sar = min(last_sar, low_list[i - 1], low_list[i - 2])
+                extreme_price = max(extreme_price, current_high)
+            else:
+                last_sar = max(last_sar, high_list[i - 1], high_list[i - 2])
+                extreme_price = min(extreme_price, current_low)
+        sar_list.append(last_sar)
+
+    state: ParabolicState = {
+        "bull": bull,
+        "acceleration_factor": acceleration_factor,
+        "extreme_price": extreme_price,
+        "sar": last_sar,
+    }
+    return np.array(sar_list, dtype=np.float64), state
@@ -2,7 +2,8 @@ from typing import Any, Dict, Optional
 
 from oanda_accessor_pyv20 import OandaInterface
 
-from src.candle_loader import CandleLoader
+from src.candle_loader import CandleLoader, live_candles_length
+from src.live_cycle import PrefetchedInterface, live_reads
 from src.result_processor import ResultProcessor
 from src.trader_config import TraderConfig
 
@@ -15,7 +16,17 @@ class InstanceBuilder:
             instrument=config.get_instrument(),
             test=operation in ("backtest", "forward_test"),
         )
-        candle_loader: "CandleLoader" = CandleLoader(config, o_interface, days)
+        candles_length: Optional[int] = None
+        if operation == "live":
+            # INFO: the same length is requested by the prefetch and by CandleLoader
+            candles_length = live_candles_length(config)
+            # INFO: the reads of a cycle are requested concurrently at the first of them
+            o_interface = PrefetchedInterface(
+                o_interface, live_reads(config, days, candles_length)
+            )
+        candle_loader: "CandleLoader" = CandleLoader(
+            config, o_interface, days, live_candles_length=candles_length
+        )
         result_processor: "ResultProcessor" = ResultProcessor(operation, config)
         return {
             "config": config,
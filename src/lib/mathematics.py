@@ -2,6 +2,8 @@ import itertools
 import math
 from typing import Any, List, Optional, Tuple
 
+import numpy as np
+
 
 def int_log10(number):
     """
@@ -54,6 +56,39 @@ def generate_different_length_combinations(items: List[Any]) -> Tuple[List[Optio
     return (list(combination) for combination in different_length_comb)
 
 
+def round_half_up(values: np.ndarray, digits: int = 3) -> np.ndarray:
+    """
+    Vectorized version of `float(Decimal(str(x)).quantize(..., rounding=ROUND_HALF_UP))`
+
+    Parameters
+    ----------
+    values : np.ndarray
+        float64, whose absolute values are less than 1e11 (NaN is kept)
+    digits : integer
+
+    Returns
+    -------
+    np.ndarray (dtype: float64)
+
+    Example
+    -------
+    round_half_up(np.array([0.0125, -0.0125, 0.0124])) -> [0.013, -0.013, 0.012]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale: float = 10.0**digits
+    absolutes: np.ndarray = np.abs(values)
+    quotients: np.ndarray = np.floor(absolutes * scale + 0.5)
+
+    # INFO: absolutes * scale has a rounding error, so the quotients may be wrong by 1 near ties.
+    #   (2q ± 1) / (2 * scale) is the nearest float of the tie decimal,
+    #   and str(x) is at least the tie decimal if and only if x is at least the float.
+    lower_ties: np.ndarray = (2 * quotients - 1) / (2 * scale)
+    upper_ties: np.ndarray = (2 * quotients + 1) / (2 * scale)
+    quotients -= absolutes < lower_ties
+    quotients += absolutes >= upper_ties
+    return np.copysign(quotients / scale, values)
+
+
 def range_2nd_decimal(begin, end, step):
     return list(__calc(begin, end, step))
 
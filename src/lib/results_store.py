@@ -0,0 +1,159 @@
+from contextlib import closing
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.trader_config import FILTER_ELEMENTS
+
+DEFAULT_DB_PATH: str = "tmp/verify_results.sqlite3"
+TABLE_NAME: str = "verify_results"
+
+# INFO: the column types of TRADE_RESULT_ITEMS + FILTER_ELEMENTS
+RESULT_COLUMN_TYPES: Dict[str, str] = {
+    "DoneTime": "TEXT",
+    "Rule": "TEXT",
+    "Granularity": "TEXT",
+    "StoplossBuf": "REAL",
+    "Spread": "REAL",
+    "Duration": "TEXT",
+    "CandlesCnt": "INTEGER",
+    "EntryCnt": "INTEGER",
+    "WinRate": "REAL",
+    "WinCnt": "INTEGER",
+    "LoseCnt": "INTEGER",
+    "Gross": "REAL",
+    "GrossProfit": "REAL",
+    "GrossLoss": "REAL",
+    "MaxProfit": "REAL",
+    "MaxLoss": "REAL",
+    "MaxDrawdown": "REAL",
+    "Profit Factor": "REAL",
+    "Recovery Factor": "REAL",
+    "Sharp Ratio": "REAL",
+    "Sortino Ratio": "REAL",
+    **{name: "INTEGER" for name in FILTER_ELEMENTS},
+}
+REAL_COLUMNS: List[str] = [
+    name for name, column_type in RESULT_COLUMN_TYPES.items() if column_type == "REAL"
+]
+INDEXED_COLUMNS: List[str] = ["Rule", "Granularity"] + FILTER_ELEMENTS
+
+
+def _quote(column: str) -> str:
+    return '"{}"'.format(column)
+
+
+class ResultsStore:
+    """
+    SQLite table storing the summaries of backtests
+    (the rows generated by statistics_module.summarize_backtest_result)
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH) -> None:
+        self.__db_path: str = db_path
+        self.__columns: List[str] = list(RESULT_COLUMN_TYPES.keys())
+        directory: str = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__create_table()
+
+    def append(self, rows: pd.DataFrame) -> int:
+        """
+        Insert rows in a transaction
+
+        Parameters
+        ----------
+        rows : pd.DataFrame
+            Columns: TRADE_RESULT_ITEMS + FILTER_ELEMENTS
+            '-' (WinRate, Profit Factor or Recovery Factor without trades) is stored as NULL
+
+        Returns
+        -------
+        int
+            the number of inserted rows
+        """
+        records: List[List[Any]] = [
+            [self.__to_sql_value(value) for value in record]
+            for record in rows.reindex(columns=self.__columns).itertuples(index=False)
+        ]
+        sql: str = "INSERT INTO {table} ({columns}) VALUES ({marks})".format(
+            table=TABLE_NAME,
+            columns=", ".join(map(_quote, self.__columns)),
+            marks=", ".join(["?"] * len(self.__columns)),
+        )
+        with closing(self.__connect()) as connection, connection:
+            connection.executemany(sql, records)
+        return len(records)
+
+    def query(
+        self,
+        rule: Optional[str] = None,
+        granularity: Optional[str] = None,
+        entry_filters: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Select the results matching all the given conditions
+
+        Parameters
+        ----------
+        entry_filters : Optional[Sequence[str]]
+            the results with exactly these filters (and without others) are selected
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns: TRADE_RESULT_ITEMS + FILTER_ELEMENTS (filters are bool), in inserted order
+        """
+        conditions: Dict[str, Any] = {"Rule": rule, "Granularity": granularity}
+        if entry_filters is not None:
+            conditions.update({name: int(name in entry_filters) for name in FILTER_ELEMENTS})
+        conditions = {column: value for column, value in conditions.items() if value is not None}
+
+        sql: str = "SELECT {columns} FROM {table}".format(
+            columns=", ".join(map(_quote, self.__columns)), table=TABLE_NAME
+        )
+        if conditions:
+            sql += " WHERE " + " AND ".join("{} = ?".format(_quote(c)) for c in conditions)
+        sql += " ORDER BY rowid"
+        with closing(self.__connect()) as connection:
+            records: List[tuple] = connection.execute(sql, list(conditions.values())).fetchall()
+
+        results = pd.DataFrame.from_records(records, columns=self.__columns)
+        # INFO: NULL in REAL columns is NaN
+        return results.astype(
+            {**{name: float for name in REAL_COLUMNS}, **{name: bool for name in FILTER_ELEMENTS}}
+        )
+
+    #
+    # private
+    #
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.__db_path)
+
+    def __create_table(self) -> None:
+        columns: str = ", ".join(
+            "{} {}".format(_quote(name), column_type)
+            for name, column_type in RESULT_COLUMN_TYPES.items()
+        )
+        with closing(self.__connect()) as connection, connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS {} ({})".format(TABLE_NAME, columns))
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS rule_granularity_filters ON {} ({})".format(
+                    TABLE_NAME, ", ".join(map(_quote, INDEXED_COLUMNS))
+                )
+            )
+
+    @staticmethod
+    def __to_sql_value(value: Any) -> Any:
+        if isinstance(value, str):
+            return None if value == "-" else value
+        if isinstance(value, (bool, np.bool_)):
+            return int(value)
+        if isinstance(value, np.integer):
+            return int(value)
+        if isinstance(value, (float, np.floating)):
+            return None if np.isnan(value) else float(value)
+        return value
@@ -1,11 +1,11 @@
 from datetime import datetime
-from decimal import ROUND_HALF_UP, Decimal  # , ROUND_HALF_EVEN
-import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 
 import numpy as np
 import pandas as pd
 
+from src.lib.mathematics import round_half_up
+from src.lib.results_store import DEFAULT_DB_PATH, ResultsStore
 from src.trader_config import FILTER_ELEMENTS, TraderConfig
 
 TRADE_RESULT_ITEMS = [
@@ -60,13 +60,9 @@ def aggregate_backtest_result(
     """
     filter_boolean: List[bool] = __filter_to_boolean(config.get_entry_rules("entry_filters"))  # type: ignore
 
-    positions: pd.DataFrame = df_positions.loc[df_positions.position.notnull(), :].copy()
-    positions = __calc_profit(copied_positions=positions)
-    positions.loc[:, "gross"] = positions.profit.cumsum()
-    positions.loc[:, "drawdown"] = positions.gross - positions.gross.cummax()
-
+    positions: pd.DataFrame = __calc_positions(df_positions)
     performance_result = __calc_performance_indicators(positions)
-    __append_performance_result_to_csv(
+    __append_performance_result(
         rule=rule,
         granularity=config.get_entry_rules("granularity"),  # type: ignore
         sl_buf=config.stoploss_buffer_pips,
@@ -83,41 +79,70 @@ def aggregate_backtest_result(
     return positions[["time", "profit", "gross"]].copy()
 
 
+def summarize_backtest_result(
+    rule: str, df_positions: pd.DataFrame, config: TraderConfig
+) -> pd.DataFrame:
+    """
+    Calculate the same statistics as `aggregate_backtest_result`,
+    but return them as a row instead of appending them to the ResultsStore
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: TRADE_RESULT_ITEMS + FILTER_ELEMENTS (only 1 row)
+    """
+    positions: pd.DataFrame = __calc_positions(df_positions)
+    return __build_result_row(
+        rule=rule,
+        granularity=config.get_entry_rules("granularity"),  # type: ignore
+        sl_buf=config.stoploss_buffer_pips,
+        spread=config.static_spread,
+        candles=df_positions,
+        performance_result=__calc_performance_indicators(positions),
+        filter_boolean=__filter_to_boolean(config.get_entry_rules("entry_filters")),  # type: ignore
+    )
+
+
+def __calc_positions(df_positions: pd.DataFrame) -> pd.DataFrame:
+    positions: pd.DataFrame = df_positions.loc[df_positions.position.notnull(), :].copy()
+    positions = __calc_profit(copied_positions=positions)
+    gross: np.ndarray = np.cumsum(positions["profit"].to_numpy())
+    positions.loc[:, "gross"] = gross
+    positions.loc[:, "drawdown"] = gross - np.maximum.accumulate(gross)
+    return positions
+
+
 def __filter_to_boolean(_filter: List[str]) -> List[bool]:
     return [(elem in _filter) for elem in FILTER_ELEMENTS]
 
 
 def __calc_profit(copied_positions: pd.DataFrame) -> pd.DataFrame:
     """calculate the profit and loss for each trades"""
-    copied_positions.loc[:, "profit"] = 0.0
+    entry_prices: np.ndarray = copied_positions["entry_price"].to_numpy(dtype=np.float64)
+    exitable_prices: np.ndarray = copied_positions["exitable_price"].to_numpy(dtype=np.float64)
+    previous_entry_prices: np.ndarray = np.roll(entry_prices, 1)
+    previous_exitable_prices: np.ndarray = np.roll(exitable_prices, 1)
+    if len(copied_positions) > 0:
+        previous_entry_prices[0] = previous_exitable_prices[0] = np.nan
 
     # INFO: entry したその足で exit してしまった分の profit を計算
-    is_soon_exit: pd.Series = (
-        copied_positions["exitable_price"].notnull() & copied_positions["entry_price"].notnull()
-    )
-    soon_exit_positions: pd.DataFrame = copied_positions[is_soon_exit]
-    exit_entry_diffs: pd.Series = (
-        soon_exit_positions.exitable_price - soon_exit_positions.entry_price
-    ).map(__round_really)
-    copied_positions.loc[is_soon_exit, "profit"] = __pl_calculator(
-        soon_exit_positions.position, exit_entry_diffs
-    )
+    #   (NaN, which means there is no entry or exit, is ignored by __pl_calculator)
+    soon_exit_diffs: np.ndarray = round_half_up(exitable_prices - entry_prices)
 
     # INFO: entry 後、次の足までは position を持ち越した分の profit を計算
-    continued_index: pd.Series = (
-        copied_positions["exitable_price"].notnull()
-        & copied_positions.shift(1)["exitable_price"].isna()
-    )
-    exit_entry_diffs = (
-        copied_positions.exitable_price - copied_positions.shift(1).entry_price
-    ).map(__round_really)[continued_index]
-    copied_positions.loc[continued_index, "profit"] += __pl_calculator(
-        copied_positions[continued_index].position, exit_entry_diffs
-    )
-    return copied_positions.astype({"profit": float})
+    continued_diffs: np.ndarray = round_half_up(exitable_prices - previous_entry_prices)
+    continued_diffs[~np.isnan(previous_exitable_prices)] = np.nan
 
+    position_types: np.ndarray = copied_positions["position"].to_numpy()
+    profits: np.ndarray = __pl_calculator(position_types, soon_exit_diffs)
+    profits += __pl_calculator(position_types, continued_diffs)
+    copied_positions.loc[:, "profit"] = profits
+    return copied_positions
 
-def __pl_calculator(position_series: pd.Series, diffs: pd.Series) -> np.ndarray:
+
+def __pl_calculator(
+    position_series: Union[pd.Series, np.ndarray], diffs: Union[pd.Series, np.ndarray]
+) -> np.ndarray:
     # INFO: long か short かで正負を逆にする
     return np.nan_to_num(np.where(position_series == "sell_exit", diffs, diffs * -1))
 
@@ -176,7 +201,7 @@ def __hist_index_of(positions: pd.DataFrame, sign: str) -> pd.Series:
     return positions["position"].str.contains(sign) & pd.notna(positions["entry_price"])
 
 
-def __append_performance_result_to_csv(
+def __append_performance_result(
     rule: str,
     granularity: str,
     sl_buf: float,
@@ -185,6 +210,26 @@ def __append_performance_result_to_csv(
     performance_result: pd.DataFrame,
     filter_boolean: List[bool],
     operation: str,
+) -> pd.DataFrame:
+    result_df: pd.DataFrame = __build_result_row(
+        rule, granularity, sl_buf, spread, candles, performance_result, filter_boolean
+    )
+
+    if operation != "unittest":
+        ResultsStore().append(result_df)
+        print("[Trader] Added the result of backtest in '{}'!".format(DEFAULT_DB_PATH))
+
+    return result_df
+
+
+def __build_result_row(
+    rule: str,
+    granularity: str,
+    sl_buf: float,
+    spread: float,
+    candles: pd.DataFrame,
+    performance_result: pd.DataFrame,
+    filter_boolean: List[bool],
 ) -> pd.DataFrame:
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     duration = "{start} ~ {end}".format(start=candles.time[20], end=candles.iloc[-1].time)
@@ -211,19 +256,4 @@ def __append_performance_result_to_csv(
         performance_result["sharp_ratio"],  # 'Sharp Ratio'
         performance_result["sortino_ratio"],  # 'Sortino Ratio'
     ]
-    result_df: pd.DataFrame = pd.DataFrame(
-        [result_row + filter_boolean], columns=TRADE_RESULT_ITEMS + FILTER_ELEMENTS
-    )
-
-    if operation != "unittest":
-        filepath: str = "tmp/csvs/verify_results.csv"
-        need_header: bool = not os.path.isfile(filepath)
-        result_df.to_csv(filepath, encoding="shift-jis", mode="a", index=False, header=need_header)
-        print("[Trader] Added the result of backtest in 'verify_results.csv'!")
-
-    return result_df
-
-
-def __round_really(x: float) -> float:
-    """小数点第3位で四捨五入(roundでは四捨五入できないため、実装した)"""
-    return float(Decimal(str(x)).quantize(Decimal("0.001"), rounding=ROUND_HALF_UP))
+    return pd.DataFrame([result_row + filter_boolean], columns=TRADE_RESULT_ITEMS + FILTER_ELEMENTS)
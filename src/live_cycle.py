@@ -0,0 +1,138 @@
+"""
+Concurrent reads of Oanda in a cycle of the live trading
+
+The reads of a cycle (candles, current price and positions) depend on nothing
+but the account and the instrument, so they are issued at once when the first of them is needed.
+Whether the market is tradeable is asked before them, and isn't prefetched,
+so that a cycle stopping there (ex. on weekends) requests nothing else.
+Transactions are requested only when they are used (without positions).
+Orders are not prefetched, and are sent one by one in the order of the calls.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from oanda_accessor_pyv20 import OandaInterface
+
+from src.candle_loader import (
+    LONG_SPAN_GRANULARITY,
+    LONG_SPAN_REFRESH_LENGTH,
+    is_long_span_cached,
+)
+from src.trader_config import TraderConfig
+
+# INFO: (method name, positional arguments, keyword arguments)
+LiveRead = Tuple[str, Tuple[Any, ...], Dict[str, Any]]
+
+
+def live_reads(config: TraderConfig, days: int, candles_length: int) -> List[LiveRead]:
+    """
+    The reads of a live cycle, with the same arguments as CandleLoader and RealTrader call.
+    Only the candles after the ones cached by the previous (warm) invocation are requested.
+
+    Parameters
+    ----------
+    candles_length : int
+        the result of `live_candles_length`, which must be passed to CandleLoader as well
+    """
+    granularity: str = config.get_entry_rules("granularity")  # type: ignore
+    reads: List[LiveRead] = [
+        (
+            "load_specify_length_candles",
+            (),
+            {"length": candles_length, "granularity": granularity},
+        ),
+        ("call_oanda", ("current_price",), {}),
+        ("call_oanda", ("open_trades",), {}),
+    ]
+    if is_long_span_cached(config, days):
+        reads.append(
+            (
+                "load_specify_length_candles",
+                (),
+                {"length": LONG_SPAN_REFRESH_LENGTH, "granularity": LONG_SPAN_GRANULARITY},
+            )
+        )
+    else:
+        reads.append(
+            ("load_candles_by_days", (), {"days": days, "granularity": LONG_SPAN_GRANULARITY})
+        )
+    return reads
+
+
+class PrefetchedInterface:
+    """
+    Proxy of OandaInterface answering the reads of a live cycle from their concurrent requests.
+    Each prefetched result is used only once, and the later calls request Oanda again.
+    The other methods (including orders) are delegated as they are.
+    """
+
+    def __init__(
+        self,
+        interface: OandaInterface,
+        reads: List[LiveRead],
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.__interface: OandaInterface = interface
+        self.__reads: List[LiveRead] = reads
+        self.__keys: Set[Hashable] = {_read_key(*read) for read in reads}
+        self.__max_workers: int = max_workers or max(len(reads), 1)
+        self.__futures: Optional[Dict[Hashable, Future]] = None
+        self.__lock = threading.Lock()
+        # INFO: the elapsed seconds of each read, set when it is finished
+        self.read_seconds: Dict[str, float] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__interface, name)
+
+    def call_oanda(self, method_type: str, **kwargs: Any) -> Any:
+        return self.__answer("call_oanda", (method_type,), kwargs)
+
+    def load_specify_length_candles(self, **kwargs: Any) -> Dict[str, Any]:
+        return self.__answer("load_specify_length_candles", (), kwargs)
+
+    def load_candles_by_days(self, **kwargs: Any) -> Dict[str, Any]:
+        return self.__answer("load_candles_by_days", (), kwargs)
+
+    def order_oanda(self, method_type: str, **kwargs: Any) -> dict:
+        return self.__interface.order_oanda(method_type, **kwargs)
+
+    #
+    # private
+    #
+    def __answer(self, name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        key: Hashable = _read_key(name, args, kwargs)
+        future: Optional[Future] = None
+        # INFO: the other calls (ex. is_tradeable) don't start the reads
+        if key in self.__keys:
+            futures: Dict[Hashable, Future] = self.__start()
+            with self.__lock:
+                future = futures.pop(key, None)
+        if future is None:
+            return getattr(self.__interface, name)(*args, **kwargs)
+        return future.result()
+
+    def __start(self) -> Dict[Hashable, Future]:
+        with self.__lock:
+            if self.__futures is None:
+                executor = ThreadPoolExecutor(max_workers=self.__max_workers)
+                self.__futures = {
+                    _read_key(*read): executor.submit(self.__timed_read, *read)
+                    for read in self.__reads
+                }
+                # INFO: the threads exit after finishing the submitted reads
+                executor.shutdown(wait=False)
+            return self.__futures
+
+    def __timed_read(self, name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        started_at: float = time.perf_counter()
+        try:
+            return getattr(self.__interface, name)(*args, **kwargs)
+        finally:
+            label: str = "{}({})".format(name, ", ".join(map(str, args)))
+            self.read_seconds[label] = time.perf_counter() - started_at
+
+
+def _read_key(name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+    return (name, args, tuple(sorted(kwargs.items())))
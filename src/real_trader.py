@@ -15,6 +15,8 @@ import src.trade_rules.stoploss as stoploss_strategy
 from src.trader import Trader
 
 LOGGER = Logger()
+# INFO: the number of transactions searched for the last loss
+TRANSACTIONS_COUNT: int = 100
 PositionType = Literal["long", "short"]
 
 
@@ -63,11 +65,14 @@ class RealTrader(Trader):
     # Public
     #
     def apply_trading_rule(self) -> None:
-        indicators = prepare_indicators()
+        # INFO: indicators are updated from the ones of the previous invocation
+        indicators = prepare_indicators(
+            state_key=(self.config.get_instrument(), self.config.get_entry_rules("granularity"))
+        )
         candles = FXBase.get_candles().copy()
         self._prepare_trade_signs("scalping", candles, indicators)
-        candles["preconditions_allows"] = np.all(
-            candles[self.config.get_entry_rules("entry_filters")], axis=1
+        candles["preconditions_allows"] = self._filters_allow(
+            candles, self.config.get_entry_rules("entry_filters")
         )
         # candles = self._merge_long_indicators(candles) # already merged on Trader.__init__()
         # self.__play_swing_trade(candles)
@@ -85,10 +90,11 @@ class RealTrader(Trader):
         """
         Order Oanda to create position
         """
+        # INFO: support and regist are NaN until they are found
         if direction == "long":
             sign = ""
             stoploss = previous_candle["low"] - self.config.stoploss_buffer_pips
-            if last_indicators is not None:
+            if last_indicators is not None and not np.isnan(last_indicators["support"]):
                 stoploss = last_indicators["support"]
         elif direction == "short":
             sign = "-"
@@ -97,7 +103,7 @@ class RealTrader(Trader):
                 + self.config.stoploss_buffer_pips
                 + self.config.static_spread
             )
-            if last_indicators is not None:
+            if last_indicators is not None and not np.isnan(last_indicators["regist"]):
                 stoploss = last_indicators["regist"]
 
         result: dict = self._oanda_interface.order_oanda(
@@ -159,7 +165,7 @@ class RealTrader(Trader):
                 "stoc_allows",
             ]
             self.config.set_entry_rules("entry_filters", value=entry_rules)
-            precondition = np.all(candles[entry_rules], axis=1).iloc[-1]
+            precondition = self._filters_allow(candles, entry_rules)[-1]
             if last_candle["trend"] is None or not precondition:
                 self.__show_why_not_entry(candles)
                 return
@@ -241,14 +247,9 @@ class RealTrader(Trader):
             self.__show_why_not_entry(candles)
             return None
 
-        direction: Optional[PositionType] = scalping.repulsion_exist(
-            trend=last_candle.trend,
-            previous_ema=indicators["10EMA"].iat[-2],
-            two_before_high=candles.high.iat[-3],
-            previous_high=candles.high.iat[-2],
-            two_before_low=candles.low.iat[-3],
-            previous_low=candles.low.iat[-2],
-        )
+        direction: Optional[PositionType] = scalping.detect_latest_repulsion(
+            trend=last_candle.trend, emas=indicators["10EMA"], candles=candles
+        )  # type: ignore
         if direction is None:
             print(
                 "[Trader] repulsion is not exist Time: {}, 10EMA: {}".format(
@@ -364,8 +365,7 @@ class RealTrader(Trader):
         -------
         time_since_loss : timedelta
         """
-        candle_size = 100
-        hist_df = self._oanda_interface.call_oanda("transactions", count=candle_size)
+        hist_df = self._oanda_interface.call_oanda("transactions", count=TRANSACTIONS_COUNT)
         LOGGER.info({"hist_df": hist_df})
 
         time_series = hist_df[hist_df.pl < 0]["time"]
@@ -396,6 +396,6 @@ class RealTrader(Trader):
         pass
 
     def backtest(
-        self, candles: pd.DataFrame, indicators: pd.DataFrame
+        self, candles: pd.DataFrame, indicators: pd.DataFrame, dump_csv: bool = True
     ) -> Dict[str, Union[str, pd.DataFrame]]:
         pass
@@ -1,21 +1,40 @@
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Union
 
 import numpy as np
 import pandas as pd
 
 from src.candle_storage import FXBase
-from src.drawer import FigureDrawer
 import src.lib.interface as i_face
 import src.lib.statistics_module as statistics
 from src.trader_config import TraderConfig
 
 
+class ChartSegment(NamedTuple):
+    """Everything which a worker process needs to draw one png"""
+
+    index: int
+    candles: pd.DataFrame
+    indicators: pd.DataFrame
+    positions: pd.DataFrame
+    # INFO: length of the whole candles, which is shown in the title
+    candles_length: int
+    instrument: str
+    granularity: str
+    figure_option: int
+
+
 class ResultProcessor:
     MAX_ROWS_COUNT: int = 200
+    # INFO: number of processes drawing charts (the number of CPUs if None)
+    MAX_DRAWING_WORKERS: Optional[int] = None
 
     def __init__(self, operation: str, config: TraderConfig) -> None:
         self._config: TraderConfig = config
-        self._drawer: Optional[FigureDrawer] = None
+        # INFO: each chart is drawn on its own figure (see `_draw_chart`)
+        self._draws_charts: bool = False
         if operation in ("backtest", "forward_test"):
             self.__set_drawing_option()
         else:
@@ -26,14 +45,10 @@ class ResultProcessor:
         self.__static_options["figure_option"] = i_face.ask_number(
             msg="[Trader] 画像描画する？ [1]: No, [2]: Yes, [3]: with_P/L ", limit=3
         )
-        self._drawer = None
+        self._draws_charts = False
 
     def reset_drawer(self) -> None:
-        if self.__static_options["figure_option"] > 1:
-            self._drawer = FigureDrawer(
-                rows_num=self.__static_options["figure_option"],
-                instrument=self._config.get_instrument(),
-            )
+        self._draws_charts = self.__static_options["figure_option"] > 1
 
     def run(
         self, rule: str, result: Dict[str, Union[str, pd.DataFrame]], indicators: pd.DataFrame
@@ -129,96 +144,59 @@ class ResultProcessor:
         return positions_df
 
     def _drive_drawing_charts(self, df_positions: pd.DataFrame, indicators: pd.DataFrame) -> None:
-        if self._drawer is None:
+        if not self._draws_charts:
             return
 
+        segments: List[ChartSegment] = self.__split_into_segments(df_positions, indicators)
+        started_at: float = time.perf_counter()
+        for result in self.__draw_charts(segments):
+            if "success" in result:
+                print("{msg} / {count}".format(msg=result["success"], count=len(segments)))
+        print(
+            "[Trader] {count} charts are drawn in {sec:.2f} sec".format(
+                count=len(segments), sec=time.perf_counter() - started_at
+            )
+        )
+
+    def __split_into_segments(
+        self, df_positions: pd.DataFrame, indicators: pd.DataFrame
+    ) -> List[ChartSegment]:
+        """Slices of candles, indicators and positions, each of which is drawn in one png"""
         df_len: int = len(df_positions)
         dfs_indicator: List[pd.DataFrame] = self.__split_df_by_200rows(indicators)
         dfs_position: List[pd.DataFrame] = self.__split_df_by_200sequences(df_positions, df_len)
 
-        df_segments_count: int = len(dfs_indicator)
-        for segment_index in range(0, df_segments_count):
-            self.__draw_one_chart(
-                self._drawer,
-                df_segments_count,
-                df_len,
-                segment_index,
-                indicators=dfs_indicator[segment_index],
-                positions_df=dfs_position[segment_index],
+        candles_length: int = len(FXBase.get_candles())
+        segments: List[ChartSegment] = []
+        for segment_index, (indicators_df, positions_df) in enumerate(
+            zip(dfs_indicator, dfs_position)
+        ):
+            start: int = max(df_len - ResultProcessor.MAX_ROWS_COUNT * (segment_index + 1), 0)
+            end: int = df_len - ResultProcessor.MAX_ROWS_COUNT * segment_index
+            segments.append(
+                ChartSegment(
+                    index=segment_index,
+                    candles=FXBase.get_candles(start=start, end=end),
+                    indicators=indicators_df,
+                    positions=positions_df,
+                    candles_length=candles_length,
+                    instrument=self._config.get_instrument(),
+                    granularity=self._config.get_entry_rules("granularity"),
+                    figure_option=self.__static_options["figure_option"],
+                )
             )
+        return segments
 
-    def __draw_one_chart(
-        self,
-        drwr: FigureDrawer,
-        df_segments_count: int,
-        df_len: int,
-        df_index: int,
-        indicators: pd.DataFrame,
-        positions_df: pd.DataFrame,
-    ) -> None:
-        def query_entry_rows(
-            position_df: pd.DataFrame, position_type: str, exit_type: str
-        ) -> pd.DataFrame:
-            entry_rows: pd.DataFrame = position_df[
-                position_df["position"].isin([position_type, exit_type])
-                & (~position_df.price.isna())
-            ][["sequence", "price"]]
-            return entry_rows
-
-        start: int = df_len - ResultProcessor.MAX_ROWS_COUNT * (df_index + 1)
-        if start < 0:
-            start = 0
-        end: int = df_len - ResultProcessor.MAX_ROWS_COUNT * df_index
-        target_candles: pd.DataFrame = FXBase.get_candles(start=start, end=end)
-        sr_time: pd.Series = drwr.draw_candles(target_candles)["time"]
-
-        # indicators
-        drwr.draw_indicators(d_frame=indicators)
-        drwr.draw_long_indicators(
-            candles=target_candles, min_point=indicators["sigma*-2_band"].min(skipna=True)
-        )
-
-        # positions
-        # INFO: exitable_price などの列が残っていると、後 draw_positions_df の dropna で行が消される
-        long_entry_df = query_entry_rows(positions_df, position_type="long", exit_type="sell_exit")
-        short_entry_df = query_entry_rows(positions_df, position_type="short", exit_type="buy_exit")
-        close_df = (
-            positions_df[positions_df["position"].isin(["sell_exit", "buy_exit"])]
-            .drop("price", axis=1)
-            .rename(columns={"exitable_price": "price"})
-        )
-        trail_df = positions_df[positions_df["position"] != "-"][["sequence", "stoploss"]].rename(
-            columns={"stoploss": "price"}
+    def __draw_charts(self, segments: List[ChartSegment]) -> List[Dict[str, str]]:
+        """Draw the segments in parallel processes, returning the results in the same order"""
+        max_workers: int = min(
+            ResultProcessor.MAX_DRAWING_WORKERS or os.cpu_count() or 1, len(segments)
         )
+        if max_workers <= 1:
+            return [_draw_chart(segment) for segment in segments]
 
-        drwr.draw_positions_df(positions_df=long_entry_df, plot_type=drwr.PLOT_TYPE["long"])
-        drwr.draw_positions_df(positions_df=short_entry_df, plot_type=drwr.PLOT_TYPE["short"])
-        drwr.draw_positions_df(positions_df=close_df, plot_type=drwr.PLOT_TYPE["exit"])
-        drwr.draw_positions_df(positions_df=trail_df, plot_type=drwr.PLOT_TYPE["trail"])
-
-        drwr.draw_vertical_lines(
-            indexes=np.concatenate([long_entry_df.sequence.values, short_entry_df.sequence.values]),
-            vmin=indicators["sigma*-2_band"].min(skipna=True),
-            vmax=indicators["sigma*2_band"].max(skipna=True),
-        )
-
-        # profit(pl) / gross
-        if self.__static_options["figure_option"] > 2:
-            drwr.draw_df(positions_df[["gross"]], names=["gross"])
-            drwr.draw_df(positions_df[["profit"]], names=["profit"])
-
-        result = drwr.create_png(
-            granularity=self._config.get_entry_rules("granularity"),
-            sr_time=sr_time,
-            num=df_index,
-            filename="test",
-        )
-
-        drwr.close_all()
-        if df_index + 1 != df_segments_count:
-            drwr.init_figure(rows_num=self.__static_options["figure_option"])
-        if "success" in result:
-            print("{msg} / {count}".format(msg=result["success"], count=df_segments_count))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_draw_chart, segments))
 
     def __split_df_by_200rows(self, d_frame: pd.DataFrame) -> List[pd.DataFrame]:
         dfs: List[Optional[pd.DataFrame]] = []
@@ -247,3 +225,67 @@ class ResultProcessor:
             df_target["sequence"] = df_target.sequence - start
             dfs.append(df_target)
         return dfs
+
+
+def _draw_chart(segment: ChartSegment) -> Dict[str, str]:
+    """Draw one segment on its own figure (run in a worker process)"""
+    # INFO: matplotlib is imported only when charts are drawn, and the Agg backend is set by drawer
+    from src.drawer import FigureDrawer
+
+    def query_entry_rows(
+        position_df: pd.DataFrame, position_type: str, exit_type: str
+    ) -> pd.DataFrame:
+        entry_rows: pd.DataFrame = position_df[
+            position_df["position"].isin([position_type, exit_type]) & (~position_df.price.isna())
+        ][["sequence", "price"]]
+        return entry_rows
+
+    drwr: FigureDrawer = FigureDrawer(rows_num=segment.figure_option, instrument=segment.instrument)
+    indicators: pd.DataFrame = segment.indicators
+    positions_df: pd.DataFrame = segment.positions
+    sr_time: pd.Series = drwr.draw_candles(segment.candles)["time"]
+
+    # indicators
+    drwr.draw_indicators(d_frame=indicators)
+    drwr.draw_long_indicators(
+        candles=segment.candles, min_point=indicators["sigma*-2_band"].min(skipna=True)
+    )
+
+    # positions
+    # INFO: exitable_price などの列が残っていると、後 draw_positions_df の dropna で行が消される
+    long_entry_df = query_entry_rows(positions_df, position_type="long", exit_type="sell_exit")
+    short_entry_df = query_entry_rows(positions_df, position_type="short", exit_type="buy_exit")
+    close_df = (
+        positions_df[positions_df["position"].isin(["sell_exit", "buy_exit"])]
+        .drop("price", axis=1)
+        .rename(columns={"exitable_price": "price"})
+    )
+    trail_df = positions_df[positions_df["position"] != "-"][["sequence", "stoploss"]].rename(
+        columns={"stoploss": "price"}
+    )
+
+    drwr.draw_positions_df(positions_df=long_entry_df, plot_type=drwr.PLOT_TYPE["long"])
+    drwr.draw_positions_df(positions_df=short_entry_df, plot_type=drwr.PLOT_TYPE["short"])
+    drwr.draw_positions_df(positions_df=close_df, plot_type=drwr.PLOT_TYPE["exit"])
+    drwr.draw_positions_df(positions_df=trail_df, plot_type=drwr.PLOT_TYPE["trail"])
+
+    drwr.draw_vertical_lines(
+        indexes=np.concatenate([long_entry_df.sequence.values, short_entry_df.sequence.values]),
+        vmin=indicators["sigma*-2_band"].min(skipna=True),
+        vmax=indicators["sigma*2_band"].max(skipna=True),
+    )
+
+    # profit(pl) / gross
+    if segment.figure_option > 2:
+        drwr.draw_df(positions_df[["gross"]], names=["gross"])
+        drwr.draw_df(positions_df[["profit"]], names=["profit"])
+
+    result: Dict[str, str] = drwr.create_png(
+        granularity=segment.granularity,
+        sr_time=sr_time,
+        num=segment.index,
+        filename="test",
+        candles_length=segment.candles_length,
+    )
+    drwr.close_all()
+    return result
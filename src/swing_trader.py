@@ -20,10 +20,10 @@ class SwingTrader(Trader):
     # Public
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
     def backtest(
-        self, candles: pd.DataFrame, indicators: pd.DataFrame
+        self, candles: pd.DataFrame, indicators: pd.DataFrame, dump_csv: bool = True
     ) -> Dict[str, Union[str, pd.DataFrame]]:
         """backtest swing trade"""
-        result_msg: str = self.__backtest_common_flow(candles)
+        result_msg: str = self.__backtest_common_flow(candles, dump_csv=dump_csv)
         return {"result": result_msg, "candles": candles}
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -55,14 +55,15 @@ class SwingTrader(Trader):
     #     )
     #     return shifted_candles
 
-    def __backtest_common_flow(self, candles: pd.DataFrame) -> str:
+    def __backtest_common_flow(self, candles: pd.DataFrame, dump_csv: bool = True) -> str:
         candles.loc[:, "entryable_price"] = base_rules.generate_entryable_prices(
             candles, self.config.static_spread
         )
         self.__generate_entry_column(candles=candles)
         sliding_result = self.__slide_to_reasonable_prices(candles=candles)
 
-        candles.to_csv("./tmp/csvs/full_data_dump.csv")
+        if dump_csv:
+            candles.to_csv("./tmp/csvs/full_data_dump.csv")
         result_msg: str = self.__result_message(sliding_result["result"])
         return result_msg
 
@@ -1,9 +1,17 @@
-from typing import Optional
+from typing import Iterable, Optional, Union
 
 import numpy as np
 import pandas as pd
 
 from src.candle_storage import FXBase
+from src.trader_config import FILTER_BITS, FILTER_ELEMENTS
+
+# INFO: compact codes of trend (int8), instead of object arrays of "bull", "bear" and None
+TREND_NONE: int = 0
+TREND_BULL: int = 1
+TREND_BEAR: int = -1
+# INFO: TREND_LABELS[code] is the label of the code (TREND_BEAR refers to the last element)
+TREND_LABELS: np.ndarray = np.array([None, "bull", "bear"], dtype=object)
 
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -99,21 +107,111 @@ def commit_positions(
     candles.loc[no_position_index, "position"] = None
 
 
-def generate_trend_column(indicators, c_prices):
-    sma = indicators["20SMA"]
-    ema = indicators["10EMA"]
-    method_trend_checker = np.frompyfunc(identify_trend_type, 3, 1)
+def generate_trend_codes(indicators: pd.DataFrame, c_prices: pd.Series) -> np.ndarray:
+    """
+    Vectorized version of `identify_trend_type`
+
+    Parameters
+    ----------
+    indicators : pd.DataFrame
+        Columns:
+            Name: 20SMA, dtype: float64 (required)
+            Name: 10EMA, dtype: float64 (required)
+    c_prices : pd.Series
+        close prices, which have the same length as indicators
+
+    Returns
+    -------
+    np.ndarray (dtype: int8)
+        TREND_BULL, TREND_BEAR or TREND_NONE
+    """
+    sma: np.ndarray = indicators["20SMA"].to_numpy()
+    ema: np.ndarray = indicators["10EMA"].to_numpy()
+    closes: np.ndarray = np.asarray(c_prices)
+
+    # INFO: any comparison with NaN is False, so rows including NaN are TREND_NONE
+    codes: np.ndarray = np.zeros(len(closes), dtype=np.int8)
+    codes[(sma < ema) & (ema < closes)] = TREND_BULL
+    codes[(sma > ema) & (ema > closes)] = TREND_BEAR
+    return codes
 
-    trend = method_trend_checker(c_prices, sma, ema)
-    return trend
 
+def encode_trend_labels(trends: Union[pd.Series, np.ndarray]) -> np.ndarray:
+    """Convert "bull", "bear" (or others) into codes of trend"""
+    labels: np.ndarray = np.asarray(trends, dtype=object)
+    return np.select(
+        [labels == "bull", labels == "bear"], [TREND_BULL, TREND_BEAR], TREND_NONE
+    ).astype(np.int8)
 
-def generate_stoc_allows_column(indicators, sr_trend):
+
+def decode_trend_codes(codes: np.ndarray) -> np.ndarray:
+    """Convert codes of trend into "bull", "bear" or None (dtype: object)"""
+    return TREND_LABELS[codes]
+
+
+def generate_trend_column(indicators: pd.DataFrame, c_prices: pd.Series) -> pd.Series:
+    codes: np.ndarray = generate_trend_codes(indicators, c_prices)
+    return pd.Series(decode_trend_codes(codes), index=c_prices.index)
+
+
+def generate_stoc_allows_mask(indicators: pd.DataFrame, trend_codes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of `stoc_allows_entry`
+
+    Parameters
+    ----------
+    indicators : pd.DataFrame
+        Columns:
+            Name: stoD_3,  dtype: float64 (required)
+            Name: stoSD_3, dtype: float64 (required)
+    trend_codes : np.ndarray
+        generated by `generate_trend_codes`
+
+    Returns
+    -------
+    np.ndarray (dtype: bool)
+    """
+    stod: np.ndarray = indicators["stoD_3"].to_numpy()
+    stosd: np.ndarray = indicators["stoSD_3"].to_numpy()
+    long_allowed: np.ndarray = (trend_codes == TREND_BULL) & ((stod > stosd) | (stod > 80))
+    short_allowed: np.ndarray = (trend_codes == TREND_BEAR) & ((stod < stosd) | (stod < 20))
+    return long_allowed | short_allowed
+
+
+def generate_stoc_allows_column(indicators: pd.DataFrame, sr_trend: pd.Series) -> pd.Series:
     """stocがtrendに沿う値を取っているか判定する列を返却"""
-    stod = indicators["stoD_3"]
-    stosd = indicators["stoSD_3"]
-    column_generator = np.frompyfunc(stoc_allows_entry, 3, 1)
-    return column_generator(stod, stosd, sr_trend)
+    mask: np.ndarray = generate_stoc_allows_mask(indicators, encode_trend_labels(sr_trend))
+    return pd.Series(mask, index=sr_trend.index)
+
+
+def pack_filter_mask(candles: pd.DataFrame, filters: Iterable[str] = FILTER_ELEMENTS) -> np.ndarray:
+    """
+    Pack the filter columns into a bitmask per row
+
+    Parameters
+    ----------
+    candles : pd.DataFrame
+        Columns:
+            Name: (each of filters), dtype: bool or object
+    filters : Iterable[str]
+        the names in FILTER_ELEMENTS
+
+    Returns
+    -------
+    np.ndarray (dtype: uint8)
+        the bits in FILTER_BITS are set on the rows where each filter is truthy
+    """
+    mask: np.ndarray = np.zeros(len(candles), dtype=np.uint8)
+    for name in filters:
+        # INFO: missing values (None or NaN) are skipped by np.all, so they don't prevent entries
+        mask[candles[name].fillna(True).to_numpy().astype(bool)] |= FILTER_BITS[name]
+    return mask
+
+
+def filter_mask_allows(mask: Union[pd.Series, np.ndarray], filters: Iterable[str]) -> np.ndarray:
+    """Judge whether all the filters are satisfied on each row (dtype: bool)"""
+    required: int = sum(FILTER_BITS[name] for name in set(filters))
+    return (np.asarray(mask) & required) == required
 
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
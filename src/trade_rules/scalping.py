@@ -1,25 +1,92 @@
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
+import src.trade_rules.base as base_rules
 import src.trade_rules.stoploss as stoploss_strategy
 
+# INFO: compact codes of entry direction (int8), instead of "long", "short" and None
+DIRECTION_NONE: int = 0
+DIRECTION_LONG: int = 1
+DIRECTION_SHORT: int = -1
+# INFO: DIRECTION_LABELS[code] is the label of the code (DIRECTION_SHORT refers to the last element)
+DIRECTION_LABELS: np.ndarray = np.array([None, "long", "short"], dtype=object)
+
 
 # - - - - - - - - - - - - - - - - - - - - - - - -
 #                Driver of logics
 # - - - - - - - - - - - - - - - - - - - - - - - -
-def generate_repulsion_column(candles: pd.DataFrame, ema: pd.Series) -> np.ndarray:
-    method_thrust_checker = np.frompyfunc(repulsion_exist, 6, 1)
-    result: np.ndarray = method_thrust_checker(
-        candles["trend"],
-        ema.shift(1),
-        candles["high"].shift(2),
-        candles["high"].shift(1),
-        candles["low"].shift(2),
-        candles["low"].shift(1),
+def generate_repulsion_column(candles: pd.DataFrame, ema: pd.Series) -> pd.Series:
+    codes: np.ndarray = generate_repulsion_codes(
+        base_rules.encode_trend_labels(candles["trend"]),
+        ema.to_numpy(dtype=np.float64),
+        candles["high"].to_numpy(dtype=np.float64),
+        candles["low"].to_numpy(dtype=np.float64),
     )
-    return result
+    return pd.Series(DIRECTION_LABELS[codes], index=candles.index)
+
+
+def detect_latest_repulsion(trend: str, emas: pd.Series, candles: pd.DataFrame) -> Optional[str]:
+    """
+    `generate_repulsion_column` only for the last row,
+    which is calculated with the same kernel on the last 3 rows
+    """
+    codes: np.ndarray = generate_repulsion_codes(
+        base_rules.encode_trend_labels([trend] * 3),
+        emas.to_numpy(dtype=np.float64)[-3:],
+        candles["high"].to_numpy(dtype=np.float64)[-3:],
+        candles["low"].to_numpy(dtype=np.float64)[-3:],
+    )
+    return DIRECTION_LABELS[codes[-1]]
+
+
+def generate_repulsion_codes(
+    trend_codes: np.ndarray, emas: np.ndarray, highs: np.ndarray, lows: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized version of `repulsion_exist`, which judges each row by the previous 2 rows
+
+    Parameters
+    ----------
+    trend_codes : np.ndarray
+        generated by `base_rules.generate_trend_codes`
+    emas : np.ndarray
+        10EMA
+    highs : np.ndarray
+    lows : np.ndarray
+        All of them have the same length
+
+    Returns
+    -------
+    np.ndarray (dtype: int8)
+        DIRECTION_LONG, DIRECTION_SHORT or DIRECTION_NONE
+    """
+    codes: np.ndarray = np.zeros(len(highs), dtype=np.int8)
+    if len(highs) < 2:
+        return codes
+
+    # INFO: views of the previous row for rows 1, 2, ... (no shifted copies)
+    previous_ema: np.ndarray = emas[:-1]
+    previous_high: np.ndarray = highs[:-1]
+    previous_low: np.ndarray = lows[:-1]
+
+    # INFO: row 1 has no candle 2 rows before, which is NaN and never touches ema
+    touch_ema_in_bull: np.ndarray = previous_low < previous_ema
+    touch_ema_in_bull[1:] |= lows[:-2] < previous_ema[1:]
+    touch_ema_in_bear: np.ndarray = previous_ema < previous_high
+    touch_ema_in_bear[1:] |= previous_ema[1:] < highs[:-2]
+
+    trends: np.ndarray = trend_codes[1:]
+    longs: np.ndarray = (
+        (trends == base_rules.TREND_BULL) & touch_ema_in_bull & (previous_ema < previous_high)
+    )
+    shorts: np.ndarray = (
+        (trends == base_rules.TREND_BEAR) & touch_ema_in_bear & (previous_ema > previous_low)
+    )
+    codes[1:][longs] = DIRECTION_LONG
+    codes[1:][shorts] = DIRECTION_SHORT
+    return codes
 
 
 def generate_entryable_prices(candles: pd.DataFrame, spread: float) -> np.ndarray:
@@ -72,6 +139,112 @@ def commit_positions_by_loop(factor_dicts: List[dict]) -> pd.DataFrame:
     ]
 
 
+def commit_positions_by_arrays(factors: pd.DataFrame) -> pd.DataFrame:
+    """
+    Same as `commit_positions_by_loop`, but simulates positions in one pass over typed arrays
+
+    Parameters
+    ----------
+    factors : pd.DataFrame
+        Columns: the same as the keys of factor_dicts of `commit_positions_by_loop`
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: entryable_price, position, exitable_price, exit_reason, possible_stoploss
+    """
+    size: int = len(factors)
+    entryables: np.ndarray = factors["entryable"].to_numpy(dtype=object, copy=True)
+    entryable_prices: np.ndarray = factors["entryable_price"].to_numpy(dtype=np.float64, copy=True)
+    entry_codes: List[int] = encode_direction_labels(entryables).tolist()
+    opens: List[float] = factors["open"].to_numpy(dtype=np.float64).tolist()
+    times: List[str] = factors["time"].tolist()
+
+    # INFO: the previous row of row 0 is the last row, as `factor_dicts[index - 1]` refers
+    previous_supports: np.ndarray = np.roll(factors["support"].to_numpy(dtype=np.float64), 1)
+    previous_regists: np.ndarray = np.roll(factors["regist"].to_numpy(dtype=np.float64), 1)
+    highs: np.ndarray = factors["high"].to_numpy(dtype=np.float64)
+    lows: np.ndarray = factors["low"].to_numpy(dtype=np.float64)
+    long_hits: List[bool] = ((lows < previous_supports) & (previous_supports < highs)).tolist()
+    short_hits: List[bool] = ((lows < previous_regists) & (previous_regists < highs)).tolist()
+    long_exits_by_stoc, short_exits_by_stoc = __stoc_exits(factors)
+
+    position_list: List[Any] = [np.nan] * size
+    exitable_prices: np.ndarray = np.full(size, np.nan, dtype=np.float64)
+    exit_reasons: np.ndarray = np.full(size, np.nan, dtype=object)
+    possible_stoplosses: np.ndarray = np.full(size, np.nan, dtype=np.float64)
+
+    entry_direction: int = entry_codes[0]
+    for index in range(size):
+        if entry_direction != DIRECTION_NONE:
+            if entry_direction == DIRECTION_LONG:
+                stoploss, hit, stoc_crossed = (
+                    previous_supports[index], long_hits[index], long_exits_by_stoc[index]
+                )
+            else:
+                stoploss, hit, stoc_crossed = (
+                    previous_regists[index], short_hits[index], short_exits_by_stoc[index]
+                )
+            possible_stoplosses[index] = stoploss
+            if not (hit or stoc_crossed):
+                continue
+
+            position_list[index] = "sell_exit" if entry_direction == DIRECTION_LONG else "buy_exit"
+            if hit:
+                exitable_prices[index], exit_reasons[index] = stoploss, "Hit stoploss"
+            else:
+                exitable_prices[index] = opens[index]
+                exit_reasons[index] = "Stochastics of both long and target-span are crossed"
+
+            # HACK: long なのに buy_exit などの逆行減少があるときは entryを消しておく (暫定措置)
+            if entry_codes[index] == -entry_direction:
+                entry_codes[index + 1] = entry_codes[index]
+                entryables[index + 1] = entryables[index]
+                entryable_prices[index + 1] = entryable_prices[index]
+                entryable_prices[index] = np.nan
+
+        # INFO: reset next position
+        if times[index] == times[-1]:
+            entry_direction = DIRECTION_NONE
+            continue
+        position_list[index + 1] = entryables[index + 1]
+        entry_direction = entry_codes[index + 1]
+
+    positions: np.ndarray = np.empty(size, dtype=object)
+    positions[:] = position_list
+    return pd.DataFrame(
+        {
+            "entryable_price": entryable_prices,
+            "position": positions,
+            "exitable_price": exitable_prices,
+            "exit_reason": exit_reasons,
+            "possible_stoploss": possible_stoplosses,
+        }
+    )
+
+
+def __stoc_exits(factors: pd.DataFrame) -> Tuple[List[bool], List[bool]]:
+    """vectorized `is_exitable` for long and short positions on each row"""
+    stod: np.ndarray = factors["stoD_3"].to_numpy(dtype=np.float64)
+    stosd: np.ndarray = factors["stoSD_3"].to_numpy(dtype=np.float64)
+    long_stod_greater: np.ndarray = factors["stoD_over_stoSD"].to_numpy().astype(bool)
+
+    # INFO: the previous row of row 0 is the last row, as `factor_dicts[index - 1]` refers
+    stod_under: np.ndarray = stod < stosd
+    stod_over: np.ndarray = stod > stosd
+    long_exits: np.ndarray = ~long_stod_greater & stod_under & np.roll(stod_under, 1)
+    short_exits: np.ndarray = long_stod_greater & stod_over & np.roll(stod_over, 1)
+    return long_exits.tolist(), short_exits.tolist()
+
+
+def encode_direction_labels(directions: Union[pd.Series, np.ndarray]) -> np.ndarray:
+    """Convert "long", "short" (or others) into codes of direction"""
+    labels: np.ndarray = np.asarray(directions, dtype=object)
+    return np.select(
+        [labels == "long", labels == "short"], [DIRECTION_LONG, DIRECTION_SHORT], DIRECTION_NONE
+    ).astype(np.int8)
+
+
 def __trade_routine(
     entry_direction: str,
     factor_dicts: List[dict],
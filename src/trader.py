@@ -1,6 +1,6 @@
 import abc
 from collections.abc import Callable
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -49,39 +49,86 @@ class Trader(metaclass=abc.ABCMeta):
     #
     def perform(self, rule: str, entry_filters: Optional[List[str]] = None) -> pd.DataFrame:
         """automatically test trade rule"""
-        # INFO: 繰り返しデモする場合に前回のpositionが残っているので、リセットする いらなくない？
-        self._result_processor.reset_drawer()
-        filters: List[str] = FILTER_ELEMENTS if entry_filters is None else entry_filters
-        self.config.set_entry_rules("entry_filters", value=filters)
+        candles, indicators = self.prepare_signs(rule)
+        return self.perform_with_signs(rule, candles, indicators, entry_filters)
 
-        backtest: Callable[
-            [pd.DataFrame, pd.DataFrame],
-            Dict[str, Union[str, pd.DataFrame]],
-        ]
-        if rule in ("swing", "scalping"):
-            backtest = self.backtest
-        # elif rule == "wait_close":
-        #     backtest = self._backtest_wait_close
-        else:
-            print("Rule {} is not exist ...".format(rule))
-            exit()
+    def prepare_signs(self, rule: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Prepare indicators and trade signs (trend, thrust and all filter columns).
+        They depend on neither entry_filters nor stoploss,
+        so they can be shared by `perform_with_signs` sweeping these parameters.
+
+        Returns
+        -------
+        Tuple[pd.DataFrame, pd.DataFrame]
+            candles with trade signs, indicators
+        """
+        self.__select_backtest(rule)
 
         # TODO: The order of these processings cannot be changed.
         #     But should be able to be changed.
         indicators: pd.DataFrame = prepare_indicators()
         candles: pd.DataFrame = FXBase.get_candles().copy()
         candles = self._prepare_trade_signs(rule, candles, indicators)
-        candles = self._mark_entryable_rows(candles)  # This needs 'thrust'
+        return candles, indicators
 
-        result: Dict[str, Union[str, pd.DataFrame]] = backtest(candles, indicators)
+    def perform_with_signs(
+        self,
+        rule: str,
+        candles: pd.DataFrame,
+        indicators: pd.DataFrame,
+        entry_filters: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Run only the steps depending on entry_filters and stoploss
+
+        Parameters
+        ----------
+        candles : pd.DataFrame
+        indicators : pd.DataFrame
+            the results of `prepare_signs`, which are not changed
+        """
+        # INFO: 繰り返しデモする場合に前回のpositionが残っているので、リセットする いらなくない？
+        self._result_processor.reset_drawer()
+        filters: List[str] = FILTER_ELEMENTS if entry_filters is None else entry_filters
+        self.config.set_entry_rules("entry_filters", value=filters)
+        result: Dict[str, Union[str, pd.DataFrame]] = self.backtest_with_signs(
+            rule, candles, indicators
+        )
 
         print("{} ... (perform)".format(result["result"]))
         df_positions: pd.DataFrame = self._result_processor.run(rule, result, indicators)
         return df_positions
 
+    def backtest_with_signs(
+        self, rule: str, candles: pd.DataFrame, indicators: pd.DataFrame, dump_csv: bool = True
+    ) -> Dict[str, Union[str, pd.DataFrame]]:
+        """
+        Backtest on a copy of `candles` with entry_filters in self.config
+
+        Parameters
+        ----------
+        dump_csv : bool
+            write the result into tmp/csvs, which should be False for parallel runs
+        """
+        backtest = self.__select_backtest(rule)
+        candles = self._mark_entryable_rows(candles.copy())  # This needs 'thrust'
+        return backtest(candles, indicators, dump_csv=dump_csv)
+
+    def __select_backtest(
+        self, rule: str
+    ) -> Callable[..., Dict[str, Union[str, pd.DataFrame]]]:
+        if rule in ("swing", "scalping"):
+            return self.backtest
+        # elif rule == "wait_close":
+        #     return self._backtest_wait_close
+        else:
+            print("Rule {} is not exist ...".format(rule))
+            exit()
+
     @abc.abstractmethod
     def backtest(
-        self, candles: pd.DataFrame, indicators: pd.DataFrame
+        self, candles: pd.DataFrame, indicators: pd.DataFrame, dump_csv: bool = True
     ) -> Dict[str, Union[str, pd.DataFrame]]:
         pass
 
@@ -115,11 +162,12 @@ class Trader(metaclass=abc.ABCMeta):
     ) -> pd.DataFrame:
         print("[Trader] preparing base-data for judging ...")
 
-        candles["trend"] = base_rules.generate_trend_column(indicators, candles.close)
+        trend_codes: np.ndarray = base_rules.generate_trend_codes(indicators, candles.close)
+        candles["trend"] = base_rules.decode_trend_codes(trend_codes)
         trend = pd.DataFrame(
             {
-                "bull": np.where(candles["trend"] == "bull", True, False),
-                "bear": np.where(candles["trend"] == "bear", True, False),
+                "bull": trend_codes == base_rules.TREND_BULL,
+                "bear": trend_codes == base_rules.TREND_BEAR,
             }
         )
         candles["thrust"] = generate_thrust_column(rule, candles, trend, indicators)
@@ -140,9 +188,9 @@ class Trader(metaclass=abc.ABCMeta):
         )
         candles["ma_gap_expanding"] = generate_getting_steeper_column(trend, indicators)
         candles["sma_follow_trend"] = generate_following_trend_column(trend, indicators["20SMA"])
-        candles["stoc_allows"] = base_rules.generate_stoc_allows_column(
-            indicators, sr_trend=candles["trend"]
-        )
+        candles["stoc_allows"] = base_rules.generate_stoc_allows_mask(indicators, trend_codes)
+        # INFO: any combination of filters can be judged at once by this column
+        candles["filter_mask"] = base_rules.pack_filter_mask(candles)
         return candles
 
     def _mark_entryable_rows(self, candles: pd.DataFrame) -> pd.DataFrame:
@@ -150,6 +198,17 @@ class Trader(metaclass=abc.ABCMeta):
         Judge whether it is entryable or not on each row.
         Then set the result in the column 'entryable'.
         """
-        entryable = np.all(candles[self.config.get_entry_rules("entry_filters")], axis=1)
+        entryable = self._filters_allow(candles, self.config.get_entry_rules("entry_filters"))
         candles.loc[entryable, "entryable"] = candles[entryable]["thrust"]
         return candles
+
+    def _filters_allow(self, candles: pd.DataFrame, filters: List[str]) -> np.ndarray:
+        """
+        Judge whether all the filters are satisfied on each row.
+        The column 'filter_mask' is used if candles have it, otherwise it is generated.
+        """
+        if "filter_mask" in candles:
+            mask: np.ndarray = candles["filter_mask"].to_numpy()
+        else:
+            mask = base_rules.pack_filter_mask(candles, filters)
+        return base_rules.filter_mask_allows(mask, filters)
@@ -21,6 +21,8 @@ FILTER_ELEMENTS = [
     # 'ema60_allows',
     "band_expansion",
 ]
+# INFO: the bit of each filter in the column 'filter_mask' (uint8)
+FILTER_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(FILTER_ELEMENTS)}
 
 
 class TraderConfig:
@@ -0,0 +1,107 @@
+"""
+Module-level caches which survive warm invocations of Lambda
+
+Every cache counts hits / misses, which are logged by `log_stats`.
+"""
+from collections import OrderedDict
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+
+LOGGER = Logger()
+
+
+class TTLCache:
+    """
+    Entries expire after `ttl_sec`,
+    and the least recently used one is evicted when it is full
+    """
+
+    def __init__(self, name: str, ttl_sec: float, max_entries: int = 8) -> None:
+        self.name: str = name
+        self.ttl_sec: float = ttl_sec
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        # INFO: key -> (expiration of time.monotonic(), value)
+        self.__entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value: Optional[Any] = self.peek(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Same as `get`, but neither counted nor regarded as recently used"""
+        entry: Optional[Tuple[float, Any]] = self.__entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self.__entries[key]
+            return None
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl_sec: Optional[float] = None) -> None:
+        now: float = time.monotonic()
+        for expired_key in [k for k, (expires_at, _) in self.__entries.items() if expires_at <= now]:
+            del self.__entries[expired_key]
+
+        self.__entries[key] = (now + (self.ttl_sec if ttl_sec is None else ttl_sec), value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Remove the entry of `key`, or all the entries if None"""
+        if key is None:
+            self.__entries.clear()
+        else:
+            self.__entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.__entries),
+        }
+
+    def reset(self) -> None:
+        self.invalidate()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+
+# INFO: the candles of the entry granularity (only the newer bars are requested when they hit)
+CANDLES = TTLCache("candles", ttl_sec=60 * 60)
+# INFO: only the complete daily candles (the latest ones are requested when they hit)
+LONG_SPAN_CANDLES = TTLCache("long_span_candles", ttl_sec=60 * 60)
+# INFO: long indicators of the complete daily candles, keyed by their contents
+#   (the ones of the incomplete latest candle are calculated on each invocation)
+LONG_INDICATORS = TTLCache("long_indicators", ttl_sec=60 * 60)
+# INFO: IndicatorState.to_dict() of the live candles, which is resumed on the next invocation
+INDICATOR_STATES = TTLCache("indicator_states", ttl_sec=60 * 60)
+# NOTE: positions are not cached, because they can be closed by stoploss on Oanda
+#   between the invocations (every 10 minutes)
+
+CACHES: List[TTLCache] = [CANDLES, LONG_SPAN_CANDLES, LONG_INDICATORS, INDICATOR_STATES]
+
+
+def log_stats() -> None:
+    LOGGER.info({"[WarmCache]": {cache.name: cache.stats() for cache in CACHES}})
+
+
+def reset() -> None:
+    """Forget all the entries and counters (for tests)"""
+    for cache in CACHES:
+        cache.reset()
@@ -0,0 +1,76 @@
+import os
+from unittest.mock import patch
+
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_dynamodb, mock_sns
+import pytest
+
+from src.clients import aws_registry, sns
+import src.clients.dynamodb_accessor as dn_accessor
+from tests.conftest import fixture_sns
+
+
+@pytest.fixture(scope="module", autouse=True)
+def init_endpoint():
+    if os.environ.get("DYNAMO_ENDPOINT") is not None:
+        del os.environ["DYNAMO_ENDPOINT"]
+
+
+def test_get_client():
+    client = aws_registry.get_client("dynamodb")
+
+    assert aws_registry.get_client("dynamodb") is client
+    assert aws_registry.get_client("dynamodb", region_name="us-west-1") is not client
+    assert aws_registry.get_resource("dynamodb") is aws_registry.get_resource("dynamodb")
+
+    aws_registry.reset()
+    assert aws_registry.get_client("dynamodb") is not client
+
+
+@mock_dynamodb
+class TestGetTable:
+    def test_missing_table(self):
+        with pytest.raises(ClientError):
+            aws_registry.get_table("H1_CANDLES")
+
+    def test_cached_table(self):
+        dynamo = dn_accessor.DynamodbAccessor(pare_name="USD_JPY", table_name="H1_CANDLES")
+        table = dynamo.table
+        client = aws_registry.get_client("dynamodb")
+
+        with patch.object(
+            client, "describe_table", wraps=client.describe_table
+        ) as describe_mock, patch.object(client, "list_tables") as list_mock:
+            other = dn_accessor.DynamodbAccessor(pare_name="EUR_USD", table_name="H1_CANDLES")
+            other.list_records("2021-01-01T00:00:00", "2021-01-02T00:00:00")
+            other_granularity = dn_accessor.DynamodbAccessor("EUR_USD", table_name="M10_CANDLES")
+            other_granularity.table
+
+        assert other.table is table
+        assert describe_mock.call_count == 1
+        list_mock.assert_not_called()
+        assert set(boto3.client("dynamodb").list_tables()["TableNames"]) == {
+            "H1_CANDLES",
+            "M10_CANDLES",
+        }
+
+    def test_lazy_init(self):
+        with patch("src.clients.aws_registry.get_table") as get_table_mock:
+            dynamo = dn_accessor.DynamodbAccessor(pare_name="USD_JPY")
+            get_table_mock.assert_not_called()
+
+            dynamo.table
+            dynamo.table
+        get_table_mock.assert_called_once()
+
+
+@mock_sns
+def test_publish_reuses_client():
+    fixture_sns()
+
+    with patch("src.clients.aws_registry.boto3.client", wraps=boto3.client) as client_mock:
+        sns.publish({"message": "entry"})
+        sns.publish({"message": "exit"})
+
+    assert client_mock.call_count == 1
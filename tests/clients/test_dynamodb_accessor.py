@@ -1,10 +1,13 @@
 import datetime
+from decimal import Decimal
 import os
+from unittest.mock import patch
 
 import boto3
 from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
 from moto import mock_dynamodb
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -91,3 +94,229 @@ def test_list_table(dynamo_client, table_name, import_dummy_records):
     assert len(records) == 15
     assert isinstance(records, list)
     assert isinstance(records[0], dict)
+
+
+class TestListCandleColumns:
+    @pytest.fixture(name="eur_client", scope="class")
+    def fixture_eur_client(self, dynamo_client, table_name):
+        dynamo_client
+        accessor = dn_accessor.DynamodbAccessor(pare_name="EUR_USD", table_name=table_name)
+        rng = np.random.default_rng(0)
+        size: int = 300
+        candles = pd.DataFrame(
+            {
+                "open": rng.uniform(1.0, 1.2, size).round(5),
+                "high": rng.uniform(1.2, 1.3, size).round(5),
+                "low": rng.uniform(0.9, 1.0, size).round(5),
+                "close": rng.uniform(1.0, 1.2, size).round(5),
+                "volume": rng.integers(1, 5000, size),
+                "complete": np.arange(size) < size - 1,
+                "time": [
+                    (datetime.datetime(2021, 1, 1) + datetime.timedelta(hours=i)).isoformat()
+                    + ".000000Z"
+                    for i in range(size)
+                ],
+            }
+        )
+        accessor.batch_insert(candles.copy())
+        yield accessor, candles
+
+    @staticmethod
+    def limit_query(method, limit: int):
+        """Let the method return paginated responses"""
+        return lambda **kwargs: method(Limit=limit, **kwargs)
+
+    def test_list_records_follows_pages(self, eur_client):
+        accessor, candles = eur_client
+
+        with patch.object(
+            accessor.table, "query", side_effect=self.limit_query(accessor.table.query, 40)
+        ) as query_mock:
+            records = accessor.list_records("2021-01-01T00:00:00", "2021-01-31T00:00:00")
+
+        assert query_mock.call_count > 1
+        assert [record["time"] for record in records] == candles["time"].tolist()
+
+    @pytest.mark.parametrize("segments", [1, 4, 7])
+    def test_segmented_query(self, eur_client, segments: int):
+        accessor, candles = eur_client
+        client = boto3.client("dynamodb")
+
+        with patch.object(
+            client, "query", side_effect=self.limit_query(client.query, 25)
+        ) as query_mock, patch.object(
+            accessor, "_DynamodbAccessor__init_dynamo_client", return_value=client
+        ):
+            buffer = accessor.list_candle_columns(
+                "2021-01-02T00:00:00", "2021-01-12T11:00:00", segments=segments
+            )
+
+        assert query_mock.call_count > segments
+        expected = candles.iloc[24:276].reset_index(drop=True)
+        pd.testing.assert_frame_equal(buffer.to_frame(), expected)
+
+    def test_segment_bounds(self, eur_client):
+        accessor, candles = eur_client
+        # INFO: the bounds of segments are just on the times of candles
+        buffer = accessor.list_candle_columns(
+            "2021-01-01T00:00:00", "2021-01-01T04:00:00", segments=4
+        )
+
+        assert buffer.size == 5
+        assert buffer.times[: buffer.size].tolist() == candles["time"].iloc[:5].tolist()
+
+    def test_list_candles(self, eur_client):
+        accessor, candles = eur_client
+
+        result = accessor.list_candles("2021-01-01T00:00:00", "2021-01-01T09:00:00")
+
+        assert result["time"].tolist() == [
+            "2021-01-01 0{}:00:00".format(hour) for hour in range(10)
+        ]
+        np.testing.assert_array_equal(result["close"], candles["close"].iloc[:10])
+        # INFO: the same columns as the candles of Oanda, so that they can be unioned
+        assert list(result.columns) == ["open", "high", "low", "close", "volume", "complete", "time"]
+        assert result["volume"].dtype == np.int64
+        assert result["volume"].tolist() == candles["volume"].iloc[:10].tolist()
+        assert result["complete"].dtype == bool
+        assert result["complete"].all()
+
+    def test_list_candles_with_incomplete_latest(self, eur_client):
+        accessor, candles = eur_client
+
+        result = accessor.list_candles("2021-01-12T00:00:00", "2021-01-31T00:00:00")
+
+        assert result["complete"].tolist() == candles["complete"].iloc[-len(result) :].tolist()
+        assert not result["complete"].iat[-1]
+
+
+class TestCandleColumnBuffer:
+    def test_grow(self):
+        buffer = dn_accessor.CandleColumnBuffer(capacity=2)
+        items = [
+            {"time": {"S": "2021-01-01T0{}:00:00".format(i)}, "close": {"N": str(100 + i)}}
+            for i in range(5)
+        ]
+
+        buffer.extend(items[:3])
+        buffer.extend(items[3:])
+
+        result = buffer.to_frame()
+        assert result["close"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+        assert result["open"].isna().all()
+        assert len(buffer.times) >= 5
+        # INFO: the items written before volume and complete were stored
+        assert result["volume"].dtype == "Int64"
+        assert result["volume"].isna().all()
+        assert result["complete"].tolist() == [None] * 5
+
+    def test_volume_and_complete(self):
+        buffer = dn_accessor.CandleColumnBuffer(capacity=2)
+        items = [
+            {
+                "time": {"S": "2021-01-01T0{}:00:00".format(i)},
+                "close": {"N": str(100 + i)},
+                "volume": {"N": str(10 * i)},
+                "complete": {"BOOL": i < 2},
+            }
+            for i in range(3)
+        ]
+        buffer.extend(items)
+
+        result = dn_accessor.CandleColumnBuffer.concat([buffer, buffer]).to_frame()
+        assert result["volume"].tolist() == [0, 10, 20] * 2
+        assert result["volume"].dtype == np.int64
+        assert result["complete"].tolist() == [True, True, False] * 2
+        assert result["complete"].dtype == bool
+
+
+class TestBatchInsert:
+    @pytest.fixture(name="gbp_client", scope="function")
+    def fixture_gbp_client(self, dynamo_client, table_name):
+        dynamo_client
+        accessor = dn_accessor.DynamodbAccessor(pare_name="GBP_USD", table_name=table_name)
+        yield accessor
+        accessor.batch_delete("2021-01-01T00:00:00", "2021-12-31T00:00:00")
+
+    @staticmethod
+    def dummy_candles(size: int) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "open": np.round(np.linspace(1.2, 1.3, size), 5),
+                "close": np.round(np.linspace(1.3, 1.2, size), 5),
+                "volume": np.arange(size),
+                "complete": np.arange(size) % 2 == 0,
+                "time": [
+                    (datetime.datetime(2021, 1, 1) + datetime.timedelta(hours=i)).isoformat()
+                    for i in range(size)
+                ],
+            }
+        )
+
+    def test_batch_insert(self, gbp_client):
+        candles = self.dummy_candles(60)
+        candles.loc[3, "open"] = np.nan
+        duplicated = candles.iloc[[10]].assign(close=9.99)
+
+        metrics = gbp_client.batch_insert(pd.concat([candles, duplicated]), max_workers=2)
+
+        assert metrics["items"] == 60
+        assert metrics["chunks"] == 3
+        assert metrics["retries"] == 0 and metrics["unprocessed"] == 0
+        records = gbp_client.list_records("2021-01-01T00:00:00", "2021-01-03T12:00:00")
+        assert [record["time"] for record in records] == candles["time"].tolist()
+        assert records[1] == {
+            "pareName": "GBP_USD",
+            "time": candles.loc[1, "time"],
+            "open": Decimal(repr(candles.loc[1, "open"])),
+            "close": Decimal(repr(candles.loc[1, "close"])),
+            "volume": Decimal(1),
+            "complete": False,
+        }
+        assert records[3]["open"] is None
+        assert records[10]["close"] == Decimal("9.99")
+
+    def test_retry_unprocessed_items(self, gbp_client, table_name):
+        candles = self.dummy_candles(30)
+        client = boto3.client("dynamodb")
+        write = client.batch_write_item
+
+        def throttled_write(RequestItems):
+            """Leave the first 5 items unprocessed at the first call"""
+            requests = RequestItems[table_name]
+            if throttled_write.called:
+                return write(RequestItems=RequestItems)
+            throttled_write.called = True
+            write(RequestItems={table_name: requests[5:]})
+            return {"UnprocessedItems": {table_name: requests[:5]}}
+
+        throttled_write.called = False
+        with patch.object(client, "batch_write_item", side_effect=throttled_write), patch.object(
+            gbp_client, "_DynamodbAccessor__init_dynamo_client", return_value=client
+        ), patch("src.clients.dynamodb_accessor.time.sleep") as sleep_mock:
+            metrics = gbp_client.batch_insert(candles, max_workers=1)
+
+        assert metrics["retries"] == 1 and metrics["unprocessed"] == 0
+        sleep_mock.assert_called_once_with(dn_accessor.BATCH_WRITE_BACKOFF_SEC)
+        records = gbp_client.list_records("2021-01-01T00:00:00", "2021-01-02T12:00:00")
+        assert len(records) == 30
+
+    def test_give_up_unprocessed_items(self, gbp_client, table_name):
+        client = boto3.client("dynamodb")
+
+        def unprocessable_write(RequestItems):
+            return {"UnprocessedItems": RequestItems}
+
+        with patch.object(
+            client, "batch_write_item", side_effect=unprocessable_write
+        ) as write_mock, patch.object(
+            gbp_client, "_DynamodbAccessor__init_dynamo_client", return_value=client
+        ), patch(
+            "src.clients.dynamodb_accessor.BATCH_WRITE_MAX_RETRIES", 2
+        ), patch(
+            "src.clients.dynamodb_accessor.time.sleep"
+        ):
+            metrics = gbp_client.batch_insert(self.dummy_candles(30))
+
+        assert write_mock.call_count == 2 * 3
+        assert metrics["unprocessed"] == 30
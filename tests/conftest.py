@@ -7,7 +7,9 @@ import boto3
 from dotenv import load_dotenv
 import pytest
 
+from src.clients import aws_registry
 from src.trader_config import TraderConfig
+import src.warm_cache as warm_cache
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -17,6 +19,20 @@ def load_env() -> None:
     yield
 
 
+@pytest.fixture(scope="function", autouse=True)
+def reset_aws_registry() -> None:
+    """Clients and tables cached in another test may belong to another mocked backend"""
+    aws_registry.reset()
+    yield
+
+
+@pytest.fixture(scope="function", autouse=True)
+def reset_warm_cache() -> None:
+    """Each test starts as a cold invocation"""
+    warm_cache.reset()
+    yield
+
+
 def fixture_sns() -> None:
     conn = boto3.client("sns", region_name="us-east-2")
     created = conn.create_topic(Name="dummy-topic")
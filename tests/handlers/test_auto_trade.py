@@ -1,4 +1,8 @@
-from typing import Dict, Union
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Union
 from unittest.mock import patch
 
 from oandapyV20.exceptions import V20Error
@@ -28,3 +32,37 @@ class TestLambdaHandler:
             with patch("src.clients.sns.publish"):
                 res: Dict[str, Union[int, str]] = auto_trade.lambda_handler({}, {})
                 assert res["statusCode"] == 500
+
+
+# INFO: the budget of the cold start (importing the handler in a new process)
+IMPORT_MODULES_BUDGET: int = 1000
+IMPORT_MILLISECONDS_BUDGET: int = 1500
+# INFO: the modules which the live trading doesn't use
+UNNEEDED_MODULES: List[str] = [
+    "matplotlib",
+    "mplfinance",
+    "src.drawer",
+    "src.history_visualizer",
+    "src.alpha_trader",
+    "src.swing_trader",
+]
+
+
+def test_import_budget():
+    script: str = """
+import json, sys, time
+before = set(sys.modules)
+started_at = time.perf_counter()
+import src.handlers.auto_trade
+elapsed = (time.perf_counter() - started_at) * 1000
+print(json.dumps({"modules": sorted(set(sys.modules) - before), "milliseconds": elapsed}))
+"""
+    root: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    completed = subprocess.run(
+        [sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.splitlines()[-1])
+
+    assert [name for name in UNNEEDED_MODULES if name in result["modules"]] == []
+    assert len(result["modules"]) <= IMPORT_MODULES_BUDGET
+    assert result["milliseconds"] <= IMPORT_MILLISECONDS_BUDGET
@@ -1,6 +1,12 @@
+import base64
+import gzip
 import json
 
 from typing import Dict, List
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
 import pytest
 
 from aws_lambda_powertools.utilities.data_classes import (
@@ -77,6 +83,92 @@ class TestApiHandler:
         )
 
 
+class TestPayloadFormat:
+    @pytest.fixture(name="patch_load_history", autouse=True)
+    def fixture_patch_load_history(self):
+        tradehist = pd.DataFrame(
+            {
+                "time": ["2021-01-28 03:00:00", "2021-01-28 04:00:00"],
+                "close": [103.5, np.nan],
+                "type": [None, "ORDER_FILL"],
+            }
+        )
+        with patch("src.handlers.tradehist_cache.load_history", return_value=tradehist), patch(
+            "src.handlers.tradehist_cache.log_stats"
+        ):
+            yield
+
+    @staticmethod
+    def event_of(tradehist_event: APIGatewayProxyEvent, **params: str) -> APIGatewayProxyEvent:
+        return dict(  # type: ignore
+            tradehist_event,
+            queryStringParameters=dict(tradehist_event["queryStringParameters"], **params),
+        )
+
+    def test_records(self, tradehist_event: APIGatewayProxyEvent):
+        result: Dict = trade_hist.api_handler(self.event_of(tradehist_event), None)
+
+        assert result["statusCode"] == 200
+        assert json.loads(result["body"]) == {
+            "history": [
+                {"time": "2021-01-28 03:00:00", "close": 103.5, "type": None},
+                {"time": "2021-01-28 04:00:00", "close": None, "type": "ORDER_FILL"},
+            ]
+        }
+        assert "isBase64Encoded" not in result
+
+    def test_columnar(self, tradehist_event: APIGatewayProxyEvent):
+        event = self.event_of(tradehist_event, format="columnar")
+        result: Dict = trade_hist.api_handler(event, None)
+
+        assert result["statusCode"] == 200
+        assert json.loads(result["body"]) == {
+            "history": {
+                "time": ["2021-01-28 03:00:00", "2021-01-28 04:00:00"],
+                "close": [103.5, None],
+                "type": [None, "ORDER_FILL"],
+            }
+        }
+
+    def test_columnar_with_gzip(self, tradehist_event: APIGatewayProxyEvent):
+        event = dict(
+            self.event_of(tradehist_event, format="columnar"),
+            headers={"Accept-Encoding": "gzip, deflate, br", "accept": api_util.GZIP_MEDIA_TYPE},
+        )
+        result: Dict = trade_hist.api_handler(event, None)
+        uncompressed: Dict = trade_hist.api_handler(
+            self.event_of(tradehist_event, format="columnar"), None
+        )
+
+        assert result["isBase64Encoded"] is True
+        assert result["headers"]["Content-Encoding"] == "gzip"
+        assert gzip.decompress(base64.b64decode(result["body"])).decode() == uncompressed["body"]
+
+    def test_gzip_needs_its_media_type(self, tradehist_event: APIGatewayProxyEvent):
+        """API Gateway would return the base64 text as it is, if Accept isn't binaryMediaTypes"""
+        event = dict(
+            self.event_of(tradehist_event, format="columnar"),
+            headers={"Accept-Encoding": "gzip, deflate, br", "Accept": "*/*"},
+        )
+        result: Dict = trade_hist.api_handler(event, None)
+
+        assert "isBase64Encoded" not in result
+        assert json.loads(result["body"])["history"]["close"] == [103.5, None]
+
+    def test_binary_media_type_of_serverless(self):
+        with open("serverless.yml", "r") as config_file:
+            binary_media_types = config_file.read().split("binaryMediaTypes:")[1].split("\n")[1]
+        assert binary_media_types.strip() == "- '{}'".format(api_util.GZIP_MEDIA_TYPE)
+
+    def test_invalid_format(self, tradehist_event: APIGatewayProxyEvent):
+        result: Dict = trade_hist.api_handler(self.event_of(tradehist_event, format="csv"), None)
+
+        assert result["statusCode"] == 400
+        assert json.loads(result["body"]) == {
+            "message": "FORMAT must be one of records, columnar. You requested csv!"
+        }
+
+
 # class TestTradehistParamsValid:
 def test_params_valid(tradehist_event: APIGatewayProxyEvent):
     params: Dict[str, str] = tradehist_event["queryStringParameters"]
@@ -0,0 +1,213 @@
+from datetime import datetime, timedelta
+import json
+import os
+from typing import Any, Dict, List, Tuple
+from unittest.mock import patch
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+import pytest
+
+from src.handlers import trade_hist, tradehist_cache
+from src.handlers.tradehist_cache import TradehistRequest, TradehistStore
+
+NOW: datetime = datetime(2021, 1, 28, 4, 58, 9)
+
+
+class FakeBuilder:
+    """Makes an hourly history like Visualizer.run, recording the requested windows"""
+
+    def __init__(self) -> None:
+        self.windows: List[Tuple[str, str]] = []
+
+    def __call__(self, _request: TradehistRequest, from_iso: str, to_iso: str) -> pd.DataFrame:
+        self.windows.append((from_iso, to_iso))
+        start: datetime = tradehist_cache.latest_boundary(tradehist_cache.parse_iso(from_iso))
+        end: datetime = tradehist_cache.parse_iso(to_iso)
+        rows: List[Dict[str, Any]] = []
+        time: datetime = start
+        while time <= end:
+            rows.append(
+                {
+                    "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "close": float(time.hour),
+                    "pl": 100.0 if time.hour % 3 == 0 else float("nan"),
+                }
+            )
+            time += timedelta(hours=1)
+        history = pd.DataFrame(rows, columns=["time", "close", "pl"])
+        history["gross"] = history["pl"].cumsum()
+        return history
+
+
+@pytest.fixture(name="store")
+def fixture_store(tmp_path) -> TradehistStore:
+    tradehist_cache.reset_stats()
+    yield TradehistStore(cache_dir=str(tmp_path))
+    tradehist_cache.reset_stats()
+
+
+def request_of(from_iso: str, to_iso: str) -> TradehistRequest:
+    return tradehist_cache.normalize_params(
+        {"pareName": "USD_JPY", "from": from_iso, "to": to_iso},
+        {"indicator_names[]": ["SAR", "20SMA"]},
+    )
+
+
+def test_normalize_params():
+    request = tradehist_cache.normalize_params(
+        {
+            "pareName": " usd_jpy",
+            "from": "2020-12-30T04:58:09.460556567Z",
+            "to": "2021-01-28T04:58:09Z",
+        },
+        {"indicator_names[]": ["SAR", "20SMA", "SAR"]},
+    )
+    assert request == TradehistRequest(
+        pare_name="USD_JPY",
+        from_iso="2020-12-30T04:58:09.460556Z",
+        to_iso="2021-01-28T04:58:09.000000Z",
+        indicator_names=("20SMA", "SAR"),
+    )
+    # INFO: `from` is aligned to the H1 candle only in the key
+    assert request.cache_key() == request_of(
+        "2020-12-30T04:12:34.5Z", "2021-01-28T04:58:09.000Z"
+    ).cache_key()
+    assert request.cache_key().from_iso == "2020-12-30T04:00:00.000000Z"
+
+
+def test_closed_window_is_stored(store):
+    builder = FakeBuilder()
+    request = request_of("2021-01-20T00:00:00Z", "2021-01-27T12:34:56Z")
+
+    first = tradehist_cache.load_history(request, builder, store=store, now=NOW)
+    second = tradehist_cache.load_history(request, builder, store=store, now=NOW)
+    # INFO: the store survives another instance (another invocation)
+    third = tradehist_cache.load_history(
+        request, builder, store=TradehistStore(store_dir(store)), now=NOW + timedelta(days=30)
+    )
+
+    assert len(builder.windows) == 1
+    assert_frame_equal(first, second)
+    assert_frame_equal(first, third)
+    assert first["time"].iat[-1] == "2021-01-27 12:00:00"
+    assert builder.windows == [(request.from_iso, "2021-01-27T13:00:00.000000Z")]
+    assert tradehist_cache.STATS == {"hits": 2, "misses": 1, "edge_refreshes": 0}
+
+
+def test_requests_in_the_same_hour_share_the_stored_window(store):
+    builder = FakeBuilder()
+    for from_iso, to_iso in (
+        ("2021-01-20T00:01:02.345Z", "2021-01-27T12:34:56.789Z"),
+        ("2021-01-20T00:59:59Z", "2021-01-27T12:00:00Z"),
+    ):
+        tradehist_cache.load_history(request_of(from_iso, to_iso), builder, store=store, now=NOW)
+
+    assert len(builder.windows) == 1
+    # INFO: the builder doesn't request the transactions before `from`
+    assert builder.windows[0][0] == "2021-01-20T00:01:02.345000Z"
+    assert len(os.listdir(store_dir(store))) == 1
+
+
+def test_window_within_the_settle_margin_is_not_stored(store):
+    builder = FakeBuilder()
+    # INFO: the latest boundary is 04:00, and the history after 02:00 may not be ingested yet
+    request = request_of("2021-01-28T02:30:00Z", "2021-01-28T03:30:00Z")
+
+    tradehist_cache.load_history(request, builder, store=store, now=NOW)
+    tradehist_cache.load_history(request, builder, store=store, now=NOW)
+
+    assert len(builder.windows) == 2
+    assert os.listdir(store_dir(store)) == []
+
+
+def test_open_window_refreshes_only_the_edge(store):
+    builder = FakeBuilder()
+    request = request_of("2021-01-20T00:00:00Z", "2021-01-28T04:58:09Z")
+
+    first = tradehist_cache.load_history(request, builder, store=store, now=NOW)
+    second = tradehist_cache.load_history(request, builder, store=store, now=NOW)
+
+    settled: datetime = datetime(2021, 1, 28, 4) - tradehist_cache.SETTLE_MARGIN
+    edge_from: str = (settled - tradehist_cache.EDGE_LOOKBACK).strftime(tradehist_cache.ISO_FORMAT)
+    assert builder.windows == [
+        (request.from_iso, "2021-01-28T02:00:00.000000Z"),
+        (edge_from, request.to_iso),
+        (edge_from, request.to_iso),
+    ]
+    # INFO: same as the history built at once
+    expected = FakeBuilder()(request, request.from_iso, request.to_iso)
+    assert_frame_equal(first, expected)
+    assert_frame_equal(second, expected)
+    assert first["gross"].isna().equals(first["pl"].isna())
+    assert tradehist_cache.STATS == {"hits": 1, "misses": 1, "edge_refreshes": 2}
+
+    # INFO: the boundary moves in the next hour, and the closed part is built again
+    later = request_of("2021-01-20T00:00:00Z", "2021-01-28T05:58:09Z")
+    tradehist_cache.load_history(later, builder, store=store, now=NOW + timedelta(hours=1))
+    assert builder.windows[-2] == (request.from_iso, "2021-01-28T03:00:00.000000Z")
+
+
+def test_window_within_the_open_candle(store):
+    builder = FakeBuilder()
+    request = request_of("2021-01-28T04:10:00Z", "2021-01-28T04:50:00Z")
+
+    tradehist_cache.load_history(request, builder, store=store, now=NOW)
+    tradehist_cache.load_history(request, builder, store=store, now=NOW)
+
+    assert len(builder.windows) == 2
+    assert os.listdir(store_dir(store)) == []
+
+
+def test_store_evicts_the_oldest(tmp_path):
+    store = TradehistStore(cache_dir=str(tmp_path), max_entries=2)
+    requests = [
+        request_of("2021-01-0{}T00:00:00Z".format(day), "2021-01-10T00:00:00Z") for day in (1, 2, 3)
+    ]
+    for i, request in enumerate(requests):
+        store.put(request, pd.DataFrame({"time": [str(i)]}))
+        # INFO: the files are written in the same second
+        os.utime(store._TradehistStore__path(request), (i, i))
+
+    assert len(os.listdir(tmp_path)) == 2
+    assert store.get(requests[0]) is None
+    assert_frame_equal(store.get(requests[2]), pd.DataFrame({"time": ["2"]}))
+
+
+def test_api_handler_serves_the_stored_history(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRADEHIST_CACHE_DIR", str(tmp_path))
+    tradehist_cache.reset_stats()
+    event = {
+        "queryStringParameters": {
+            "pareName": "USD_JPY",
+            "from": "2020-12-30T04:58:09.460556567Z",
+            "to": "2021-01-28T04:58:09.460556567Z",
+        },
+        "multiValueQueryStringParameters": {"indicator_names[]": ["SAR"]},
+    }
+    tradehist = pd.DataFrame(
+        {"time": ["2021-01-28 03:00:00", "2021-01-28 04:00:00"], "close": [103.5, float("nan")]}
+    )
+
+    with patch(
+        "src.handlers.trade_hist.Visualizer.__init__", return_value=None
+    ) as init_mock, patch(
+        "src.handlers.trade_hist.Visualizer.run", return_value=tradehist
+    ), patch(
+        "src.handlers.tradehist_cache.LOGGER.info"
+    ) as log_mock:
+        results = [trade_hist.api_handler(event, None) for _ in range(2)]
+
+    assert init_mock.call_count == 1
+    assert results[0]["body"] == results[1]["body"]
+    assert json.loads(results[1]["body"])["history"][-1] == {
+        "time": "2021-01-28 04:00:00",
+        "close": None,
+    }
+    stats = log_mock.call_args.args[0]["[TradehistCache]"]
+    assert stats["hits"] == 1 and stats["hit_rate"] == 0.5
+    assert stats["latency_sec"] >= 0
+
+
+def store_dir(store: TradehistStore) -> str:
+    return store._TradehistStore__directory
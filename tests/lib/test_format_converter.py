@@ -1,9 +1,16 @@
 from decimal import Decimal
 import json
-
+import numpy as np
 import pandas as pd
+import pytest
 
 import src.lib.format_converter as converter
+from tools.fixtures import (
+    dynamo_items,
+    dynamo_records,
+    legacy_to_candles_from_dynamo,
+    random_tradehist,
+)
 
 
 def test_to_candles_from_dynamo():
@@ -26,6 +33,53 @@ def test_to_candles_from_dynamo():
     pd.testing.assert_frame_equal(result, expected, check_like=True)
 
 
+def test_to_candles_from_dynamo_with_missing_attributes():
+    records = [
+        {"time": "2020-10-01T12:34:56.000000Z", "pareName": "GBP_JPY", "close": Decimal("1.5")},
+        {"time": "2020-10-01T12:45:00.000000Z", "pareName": "GBP_JPY", "open": Decimal("2")},
+    ]
+
+    result = converter.to_candles_from_dynamo(records)
+
+    pd.testing.assert_frame_equal(result, legacy_to_candles_from_dynamo(records))
+    assert list(result.columns) == ["close", "open", "time"]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_to_candles_from_dynamo_parity(seed: int):
+    records = dynamo_records(1000, seed)
+
+    result = converter.to_candles_from_dynamo(records)
+
+    pd.testing.assert_frame_equal(result, legacy_to_candles_from_dynamo(records))
+    assert result["close"].dtype == np.float64
+
+
+def test_to_candles_from_dynamo_items():
+    assert converter.to_candles_from_dynamo_items([]).empty
+
+    records = dynamo_records(1000)
+    records[3].pop("high")
+
+    result = converter.to_candles_from_dynamo_items(dynamo_items(records))
+
+    pd.testing.assert_frame_equal(result, legacy_to_candles_from_dynamo(records))
+    assert np.isnan(result.loc[3, "high"])
+
+
+def test_to_number_columns_from_dynamo_items():
+    items = dynamo_items(dynamo_records(3))
+    items[1]["close"] = {"NULL": True}
+    items[2].pop("open")
+
+    result = converter.to_number_columns_from_dynamo_items(items, ["open", "close"])
+
+    assert result.shape == (2, 3)
+    assert np.isnan(result[0, 2]) and np.isnan(result[1, 1])
+    assert result[0, 0] == float(items[0]["open"]["N"])
+    assert converter.to_number_columns_from_dynamo_items(items, ["high"]).shape == (1, 3)
+
+
 def test_convert_to_m10():
     dummy_time_str = [
         "2020-10-01T12:34:00.000000Z",
@@ -36,3 +90,50 @@ def test_convert_to_m10():
 
     for time_str, expected in zip(dummy_time_str, expecteds):
         assert converter.convert_to_m10(time_str) == expected
+
+
+def test_convert_to_m10_array():
+    dummy_time_str = [
+        "2020-10-01T12:34:56.000000Z",
+        "1999-12-31T23:59:00.000000000Z",
+        "1900-01-01T00:00:00",
+    ]
+
+    result = converter.convert_to_m10_array(dummy_time_str)
+
+    assert result.dtype == object
+    assert result.tolist() == [converter.convert_to_m10(time_str) for time_str in dummy_time_str]
+    assert converter.convert_to_m10_array([]).tolist() == []
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_to_nullable_records_parity(seed: int):
+    tradehist: pd.DataFrame = random_tradehist(200, seed)
+
+    result = converter.to_nullable_records(tradehist)
+    expected = tradehist.replace({np.nan: None}).to_dict(orient="records")
+    assert result == expected
+    assert json.dumps(result) == json.dumps(expected)
+
+
+def test_to_nullable_columns():
+    d_frame = pd.DataFrame(
+        {
+            "close": [100.1, np.nan],
+            "type": ["ORDER_FILL", None],
+            "units": [1, 2],
+            "dst": [True, False],
+        }
+    )
+    result = converter.to_nullable_columns(d_frame)
+
+    assert result == {
+        "close": [100.1, None],
+        "type": ["ORDER_FILL", None],
+        "units": [1, 2],
+        "dst": [True, False],
+    }
+    assert json.dumps(result) == (
+        '{"close": [100.1, null], "type": ["ORDER_FILL", null], '
+        '"units": [1, 2], "dst": [true, false]}'
+    )
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.lib.indicator_kernels as kernels
+from tools.fixtures import INITIAL_AF, MAX_AF, legacy_parabolic, random_walk_candles
+
+
+class TestParabolicSar:
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_parity_with_legacy(self, seed: int):
+        candles: pd.DataFrame = random_walk_candles(size=2000, seed=seed)
+
+        result: np.ndarray = kernels.parabolic_sar(
+            candles["high"].to_numpy(), candles["low"].to_numpy(), INITIAL_AF, MAX_AF
+        )
+        expected: pd.DataFrame = legacy_parabolic(candles)
+        np.testing.assert_array_equal(result, expected["SAR"].to_numpy())
+
+    def test_parity_on_sample_candles(self, past_usd_candles):
+        candles: pd.DataFrame = pd.DataFrame(past_usd_candles)
+
+        result: np.ndarray = kernels.parabolic_sar(
+            candles["high"].to_numpy(), candles["low"].to_numpy(), INITIAL_AF, MAX_AF
+        )
+        np.testing.assert_array_equal(result, legacy_parabolic(candles)["SAR"].to_numpy())
+
+    def test_state(self):
+        candles: pd.DataFrame = random_walk_candles(size=300)
+
+        sar, state = kernels.parabolic_sar_with_state(
+            candles["high"].to_numpy(), candles["low"].to_numpy(), INITIAL_AF, MAX_AF
+        )
+        assert state["sar"] == sar[-1]
+        assert INITIAL_AF <= state["acceleration_factor"] <= MAX_AF
+        if state["bull"]:
+            assert state["extreme_price"] >= candles["high"].iat[-1]
+        else:
+            assert state["extreme_price"] <= candles["low"].iat[-1]
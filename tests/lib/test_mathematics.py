@@ -1,5 +1,8 @@
+from decimal import ROUND_HALF_UP, Decimal
 import math
 
+import numpy as np
+
 import src.lib.mathematics as mtmtcs
 
 
@@ -35,3 +38,27 @@ def test_range_2nd_decimal():
         result = mtmtcs.range_2nd_decimal(**args)
         for val, target in zip(result, expected):
             assert math.isclose(val, target)
+
+
+def test_round_half_up():
+    rng = np.random.default_rng(0)
+    ties: np.ndarray = rng.integers(-200_000, 200_000, 10000) / 2000
+    values: np.ndarray = np.concatenate(
+        [
+            rng.uniform(-10.0, 10.0, 10000),
+            ties,
+            np.nextafter(ties, np.inf),
+            np.nextafter(ties, -np.inf),
+            np.round(rng.uniform(100.0, 130.0, 10000), 3) - np.round(rng.uniform(100.0, 130.0, 10000), 3),
+            [0.0, -0.0001, 0.0125, -0.0125, 1.0005, 2.675],
+        ]
+    )
+
+    result: np.ndarray = mtmtcs.round_half_up(values)
+
+    expected = np.array(
+        [float(Decimal(str(x)).quantize(Decimal("0.001"), rounding=ROUND_HALF_UP)) for x in values]
+    )
+    np.testing.assert_array_equal(result, expected)
+    np.testing.assert_array_equal(np.signbit(result), np.signbit(expected))
+    assert np.isnan(mtmtcs.round_half_up(np.array([np.nan]))).all()
@@ -0,0 +1,103 @@
+from contextlib import closing
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.lib.results_store import TABLE_NAME, ResultsStore
+from src.lib.statistics_module import TRADE_RESULT_ITEMS
+from src.trader_config import FILTER_ELEMENTS
+
+
+def result_row(rule: str, granularity: str, filters, win_rate=55.5) -> list:
+    return [
+        "2020-01-01 00:00:00",  # DoneTime
+        rule,
+        granularity,
+        0.05,  # StoplossBuf
+        0.004,  # Spread
+        "2020-01-01 00:00:00 ~ 2020-02-01 00:00:00",  # Duration
+        1000,  # CandlesCnt
+        np.int64(20),  # EntryCnt
+        win_rate,  # WinRate
+        11,  # WinCnt
+        9,  # LoseCnt
+        12.3,  # Gross
+        30.1,  # GrossProfit
+        -17.8,  # GrossLoss
+        5.2,  # MaxProfit
+        -3.1,  # MaxLoss
+        -6.4,  # MaxDrawdown
+        1.69,  # Profit Factor
+        "-",  # Recovery Factor
+        0.123,  # Sharp Ratio
+        np.nan,  # Sortino Ratio
+    ] + [(name in filters) for name in FILTER_ELEMENTS]
+
+
+@pytest.fixture(name="store", scope="function")
+def fixture_store(tmp_path) -> ResultsStore:
+    store = ResultsStore(str(tmp_path / "results.sqlite3"))
+    rows = pd.DataFrame(
+        [
+            result_row("scalping", "M5", ["stoc_allows"]),
+            result_row("scalping", "M5", ["stoc_allows", "in_the_band"]),
+            result_row("scalping", "H1", ["stoc_allows"], win_rate="-"),
+            result_row("swing", "M5", []),
+        ],
+        columns=TRADE_RESULT_ITEMS + FILTER_ELEMENTS,
+    )
+    assert store.append(rows) == 4
+    yield store
+
+
+def test_query(store: ResultsStore):
+    assert len(store.query()) == 4
+    assert len(store.query(rule="scalping")) == 3
+    assert len(store.query(rule="scalping", granularity="M5")) == 2
+
+    result: pd.DataFrame = store.query(rule="scalping", entry_filters=["stoc_allows"])
+    assert result["Granularity"].tolist() == ["M5", "H1"]
+    assert list(result.columns) == TRADE_RESULT_ITEMS + FILTER_ELEMENTS
+
+    result = store.query(entry_filters=[])
+    assert result["Rule"].tolist() == ["swing"]
+
+
+def test_typed_columns(store: ResultsStore):
+    result: pd.DataFrame = store.query(granularity="M5")
+
+    assert result["EntryCnt"].dtype == np.int64
+    assert result["Gross"].dtype == np.float64
+    assert (result[FILTER_ELEMENTS].dtypes == bool).all()
+    assert result["Recovery Factor"].isna().all()
+    assert result["Sortino Ratio"].isna().all()
+    assert np.isnan(store.query(granularity="H1")["WinRate"].iat[0])
+
+
+def test_append_to_existing_file(store: ResultsStore, tmp_path):
+    reopened = ResultsStore(str(tmp_path / "results.sqlite3"))
+    reopened.append(
+        pd.DataFrame(
+            [result_row("swing", "M5", [])], columns=TRADE_RESULT_ITEMS + FILTER_ELEMENTS
+        )
+    )
+
+    assert len(store.query(rule="swing")) == 2
+
+
+def test_index(tmp_path):
+    ResultsStore(str(tmp_path / "results.sqlite3"))
+
+    with closing(sqlite3.connect(str(tmp_path / "results.sqlite3"))) as connection:
+        plan: str = " ".join(
+            str(row)
+            for row in connection.execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM {} WHERE "Rule" = ? AND "Granularity" = ?'.format(
+                    TABLE_NAME
+                ),
+                ("scalping", "M5"),
+            )
+        )
+    assert "USING INDEX" in plan
@@ -2,10 +2,10 @@ import math
 
 import numpy as np
 import pandas as pd
+import pytest
 
 import src.lib.statistics_module as stat
-
-# import pytest
+from tools.fixtures import legacy_calc_profit, random_positions
 
 
 def test___calc_profit():
@@ -130,3 +130,24 @@ def test___hist_index_of():
     short_index = stat.__hist_index_of(positions, sign="short|buy_exit")
     expected_result = pd.Series([False, False, True, True, False, False])
     pd.testing.assert_series_equal(short_index, expected_result)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test___calc_profit_parity(seed: int):
+    positions_df: pd.DataFrame = random_positions(5000, seed)
+
+    result: pd.DataFrame = stat.__calc_profit(positions_df.copy())
+
+    expected: pd.DataFrame = legacy_calc_profit(positions_df.copy())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test___calc_positions():
+    positions_df: pd.DataFrame = random_positions(1000)
+    positions_df.loc[::7, "position"] = None
+
+    result: pd.DataFrame = stat.__calc_positions(positions_df)
+
+    assert len(result) == positions_df["position"].notnull().sum()
+    np.testing.assert_allclose(result["gross"], result["profit"].cumsum())
+    np.testing.assert_allclose(result["drawdown"], result["gross"] - result["gross"].cummax())
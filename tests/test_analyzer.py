@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 import pytest
 
-from src.analyzer import Analyzer
+from src.analyzer import Analyzer, required_columns, required_lookback, resolve_dependencies
 
 
 @pytest.fixture(name="analyzer", scope="module", autouse=True)
@@ -32,6 +32,21 @@ def test_calced_indicators_columns(analyzer, past_usd_candles):
     assert result.columns.intersection(expected).all()
 
 
+def test_get_indicators_without_copy(analyzer, past_usd_candles):
+    candles = pd.DataFrame.from_dict(past_usd_candles)
+    analyzer.calc_indicators(candles)
+    block = analyzer._Analyzer__block
+
+    result = analyzer.get_indicators(10, 30)
+
+    assert list(result.columns[[0, -4, -3]]) == ["time", "stoD_3", "stoSD_3"]
+    assert len(result) == 20 and result.index[0] == 10
+    assert (result.drop(columns="time").dtypes == np.float64).all()
+    for column in ("20SMA", "stoSD_3", "regist"):
+        assert np.shares_memory(result[column].to_numpy(), block)
+    pd.testing.assert_series_equal(result["time"], candles["time"][10:30])
+
+
 def test_get_long_indicators(analyzer, d1_stoc_dummy):
     d1_stoc_df = pd.DataFrame.from_dict(d1_stoc_dummy)
     candles = d1_stoc_df[["open", "high", "low", "close"]].copy()
@@ -43,19 +58,84 @@ def test_get_long_indicators(analyzer, d1_stoc_dummy):
     assert np.all(result["stoD_over_stoSD"] == d1_stoc_df["stoD_over_stoSD"])
 
 
-examples_for_parabo_touched = (
-    # INFO: touched
-    (True, 123.456, 100.000, 123.000, True),
-    (False, 123.456, 135.790, 100.000, True),
-    # INFO: not touched
-    (True, 123.456, 100.000, 123.457, False),
-    (False, 123.456, 123.455, 100.000, False),
-)
-
-
-@pytest.mark.parametrize(
-    "bull, current_parabo, current_h, current_l, expected", examples_for_parabo_touched
-)
-def test___parabolic_is_touched(bull, current_parabo, current_h, current_l, expected, analyzer):
-    result = analyzer._Analyzer__parabolic_is_touched(bull, current_parabo, current_h, current_l)
-    assert result == expected
+def test_intermediates_are_calculated_once(past_usd_candles):
+    candles = pd.DataFrame.from_dict(past_usd_candles)
+    candles["time"] = candles["time"].map(str)
+    analyzer = Analyzer()
+
+    with patch.object(
+        Analyzer, "_Analyzer__calc_stok", autospec=True, side_effect=Analyzer._Analyzer__calc_stok
+    ) as stok_mock, patch.object(
+        Analyzer,
+        "_Analyzer__calc_close_mean",
+        autospec=True,
+        side_effect=Analyzer._Analyzer__calc_close_mean,
+    ) as mean_mock:
+        analyzer.calc_indicators(candles, long_span_candles=candles.set_index("time"))
+
+    # INFO: once for candles, once for long_span_candles
+    assert stok_mock.call_count == 2
+    assert mean_mock.call_count == 2
+
+
+class TestResolveDependencies:
+    def test_order(self):
+        result = resolve_dependencies(Analyzer.INDICATOR_NAMES)
+
+        assert len(result) == len(set(result))
+        assert set(Analyzer.INDICATOR_NAMES) <= set(result)
+        assert result.index("low_min_5") < result.index("stoK") < result.index("stoD")
+        assert result.index("stoD") < result.index("stoSD")
+        assert result.index("close_std_20") < result.index("sigma*-2_band")
+
+    def test_only_necessary_intermediates(self):
+        result = resolve_dependencies(("stoSD", "10EMA"))
+
+        assert result == ["low_min_5", "high_max_5", "stoK", "stoD", "stoSD", "10EMA"]
+
+    def test_unknown_indicator(self):
+        with pytest.raises(ValueError):
+            resolve_dependencies(("20SMA", "unknown"))
+
+
+class TestRequiredCandles:
+    def test_columns(self):
+        assert required_columns(("20SMA",)) == ["close"]
+        assert required_columns(("stoSD",)) == ["high", "low", "close"]
+        assert required_columns(Analyzer.INDICATOR_NAMES) == ["high", "low", "close"]
+
+    def test_lookback(self):
+        assert required_lookback(("20SMA",)) == 19
+        # INFO: low_min_5 (4) -> stoD (2) -> stoSD (2)
+        assert required_lookback(("stoSD", "20SMA")) == 19
+        assert required_lookback(("stoSD",)) == 8
+        assert required_lookback(("60EMA",)) == 60
+        assert required_lookback(Analyzer.INDICATOR_NAMES) == required_lookback(("SAR",))
+
+    @pytest.mark.parametrize("names", (("20SMA", "sigma*2_band"), ("stoSD",), ("SAR",)))
+    def test_same_values_after_lookback(self, past_usd_candles, names):
+        candles = pd.DataFrame.from_dict(past_usd_candles)
+        candles["time"] = candles["time"].map(str)
+        lookback: int = required_lookback(names)
+        whole, partial = Analyzer(names), Analyzer(names)
+        whole.calc_indicators(candles)
+        partial.calc_indicators(candles.iloc[-lookback - 10 :].reset_index(drop=True))
+
+        expected = whole.get_indicators().tail(10).reset_index(drop=True)
+        result = partial.get_indicators().tail(10).reset_index(drop=True)
+        pd.testing.assert_frame_equal(result, expected, rtol=1e-3)
+
+    @pytest.mark.parametrize("name, span", (("10EMA", 10), ("60EMA", 60)))
+    def test_ema_within_ignored_weight(self, past_usd_candles, name, span):
+        candles = pd.DataFrame.from_dict(past_usd_candles)
+        candles["time"] = candles["time"].map(str)
+        lookback: int = required_lookback((name,))
+        whole, partial = Analyzer((name,)), Analyzer((name,))
+        whole.calc_indicators(candles)
+        partial.calc_indicators(candles.iloc[-lookback - 10 :].reset_index(drop=True))
+
+        expected = whole.get_indicators()[name].tail(10).to_numpy()
+        result = partial.get_indicators()[name].tail(10).to_numpy()
+        ignored_weight: float = (1 - 2 / (span + 1)) ** span
+        price_range: float = candles["close"].max() - candles["close"].min()
+        assert np.all(np.abs(result - expected) <= ignored_weight * price_range)
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.candle_cache import CandleCache
+
+
+@pytest.fixture(name="sample_candles", scope="module")
+def fixture_sample_candles() -> pd.DataFrame:
+    """The same columns as the candles of OandaInterface"""
+    candles: pd.DataFrame = pd.read_csv("tests/fixtures/sample_candles.csv")
+    candles = candles.assign(volume=np.arange(len(candles)) * 10, complete=True)
+    return candles[["open", "high", "low", "close", "volume", "complete", "time"]]
+
+
+@pytest.fixture(name="cache")
+def fixture_cache(tmp_path) -> CandleCache:
+    yield CandleCache("USD_JPY", "H1", cache_dir=str(tmp_path))
+
+
+def test_empty_cache(cache: CandleCache):
+    assert cache.covered_since is None
+    assert cache.latest_time() is None
+    assert len(cache.load()) == 0
+
+
+def test_write_and_load(cache: CandleCache, sample_candles: pd.DataFrame):
+    cache.write(sample_candles, covered_since=datetime(2020, 7, 1))
+
+    pd.testing.assert_frame_equal(cache.load(), sample_candles)
+    assert cache.covered_since == datetime(2020, 7, 1)
+    assert cache.latest_time() == datetime(2020, 7, 24, 20)
+
+    since = datetime(2020, 7, 20, 12)
+    expected = sample_candles[sample_candles["time"] >= "2020-07-20 12:00:00"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(cache.load(since=since), expected)
+
+
+def test_append_only_newer_complete_candles(cache: CandleCache, sample_candles: pd.DataFrame):
+    cache.write(sample_candles.iloc[:100], covered_since=datetime(2020, 7, 1))
+    # INFO: the latest candle is incomplete
+    new_candles = sample_candles.iloc[50:].assign(complete=True)
+    new_candles.iloc[-1, new_candles.columns.get_loc("complete")] = False
+
+    appended: int = cache.append(new_candles)
+
+    assert appended == len(sample_candles) - 101
+    pd.testing.assert_frame_equal(cache.load(), sample_candles.iloc[:-1])
+
+
+def test_append_without_volume_and_complete(cache: CandleCache, sample_candles: pd.DataFrame):
+    cache.write(sample_candles[["open", "high", "low", "close", "time"]], datetime(2020, 7, 1))
+
+    expected = sample_candles.assign(volume=0)
+    pd.testing.assert_frame_equal(cache.load(), expected)
+
+
+def test_cache_of_other_columns_is_replaced(cache: CandleCache, sample_candles, tmp_path):
+    cache.write(sample_candles, covered_since=datetime(2020, 7, 1))
+    # INFO: the cache written before volume and complete were stored
+    meta_path = tmp_path / "USD_JPY_H1" / "meta.json"
+    meta_path.write_text('{"covered_since": 1593561600}')
+
+    assert cache.covered_since is None
+    cache.write(sample_candles.iloc[:10], covered_since=datetime(2020, 7, 1))
+    pd.testing.assert_frame_equal(cache.load(), sample_candles.iloc[:10])
+    assert cache.covered_since == datetime(2020, 7, 1)
+
+
+def test_reopen(cache: CandleCache, sample_candles: pd.DataFrame, tmp_path):
+    cache.write(sample_candles, covered_since=datetime(2020, 7, 1))
+
+    reopened = CandleCache("USD_JPY", "H1", cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(reopened.load(), sample_candles)
+    assert len(CandleCache("USD_JPY", "M5", cache_dir=str(tmp_path)).load()) == 0
+
+
+def test_read_through_memory_map(cache: CandleCache, sample_candles: pd.DataFrame):
+    cache.write(sample_candles, covered_since=datetime(2020, 7, 1))
+
+    times: np.ndarray = cache._CandleCache__read_column("time")
+    assert isinstance(times, np.memmap)
+    assert times.dtype == np.int64
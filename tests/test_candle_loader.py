@@ -1,11 +1,13 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict
 from unittest.mock import patch
 
+import numpy as np
 from oanda_accessor_pyv20 import OandaInterface
 import pandas as pd
 import pytest
 
+from src.candle_cache import CandleCache
 from src.candle_loader import CandleLoader
 from src.candle_storage import FXBase
 
@@ -78,6 +80,49 @@ class TestRun:
         )
 
 
+class TestLoadCandlesByDaysWithCache:
+    @pytest.fixture(name="recent_candles")
+    def fixture_recent_candles(self) -> pd.DataFrame:
+        latest: datetime = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        times = pd.date_range(end=latest, periods=48, freq="H").astype(str)
+        candles: pd.DataFrame = pd.read_csv("tests/fixtures/sample_candles.csv").iloc[-48:]
+        candles = candles.assign(volume=np.arange(48), complete=True)
+        candles = candles[["open", "high", "low", "close", "volume", "complete"]].assign(time=times)
+        candles = candles.reset_index(drop=True)
+        candles.loc[47, "complete"] = False
+        return candles
+
+    def test_request_only_missing_tail(self, loader_instance, recent_candles, tmp_path):
+        loader_instance.config.set_entry_rules("granularity", "H1")
+        loader_instance.days = 10
+
+        with patch(
+            "src.candle_loader.CandleCache",
+            side_effect=lambda *args: CandleCache(*args, cache_dir=str(tmp_path)),
+        ), patch.object(
+            loader_instance.interface,
+            "load_candles_by_days",
+            return_value={"candles": recent_candles.iloc[:40].copy()},
+        ) as days_mock, patch.object(
+            loader_instance.interface,
+            "load_candles_by_duration",
+            return_value={"candles": recent_candles.iloc[38:].copy()},
+        ) as duration_mock:
+            first: pd.DataFrame = loader_instance._CandleLoader__load_candles_by_days_with_cache()
+            second: pd.DataFrame = loader_instance._CandleLoader__load_candles_by_days_with_cache()
+
+        # INFO: the same columns as the ones of requests
+        pd.testing.assert_frame_equal(first, recent_candles.iloc[:40])
+        # INFO: the incomplete latest candle is returned, but isn't cached
+        pd.testing.assert_frame_equal(second, recent_candles)
+        assert days_mock.call_count == 1
+        assert duration_mock.call_count == 1
+        missing_start: datetime = duration_mock.call_args.args[0]
+        assert missing_start == datetime.fromisoformat(recent_candles["time"].iat[39]) + timedelta(
+            seconds=1
+        )
+
+
 class TestSelectNeedRequest:
     def test_operation_live(self, loader_instance):
         result: bool = loader_instance._CandleLoader__select_need_request(operation="live")
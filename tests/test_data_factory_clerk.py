@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+
+from src.analyzer import Analyzer
+from src.candle_storage import FXBase
+from src.data_factory_clerk import _calc_long_indicators, prepare_indicators
+from src.indicator_state import IndicatorState
+import src.warm_cache as warm_cache
+from tools.fixtures import random_walk_candles
+
+WINDOW = 70
+STATE_KEY = ("USD_JPY", "M5")
+
+
+@pytest.fixture(name="long_span_candles")
+def fixture_long_span_candles() -> pd.DataFrame:
+    long_span_candles: pd.DataFrame = pd.read_csv("tests/fixtures/sample_candles_h4.csv")
+    long_span_candles["time"] = pd.to_datetime(long_span_candles["time"])
+    return long_span_candles.set_index("time")
+
+
+def live_candles(size: int) -> pd.DataFrame:
+    candles: pd.DataFrame = random_walk_candles(size)
+    candles["time"] = (
+        pd.date_range("2021-01-04 00:00:00", periods=size, freq="5min")
+        .strftime("%Y-%m-%d %H:%M:%S")
+        .tolist()
+    )
+    return candles
+
+
+def prepare(candles: pd.DataFrame, long_span_candles: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    FXBase.set_candles(candles.reset_index(drop=True))
+    FXBase.set_long_span_candles(long_span_candles)
+    return prepare_indicators(**kwargs)
+
+
+def test_prepare_indicators_with_state(long_span_candles):
+    candles: pd.DataFrame = live_candles(WINDOW + 10)
+    tail: int = IndicatorState.TAIL_LENGTH
+
+    for end in range(WINDOW, len(candles) + 1):
+        for price in ["open", "close"]:
+            # INFO: the latest candle patched with the current price, and then completed
+            window: pd.DataFrame = candles.iloc[end - WINDOW : end].copy()
+            window.iloc[-1, window.columns.get_loc("close")] = window[price].iat[-1]
+            expected: pd.DataFrame = prepare(window, long_span_candles)
+            expected_candles: pd.DataFrame = FXBase.get_candles()
+
+            result: pd.DataFrame = prepare(window, long_span_candles, state_key=STATE_KEY)
+
+            pd.testing.assert_frame_equal(
+                result.iloc[-tail:], expected.iloc[-tail:], check_dtype=False, rtol=1e-9
+            )
+            pd.testing.assert_frame_equal(FXBase.get_candles(), expected_candles)
+
+    stats = warm_cache.INDICATOR_STATES.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == (len(candles) - WINDOW + 1) * 2 - 1
+
+
+def test_prepare_indicators_rebuilds_discontinued_state(long_span_candles):
+    candles: pd.DataFrame = live_candles(WINDOW * 3)
+    prepare(candles.iloc[:WINDOW], long_span_candles, state_key=STATE_KEY)
+
+    window: pd.DataFrame = candles.iloc[WINDOW * 2 :]
+    result: pd.DataFrame = prepare(window, long_span_candles, state_key=STATE_KEY)
+
+    expected: pd.DataFrame = prepare(window, long_span_candles)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_long_indicators_of_the_latest_candle(long_span_candles):
+    candles: pd.DataFrame = live_candles(WINDOW)
+    for close in (100.0, 150.0):
+        moved_candles: pd.DataFrame = long_span_candles.copy()
+        moved_candles.iloc[-1, moved_candles.columns.get_loc("close")] = close
+
+        result: pd.DataFrame = _calc_long_indicators(candles, moved_candles)
+
+        analyzer = Analyzer()
+        analyzer.calc_indicators(candles, long_span_candles=moved_candles, stoc_only=True)
+        expected: pd.DataFrame = analyzer.get_long_indicators()
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-9)
+    assert warm_cache.LONG_INDICATORS.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "entries": 1,
+    }
@@ -0,0 +1,210 @@
+import copy
+import os
+from multiprocessing.shared_memory import SharedMemory
+from typing import List
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.alpha_trader import AlphaTrader
+import src.grid_runner as grid_runner
+from src.lib.results_store import ResultsStore
+import src.lib.statistics_module as statistics
+from src.swing_trader import SwingTrader
+from src.trader_config import FILTER_BITS
+from tools.trade_lab import (
+    create_trader_instance,
+    verify_various_entry_filters,
+    verify_various_stoploss,
+)
+
+
+@pytest.fixture(name="alpha_trader_instance", scope="function")
+def fixture_alpha_trader_instance(set_envs, patch_is_tradeable) -> AlphaTrader:
+    set_envs
+
+    with patch(
+        "src.lib.instance_builder.CandleLoader._CandleLoader__select_need_request",
+        return_value=False,
+    ):
+        _trader, _ = create_trader_instance(AlphaTrader, operation="unittest", days=60)
+    yield _trader
+    _trader._oanda_interface._OandaInterface__oanda_client._OandaClient__api_client.client.close()
+
+
+def test_build_grid():
+    grid: List[grid_runner.GridConfig] = grid_runner.build_grid(
+        "scalping", [["stoc_allows"], []], [0.05, 0.1], [0.0]
+    )
+
+    assert len(grid) == 4
+    assert grid[1] == grid_runner.GridConfig("scalping", ("stoc_allows",), 0.1, 0.0)
+    with pytest.raises(AttributeError):
+        grid[0].spread = 1.0
+
+
+def test_run_grid(alpha_trader_instance: AlphaTrader):
+    grid: List[grid_runner.GridConfig] = grid_runner.build_grid(
+        "scalping",
+        [["in_the_band", "stoc_allows", "band_expansion"], ["stoc_allows"]],
+        [0.05, 0.1],
+        [0.0, 0.004],
+    )
+
+    result: pd.DataFrame = grid_runner.run_grid(alpha_trader_instance, grid, max_workers=2)
+
+    expected_rows: List[pd.DataFrame] = []
+    for grid_config in grid:
+        config = alpha_trader_instance.config
+        config.set_entry_rules("static_spread", grid_config.spread)
+        config.set_entry_rules("entry_filters", list(grid_config.entry_filters))
+        config.set_entry_rules("stoploss_buffer_pips", grid_config.stoploss_buffer)
+        candles, indicators = alpha_trader_instance.prepare_signs("scalping")
+        backtest_result = alpha_trader_instance.backtest_with_signs("scalping", candles, indicators)
+        df_positions = backtest_result["candles"].reindex(columns=grid_runner.POSITIONS_COLUMNS)
+        expected_rows.append(statistics.summarize_backtest_result("scalping", df_positions, config))
+    expected: pd.DataFrame = pd.concat(expected_rows, ignore_index=True)
+
+    pd.testing.assert_frame_equal(result.drop(columns="DoneTime"), expected.drop(columns="DoneTime"))
+    assert result["Spread"].tolist() == [0.0] * 4 + [0.004] * 4
+
+
+def test_run_grid_writes_no_dump(alpha_trader_instance: AlphaTrader, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("tmp/csvs")
+    grid = grid_runner.build_grid("scalping", [["stoc_allows"]], [0.05, 0.1], [0.0])
+
+    grid_runner.run_grid(alpha_trader_instance, grid, max_workers=2)
+
+    assert "scalping_data_dump.csv" not in os.listdir("tmp/csvs")
+
+
+def test_run_grid_keeps_config(alpha_trader_instance: AlphaTrader, tmp_path):
+    original_rules = copy.deepcopy(alpha_trader_instance.config._entry_rules)
+    grid = grid_runner.build_grid("scalping", [["stoc_allows"]], [0.05, 0.1], [0.004])
+    store = ResultsStore(str(tmp_path / "results.sqlite3"))
+
+    grid_runner.run_grid(alpha_trader_instance, grid, max_workers=1, store=store)
+
+    assert alpha_trader_instance.config._entry_rules == original_rules
+    assert store.query(rule="scalping", entry_filters=["stoc_allows"])["StoplossBuf"].tolist() == [
+        0.05,
+        0.1,
+    ]
+
+
+def test_run_empty_grid(alpha_trader_instance: AlphaTrader):
+    result: pd.DataFrame = grid_runner.run_grid(alpha_trader_instance, [])
+
+    assert result.empty
+    assert list(result.columns[:2]) == ["DoneTime", "Rule"]
+
+
+def test_verify_various_stoploss(alpha_trader_instance: AlphaTrader, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = alpha_trader_instance.config
+
+    result: pd.DataFrame = verify_various_stoploss(
+        alpha_trader_instance, config, rule="scalping", entry_filters=["stoc_allows"]
+    )
+
+    stoploss_buffers: List[float] = result["StoplossBuf"].tolist()
+    assert stoploss_buffers == [0.01, 0.03, 0.05, 0.07, 0.09, 0.11, 0.13, 0.15, 0.17, 0.19]
+    assert ResultsStore().query(rule="scalping")["StoplossBuf"].tolist() == stoploss_buffers
+    assert os.listdir("tmp") == ["verify_results.sqlite3"]
+
+
+def test_verify_various_entry_filters(alpha_trader_instance: AlphaTrader, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    with patch(
+        "tools.trade_lab.generate_different_length_combinations",
+        return_value=[["stoc_allows"], []],
+    ), patch.object(
+        ResultsStore, "append", autospec=True, side_effect=ResultsStore.append
+    ) as mock:
+        result: pd.DataFrame = verify_various_entry_filters(
+            alpha_trader_instance, alpha_trader_instance.config, rule="scalping"
+        )
+
+    # INFO: the whole sweep is appended at once
+    mock.assert_called_once()
+    assert len(result) == 20
+    assert result["stoc_allows"].tolist() == [True] * 10 + [False] * 10
+    assert len(ResultsStore().query(rule="scalping")) == 20
+
+
+class TestSharedFrame:
+    @pytest.fixture(name="frame", scope="class")
+    def fixture_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "time": ["2020-01-01 00:00:00", "2020-01-01 00:10:00", "2020-01-01 00:20:00"],
+                "close": [100.0, 100.5, np.nan],
+                "trend": ["bull", None, "bear"],
+                "entryable": [True, False, True],
+                "count": np.array([1, 2, 3], dtype=np.int8),
+            },
+            index=[5, 6, 7],
+        )
+
+    def test_attach(self, frame: pd.DataFrame):
+        shared_frame = grid_runner._SharedFrame(frame)
+        try:
+            memory, result = grid_runner._attach_frame(shared_frame.handle)
+            pd.testing.assert_frame_equal(result, frame)
+            for column in ("close", "entryable", "count"):
+                view = result[column].to_numpy()
+                assert view.base is not None and np.shares_memory(view, np.asarray(memory.buf))
+            assert list(shared_frame.handle["objects"].columns) == ["time", "trend"]
+
+            del view, result
+            memory.close()
+        finally:
+            shared_frame.release()
+
+    def test_release(self, frame: pd.DataFrame):
+        shared_frame = grid_runner._SharedFrame(frame)
+        memory_name: str = shared_frame.handle["memory_name"]
+
+        shared_frame.release()
+
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=memory_name)
+
+
+@pytest.fixture(name="swing_trader_instance", scope="function")
+def fixture_swing_trader_instance(set_envs, patch_is_tradeable) -> SwingTrader:
+    set_envs
+
+    with patch(
+        "src.lib.instance_builder.CandleLoader._CandleLoader__select_need_request",
+        return_value=False,
+    ):
+        _trader, _ = create_trader_instance(SwingTrader, operation="unittest", days=60)
+    yield _trader
+    _trader._oanda_interface._OandaInterface__oanda_client._OandaClient__api_client.client.close()
+
+
+def test_run_grid_without_entries(swing_trader_instance: SwingTrader):
+    prepare_signs = swing_trader_instance.prepare_signs
+
+    def prepare_signs_never_allowed_by_stoc(rule: str):
+        candles, indicators = prepare_signs(rule)
+        candles["filter_mask"] &= ~np.uint8(FILTER_BITS["stoc_allows"])
+        return candles, indicators
+
+    # INFO: SwingTrader.backtest returns {"result": "no position"} with ["stoc_allows"]
+    grid = grid_runner.build_grid("swing", [["stoc_allows"], []], [0.05], [0.0])
+    with patch.object(
+        SwingTrader, "prepare_signs", side_effect=prepare_signs_never_allowed_by_stoc
+    ):
+        result: pd.DataFrame = grid_runner.run_grid(swing_trader_instance, grid, max_workers=1)
+
+    assert len(result) == 2
+    assert result["EntryCnt"].iat[0] == 0
+    assert result["WinRate"].iat[0] == "-"
+    assert result["EntryCnt"].iat[1] > 0
+    assert result["stoc_allows"].tolist() == [True, False]
@@ -8,6 +8,11 @@ from pandas.testing import assert_frame_equal, assert_series_equal
 import pytest
 
 import src.history_visualizer as libra
+from tools.fixtures import (
+    legacy_adjust_time_for_merging,
+    oanda_h4_candles,
+    random_transactions,
+)
 
 
 #  - - - - - - - - - - - - - -
@@ -141,6 +146,37 @@ class TestPrepareCandles:
             granularity=granularity,
         )
 
+    def test_lookback_of_requested_indicators(self):
+        """
+        Case3
+            Only 20SMA is requested, which needs 19 candles before from
+        """
+        with patch(
+            "src.history_visualizer.select_instrument",
+            return_value={"name": "USD_JPY", "spread": 0.0},
+        ):
+            client = libra.Visualizer(
+                "2020-01-06T12:34:56.000Z", "2020-01-08T00:00:00.000Z", indicator_names=("20SMA",)
+            )
+        times = pd.date_range("2020-01-01 09:00:00", "2020-01-08 00:00:00", freq="H")
+        candles = pd.DataFrame(
+            {
+                "close": np.arange(len(times), dtype=float),
+                "time": times.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+
+        with patch(
+            "src.candle_loader.CandleLoader.load_candles_by_duration_for_hist",
+            return_value=candles,
+        ) as mock:
+            result: pd.DataFrame = client._Visualizer__prepare_candles(granularity="H1")
+
+        assert mock.call_args.kwargs["start"] == pd.Timestamp("2020-01-05 17:34:56")
+        # INFO: 19 candles before the one including from (12:00)
+        assert result["time"].iat[0] == "2020-01-05 17:00:00"
+        assert result["time"].iat[-1] == "2020-01-08 00:00:00"
+
 
 def test___adjust_time_for_merging(libra_client, win_sum_candles, hist_df):
     # instrument = 'USD_JPY'
@@ -189,6 +225,41 @@ def test___adjust_time_for_merging(libra_client, win_sum_candles, hist_df):
     assert_frame_equal(result, expected)
 
 
+@pytest.mark.parametrize("granularity", ["H1", "H4"])
+def test___adjust_time_for_merging_parity(libra_client, granularity):
+    # INFO: from winter to winter, with 4 switches of daylight saving time
+    candles: pd.DataFrame = oanda_h4_candles("2019-01-07 17:00", periods=6 * 420)
+    transactions: pd.DataFrame = random_transactions(candles, size=3000)
+
+    result = libra_client._Visualizer__adjust_time_for_merging(
+        candles.copy(), transactions.copy(), granularity
+    )
+    expected = legacy_adjust_time_for_merging(candles.copy(), transactions.copy(), granularity)
+    assert_frame_equal(result, expected)
+
+
+def test___adjust_time_for_merging_before_first_switch(libra_client, win_sum_candles):
+    """The rows before the first switch keep dst, and times just on a switch are winter"""
+    history_df = pd.DataFrame(
+        {
+            "time": ["2020-02-17 05:12:00", "2020-03-12T17:00:00", "2020-03-13T01:14:00.0Z"],
+            "dst": [None, None, None],
+        }
+    )
+    result = libra_client._Visualizer__adjust_time_for_merging(
+        win_sum_candles.copy(), history_df.copy(), granularity="H4"
+    )
+    expected = legacy_adjust_time_for_merging(
+        win_sum_candles.copy(), history_df.copy(), granularity="H4"
+    )
+    assert_frame_equal(result, expected)
+    assert result["time"].tolist() == [
+        "2020-02-17 04:00:00",
+        "2020-03-12 16:00:00",
+        "2020-03-13 01:00:00",
+    ]
+
+
 def test___detect_dst_switches(libra_client, win_sum_candles, win_sum_win_candles):
     switch_points = libra_client._Visualizer__detect_dst_switches(win_sum_candles)
     expected = [
@@ -0,0 +1,93 @@
+import json
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analyzer import Analyzer
+from src.indicator_state import IndicatorState
+from tools.fixtures import random_walk_candles
+
+WINDOW = 70
+
+
+def timed_candles(size: int, seed: int = 0) -> pd.DataFrame:
+    candles: pd.DataFrame = random_walk_candles(size, seed=seed)
+    candles["time"] = (
+        pd.date_range("2021-01-04 00:00:00", periods=size, freq="5min")
+        .strftime("%Y-%m-%d %H:%M:%S")
+        .tolist()
+    )
+    return candles
+
+
+def full_indicators(candles: pd.DataFrame) -> pd.DataFrame:
+    analyzer = Analyzer()
+    analyzer.calc_indicators(candles.reset_index(drop=True))
+    return analyzer.get_indicators()
+
+
+def patched(candle: Dict[str, Any], price: float) -> Dict[str, Any]:
+    """The latest candle patched with the current price (like CandleLoader)"""
+    return {
+        **candle,
+        "high": max(candle["high"], price),
+        "low": min(candle["low"], price),
+        "close": price,
+    }
+
+
+def test_from_candles_is_same_as_analyzer():
+    candles: pd.DataFrame = timed_candles(WINDOW)
+
+    result: pd.DataFrame = IndicatorState.from_candles(candles).get_indicators()
+
+    pd.testing.assert_frame_equal(result, full_indicators(candles), check_dtype=False)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_tail_rows_follow_full_recalculation(seed):
+    candles: pd.DataFrame = timed_candles(WINDOW + 60, seed=seed)
+    records = candles.to_dict("records")
+    state = IndicatorState.from_candles(candles.iloc[:WINDOW])
+
+    for end in range(WINDOW + 1, len(candles) + 1):
+        # INFO: the same candle arrives patched first, and completed on the next invocation
+        state.update(patched(records[end - 1], records[end - 1]["open"]))
+        state = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+        state.update(records[end - 1])
+
+        tail: int = IndicatorState.TAIL_LENGTH
+        np.testing.assert_allclose(
+            state.get_indicators().iloc[-tail:, 1:].to_numpy(dtype=np.float64),
+            full_indicators(candles.iloc[end - WINDOW : end]).iloc[-tail:, 1:].to_numpy(
+                dtype=np.float64
+            ),
+            rtol=1e-9,
+        )
+
+
+def test_sync_to_continued_candles():
+    candles: pd.DataFrame = timed_candles(WINDOW + 5)
+    state = IndicatorState.from_candles(candles.iloc[:WINDOW])
+
+    assert state.sync(candles.iloc[3 : WINDOW + 3])
+    assert state.get_indicators()["time"].iat[-1] == candles["time"].iat[WINDOW + 2]
+    assert state.get_indicators()["time"].iat[0] == candles["time"].iat[3]
+
+
+def test_sync_to_discontinued_candles():
+    candles: pd.DataFrame = timed_candles(WINDOW * 3)
+    state = IndicatorState.from_candles(candles.iloc[:WINDOW])
+
+    assert not state.sync(candles.iloc[WINDOW * 2 :])
+    assert not state.sync(candles.iloc[: WINDOW - 1])
+
+
+def test_update_of_older_candle():
+    candles: pd.DataFrame = timed_candles(WINDOW)
+    state = IndicatorState.from_candles(candles)
+
+    with pytest.raises(ValueError):
+        state.update(candles.iloc[-2].to_dict())
@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.live_cycle import PrefetchedInterface, live_reads
+from src.real_trader import RealTrader
+import src.warm_cache as warm_cache
+from tools.trade_lab import create_trader_instance
+
+# INFO: the latency of each request to the stub
+LATENCY_SEC: float = 0.2
+
+
+class StubOandaInterface:
+    """OandaInterface answering after LATENCY_SEC, which records the calls"""
+
+    def __init__(self) -> None:
+        self.calls: List[Tuple[str, Tuple[Any, ...], str]] = []
+        self.orders: List[str] = []
+        self.__lock = threading.Lock()
+
+    def __record(self, name: str, *args: Any) -> None:
+        with self.__lock:
+            self.calls.append((name, args, threading.current_thread().name))
+        time.sleep(LATENCY_SEC)
+
+    def call_oanda(self, method_type: str, **kwargs: Any) -> Any:
+        self.__record("call_oanda", method_type)
+        if method_type == "is_tradeable":
+            return {"tradeable": True}
+        if method_type == "current_price":
+            return pd.read_csv("tests/fixtures/sample_candles.csv").iloc[-1].to_dict()
+        if method_type == "open_trades":
+            return {"response": {}, "positions": []}
+        if method_type == "transactions":
+            return pd.DataFrame({"pl": [], "time": []})
+        raise ValueError(method_type)
+
+    def load_specify_length_candles(self, length: int = 60, granularity: str = "M5") -> Dict:
+        self.__record("load_specify_length_candles", length, granularity)
+        candles = pd.read_csv("tests/fixtures/sample_candles.csv").tail(length)
+        return {"candles": candles.reset_index(drop=True)}
+
+    def load_candles_by_days(self, days: int = 0, granularity: str = "M5") -> Dict:
+        self.__record("load_candles_by_days", days, granularity)
+        return {"candles": pd.read_csv("tests/fixtures/sample_candles_h4.csv")}
+
+    def order_oanda(self, method_type: str, **kwargs: Any) -> dict:
+        self.__record("order_oanda", method_type)
+        self.orders.append(method_type)
+        return {"response": {}, "message": method_type, "reason": ""}
+
+
+@pytest.fixture(name="stub", scope="function")
+def fixture_stub() -> StubOandaInterface:
+    return StubOandaInterface()
+
+
+@pytest.fixture(name="reads", scope="function")
+def fixture_reads(config) -> list:
+    return live_reads(config, days=60, candles_length=70)
+
+
+def test_reads_are_concurrent(stub: StubOandaInterface, reads):
+    interface = PrefetchedInterface(stub, reads)
+    assert stub.calls == []
+
+    started_at: float = time.perf_counter()
+    results: List[Any] = [getattr(interface, name)(*args, **kwargs) for name, args, kwargs in reads]
+    elapsed: float = time.perf_counter() - started_at
+
+    assert elapsed < LATENCY_SEC * 2  # INFO: it is LATENCY_SEC * 4 if sequential
+    assert len(stub.calls) == len(reads)
+    assert results[2] == {"response": {}, "positions": []}
+    assert set(interface.read_seconds.keys()) == {
+        "load_specify_length_candles()",
+        "call_oanda(current_price)",
+        "load_candles_by_days()",
+        "call_oanda(open_trades)",
+    }
+
+    # INFO: prefetched results are used only once
+    interface.call_oanda("open_trades")
+    assert len(stub.calls) == len(reads) + 1
+
+
+def test_tradeable_and_transactions_are_not_prefetched(stub: StubOandaInterface, reads):
+    interface = PrefetchedInterface(stub, reads)
+
+    assert interface.call_oanda("is_tradeable") == {"tradeable": True}
+    # INFO: a cycle stopping here (the market is closed) requests nothing else
+    assert [name_and_args[:2] for name_and_args in stub.calls] == [
+        ("call_oanda", ("is_tradeable",))
+    ]
+
+    interface.call_oanda("transactions", count=100)
+    assert len(stub.calls) == 2
+    assert interface.read_seconds == {}
+
+
+def test_cached_long_span_requests_only_the_latest(config):
+    warm_cache.LONG_SPAN_CANDLES.put((config.get_instrument(), "D", 60), pd.DataFrame())
+
+    reads = live_reads(config, days=60, candles_length=70)
+
+    assert reads[-1] == ("load_specify_length_candles", (), {"length": 2, "granularity": "D"})
+    assert "load_candles_by_days" not in [name for name, _, _ in reads]
+
+
+def test_orders_are_not_prefetched(stub: StubOandaInterface, reads):
+    interface = PrefetchedInterface(stub, reads)
+
+    interface.order_oanda("entry")
+    interface.order_oanda("trail", trade_id="1", stoploss_price=100.0)
+    interface.order_oanda("exit", trade_id="1")
+
+    assert stub.orders == ["entry", "trail", "exit"]
+    order_threads = [thread for name, _, thread in stub.calls if name == "order_oanda"]
+    assert set(order_threads) == {threading.current_thread().name}
+    assert len(stub.calls) == 3  # INFO: orders don't start the reads
+
+
+def test_live_cycle(stub: StubOandaInterface):
+    with patch("src.lib.instance_builder.OandaInterface", return_value=stub), patch(
+        "tools.trade_lab.logic.is_reasonable", return_value=True
+    ), patch("src.clients.sns.publish"):
+        started_at: float = time.perf_counter()
+        trader, _ = create_trader_instance(RealTrader, operation="live", days=60)
+        trader.apply_trading_rule()
+        elapsed: float = time.perf_counter() - started_at
+
+    reads = [call for call in stub.calls if call[0] != "order_oanda"]
+    assert reads[0][:2] == ("call_oanda", ("is_tradeable",))
+    assert sorted((name, args) for name, args, _ in reads) == [
+        ("call_oanda", ("current_price",)),
+        ("call_oanda", ("is_tradeable",)),
+        ("call_oanda", ("open_trades",)),
+        ("call_oanda", ("transactions",)),
+        ("load_candles_by_days", (60, "D")),
+        ("load_specify_length_candles", (70, trader.config.get_entry_rules("granularity"))),
+    ]
+    # INFO: is_tradeable, the other reads at once, transactions, and orders
+    assert elapsed < LATENCY_SEC * (4 + len(stub.orders))
+
+
+def test_closed_market(stub: StubOandaInterface):
+    stub.call_oanda = lambda method_type, **kwargs: {"tradeable": False}  # type: ignore
+    with patch("src.lib.instance_builder.OandaInterface", return_value=stub):
+        trader, _ = create_trader_instance(RealTrader, operation="live", days=60)
+
+    assert trader is None
+    assert stub.calls == []  # INFO: nothing but is_tradeable (which isn't recorded here)
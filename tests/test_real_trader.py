@@ -107,7 +107,7 @@ class TestPlayScalpingTrade:
         return_value=[],
     )
     @patch(
-        "src.real_trader.scalping.repulsion_exist",
+        "src.real_trader.scalping.detect_latest_repulsion",
         return_value="long",
     )
     @patch(
@@ -117,7 +117,7 @@ class TestPlayScalpingTrade:
     def test_without_any_position_create_position(
         self,
         _patch_fetch_current_positions,
-        _patch_repulsion_exist,
+        _patch_detect_latest_repulsion,
         _patch_since_last_loss,
         real_trader_client,
         df_past_candles: pd.DataFrame,
@@ -203,7 +203,7 @@ class TestDriveEntryProcess:
             "src.real_trader.RealTrader._RealTrader__since_last_loss",
             return_value=two_hours_since_lastloss,
         ):
-            with patch("src.trade_rules.scalping.repulsion_exist", return_value=repulsion):
+            with patch("src.trade_rules.scalping.detect_latest_repulsion", return_value=repulsion):
                 result = real_trader_client._RealTrader__drive_entry_process(
                     tmp_dummy_allowed_candles,
                     tmp_dummy_allowed_candles.iloc[-1],
@@ -227,7 +227,7 @@ class TestDriveEntryProcess:
             return_value=two_hours_since_lastloss,
         ):
             repulsion = "long"
-            with patch("src.trade_rules.scalping.repulsion_exist", return_value=repulsion):
+            with patch("src.trade_rules.scalping.detect_latest_repulsion", return_value=repulsion):
                 with patch("src.real_trader.RealTrader._create_position") as mock:
                     last_indicators = indicators.iloc[-1]
                     result = real_trader_client._RealTrader__drive_entry_process(
@@ -278,6 +278,27 @@ def test__create_position_with_indicators(
     )
 
 
+@mock_sns
+def test__create_position_before_support_is_found(
+    real_trader_client,
+    dummy_market_order_response,
+):
+    last_indicators = {"support": np.nan, "regist": np.nan}
+
+    fixture_sns()
+    with patch("oandapyV20.endpoints.orders.OrderCreate") as mock:
+        with patch("oandapyV20.API.request", return_value=dummy_market_order_response):
+            real_trader_client._create_position(_previous_candle_dummy(), "long", last_indicators)
+
+    expected_stoploss = (
+        _previous_candle_dummy()["low"] - real_trader_client.config.stoploss_buffer_pips
+    )
+    mock.assert_called_with(
+        accountID=os.environ.get("OANDA_ACCOUNT_ID"),
+        data=_order_response_dummy("", expected_stoploss, real_trader_client.config.get_instrument()),
+    )
+
+
 class TestCreatePositionWithoutIndicators:
     @mock_sns
     def test_long(self, real_trader_client, dummy_market_order_response):
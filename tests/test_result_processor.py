@@ -1,11 +1,15 @@
+import os
 from typing import Dict, List, Union
 from unittest.mock import patch
 
+import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import pytest
 
-from src.result_processor import ResultProcessor
+from src.candle_storage import FXBase
+from src.result_processor import ChartSegment, ResultProcessor
+from tools.fixtures import chart_data
 
 
 @pytest.fixture(name="result_processor", scope="function")
@@ -144,7 +148,7 @@ class TestRun:
         }
 
         with patch(
-            "src.lib.statistics_module.__append_performance_result_to_csv", return_value=None
+            "src.lib.statistics_module.__append_performance_result", return_value=None
         ):
             result: pd.DataFrame = result_processor.run(
                 "scalping", backtest_result, pd.DataFrame({})
@@ -161,3 +165,58 @@ class TestWrangleResultForGraph:
             dummy_positions[["position", "possible_stoploss", "entry_price", "exitable_price"]]
         )["position"]
         pd.testing.assert_series_equal(result, pd.Series(expected_positions, name="position"))
+
+
+class TestDrawCharts:
+    SIZE: int = 450
+
+    @pytest.fixture(name="drawing_processor")
+    def fixture_drawing_processor(self, result_processor: ResultProcessor) -> ResultProcessor:
+        # INFO: the same as the answer 2 of "画像描画する？"
+        result_processor._ResultProcessor__static_options = {"figure_option": 2}
+        result_processor.reset_drawer()
+        return result_processor
+
+    @pytest.fixture(name="chart_data")
+    def fixture_chart_data(self) -> Dict[str, pd.DataFrame]:
+        return chart_data(self.SIZE)
+
+    def test_segments_have_only_their_slices(self, drawing_processor, chart_data):
+        segments: List[ChartSegment] = drawing_processor._ResultProcessor__split_into_segments(
+            chart_data["positions"], chart_data["indicators"]
+        )
+
+        assert [segment.index for segment in segments] == [0, 1, 2]
+        assert [len(segment.candles) for segment in segments] == [200, 200, 50]
+        assert [len(segment.indicators) for segment in segments] == [200, 200, 50]
+        # INFO: the latest segment comes first
+        assert segments[0].candles["time"].iat[-1] == FXBase.get_candles()["time"].iat[-1]
+        for segment in segments:
+            assert segment.candles_length == self.SIZE
+            assert segment.positions["sequence"].between(0, len(segment.candles) - 1).all()
+        assert segments[2].positions["position"].iat[30] == "long"
+
+    def test_parent_has_no_figure(self, drawing_processor, chart_data):
+        plt.close("all")
+        with patch.object(ResultProcessor, "MAX_DRAWING_WORKERS", 1), patch(
+            "src.drawer.FigureDrawer.create_png", return_value={"success": "drawn"}
+        ):
+            drawing_processor.reset_drawer()
+            drawing_processor._drive_drawing_charts(
+                df_positions=chart_data["positions"], indicators=chart_data["indicators"]
+            )
+        assert plt.get_fignums() == []
+
+    def test_draw_in_processes(self, drawing_processor, chart_data, tmp_path, monkeypatch, capsys):
+        monkeypatch.chdir(tmp_path)
+        os.makedirs("tmp/images")
+
+        with patch.object(ResultProcessor, "MAX_DRAWING_WORKERS", 2):
+            drawing_processor._drive_drawing_charts(
+                df_positions=chart_data["positions"], indicators=chart_data["indicators"]
+            )
+
+        pngs: List[str] = sorted(os.listdir("tmp/images"))
+        assert len(pngs) == 3
+        assert [png.split("_")[3] for png in pngs] == ["0", "1", "2"]
+        assert "3 charts are drawn in" in capsys.readouterr().out
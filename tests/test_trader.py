@@ -1,6 +1,7 @@
 from typing import List
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -53,6 +54,25 @@ class TestPerform:
         expected: pd.DataFrame = pd.read_json("tests/fixtures/alpha_perform_result.json")
         pd.testing.assert_frame_equal(expected, result)
 
+    def test_with_shared_signs(self, alpha_trader_instance: AlphaTrader):
+        filter_sets: List[List[str]] = [
+            ["in_the_band", "stoc_allows", "band_expansion"],
+            ["stoc_allows"],
+            ["in_the_band", "stoc_allows", "band_expansion"],
+        ]
+        candles, indicators = alpha_trader_instance.prepare_signs("scalping")
+        original_candles: pd.DataFrame = candles.copy()
+
+        for filters in filter_sets:
+            result: pd.DataFrame = alpha_trader_instance.perform_with_signs(
+                "scalping", candles, indicators, entry_filters=filters
+            )
+            expected: pd.DataFrame = alpha_trader_instance.perform("scalping", filters)
+            pd.testing.assert_frame_equal(expected, result)
+
+        # INFO: shared signs are not changed
+        pd.testing.assert_frame_equal(original_candles, candles)
+
 
 def test__accurize_entry_prices():
     pass
@@ -91,3 +111,15 @@ class TestMarkEntryableRows:
         )
 
         pd.testing.assert_series_equal(candles["entryable"], expected)
+
+    def test_with_filter_mask(self, alpha_trader_instance: AlphaTrader):
+        candles, _ = alpha_trader_instance.prepare_signs("scalping")
+        assert candles["filter_mask"].dtype == np.uint8
+
+        for filters in (["in_the_band", "stoc_allows", "band_expansion"], ["sma_follow_trend"], []):
+            alpha_trader_instance.config.set_entry_rules("entry_filters", filters)
+            result = alpha_trader_instance._mark_entryable_rows(candles.copy())
+            expected = alpha_trader_instance._mark_entryable_rows(
+                candles.drop(columns="filter_mask")
+            )
+            pd.testing.assert_series_equal(result["entryable"], expected["entryable"])
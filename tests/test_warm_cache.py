@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+from typing import List
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from src.analyzer import Analyzer
+from src.candle_loader import LIVE_CANDLES_LENGTH, CandleLoader, live_candles_length
+from src.candle_storage import FXBase
+from src.data_factory_clerk import prepare_indicators
+import src.warm_cache as warm_cache
+from src.warm_cache import TTLCache
+
+
+def recent_candles(length: int) -> pd.DataFrame:
+    """M5 candles whose latest bar is the current (incomplete) one"""
+    now: datetime = datetime.utcnow()
+    latest: datetime = now.replace(minute=now.minute - now.minute % 5, second=0, microsecond=0)
+    times: List[datetime] = [latest - timedelta(minutes=5 * i) for i in reversed(range(length))]
+    return pd.DataFrame(
+        {
+            "open": [100.0 + i for i in range(length)],
+            "high": [100.5 + i for i in range(length)],
+            "low": [99.5 + i for i in range(length)],
+            "close": [100.2 + i for i in range(length)],
+            "time": [time.strftime("%Y-%m-%d %H:%M:%S") for time in times],
+        }
+    )
+
+
+class TestTTLCache:
+    def test_hit_and_miss(self):
+        cache = TTLCache("dummy", ttl_sec=10)
+        assert cache.get("key") is None
+
+        cache.put("key", "value")
+        assert cache.get("key") == "value"
+        assert cache.peek("key") == "value"  # INFO: peek isn't counted
+        assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 1}
+
+    def test_expiration(self):
+        cache = TTLCache("dummy", ttl_sec=10)
+        with patch("src.warm_cache.time.monotonic", return_value=100.0):
+            cache.put("key", "value")
+            cache.put("short", "value", ttl_sec=1)
+        with patch("src.warm_cache.time.monotonic", return_value=105.0):
+            assert cache.get("key") == "value"
+            assert cache.get("short") is None
+        with patch("src.warm_cache.time.monotonic", return_value=110.0):
+            assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_eviction_of_least_recently_used(self):
+        cache = TTLCache("dummy", ttl_sec=10, max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.peek("b") is None
+        assert cache.peek("a") == 1 and cache.peek("c") == 3
+        assert cache.evictions == 1
+
+    def test_invalidate(self):
+        cache = TTLCache("dummy", ttl_sec=10)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.invalidate("a")
+        assert cache.peek("a") is None and cache.peek("b") == 2
+
+        cache.invalidate()
+        assert len(cache) == 0
+
+    def test_log_stats(self):
+        with patch("src.warm_cache.LOGGER.info") as mock:
+            warm_cache.log_stats()
+        assert set(mock.call_args.args[0]["[WarmCache]"].keys()) == {
+            cache.name for cache in warm_cache.CACHES
+        }
+
+
+class TestLiveCandles:
+    @pytest.fixture(name="loader")
+    def fixture_loader(self, config) -> CandleLoader:
+        config.operation = "live"
+        return CandleLoader(config, MagicMock(), days=60)
+
+    def test_warm_load_requests_only_new_bars(self, loader):
+        candles: pd.DataFrame = recent_candles(LIVE_CANDLES_LENGTH)
+        loader.interface.load_specify_length_candles.return_value = {"candles": candles}
+        cold: pd.DataFrame = loader._CandleLoader__load_live_candles()
+
+        assert loader.interface.load_specify_length_candles.call_args.kwargs["length"] == 70
+        pd.testing.assert_frame_equal(cold, candles)
+
+        # INFO: the latest bar has been updated, and no bar has been added since
+        length: int = live_candles_length(loader.config)
+        assert 1 <= length <= 3
+        updated: pd.DataFrame = candles.tail(length).copy()
+        updated.loc[updated.index[-1], "close"] = 999.0
+        loader.interface.load_specify_length_candles.return_value = {
+            "candles": updated.reset_index(drop=True)
+        }
+        warm: pd.DataFrame = loader._CandleLoader__load_live_candles()
+
+        assert loader.interface.load_specify_length_candles.call_args.kwargs["length"] == length
+        assert len(warm) == LIVE_CANDLES_LENGTH
+        assert warm["close"].iat[-1] == 999.0
+        pd.testing.assert_frame_equal(warm.iloc[:-1], candles.iloc[:-1])
+        assert warm_cache.CANDLES.stats()["hits"] == 1
+
+    def test_new_bar_drops_the_oldest(self, loader):
+        candles: pd.DataFrame = recent_candles(LIVE_CANDLES_LENGTH + 1)
+        loader.interface.load_specify_length_candles.return_value = {
+            "candles": candles.iloc[:-1].reset_index(drop=True)
+        }
+        loader._CandleLoader__load_live_candles()
+
+        loader.interface.load_specify_length_candles.return_value = {
+            "candles": candles.tail(2).reset_index(drop=True)
+        }
+        warm: pd.DataFrame = loader._CandleLoader__load_live_candles()
+
+        expected: pd.DataFrame = candles.tail(LIVE_CANDLES_LENGTH).reset_index(drop=True)
+        pd.testing.assert_frame_equal(warm, expected)
+
+    def test_stale_cache_requests_all(self, config):
+        stale: pd.DataFrame = pd.read_csv("tests/fixtures/sample_candles.csv")
+        warm_cache.CANDLES.put(
+            (config.get_instrument(), config.get_entry_rules("granularity")), stale
+        )
+        assert live_candles_length(config) == LIVE_CANDLES_LENGTH
+
+
+def test_long_span_candles_refresh_the_latest(config):
+    config.operation = "live"
+    loader = CandleLoader(config, MagicMock(), days=60)
+    daily: pd.DataFrame = pd.read_csv("tests/fixtures/sample_candles_h4.csv")
+    loader.interface.load_candles_by_days.return_value = {"candles": daily.copy()}
+    loader.load_long_span_candles()
+    cold: pd.DataFrame = FXBase.get_long_span_candles()
+
+    # INFO: the incomplete one has changed, and a new one has started
+    latest: pd.DataFrame = pd.concat([daily.tail(1), daily.tail(1)], ignore_index=True)
+    latest.loc[0, "close"] = 999.0
+    latest.loc[1, "time"] = "2099-01-01 00:00:00"
+    loader.interface.load_specify_length_candles.return_value = {"candles": latest}
+    loader.load_long_span_candles()
+    warm: pd.DataFrame = FXBase.get_long_span_candles()
+
+    loader.interface.load_candles_by_days.assert_called_once()
+    assert loader.interface.load_specify_length_candles.call_args.kwargs == {
+        "length": 2,
+        "granularity": "D",
+    }
+    assert len(warm) == len(cold)
+    assert warm["close"].iat[-2] == 999.0
+    assert str(warm.index[-1]) == "2099-01-01 00:00:00"
+    pd.testing.assert_frame_equal(warm.iloc[:-2], cold.iloc[1:-1])
+
+
+def test_long_indicators_are_reused():
+    candles: pd.DataFrame = pd.read_csv("tests/fixtures/sample_candles.csv")
+    long_span_candles: pd.DataFrame = pd.read_csv("tests/fixtures/sample_candles_h4.csv")
+    long_span_candles["time"] = pd.to_datetime(long_span_candles["time"])
+    long_span_candles.set_index("time", inplace=True)
+    # INFO: the latest candle is incomplete, and its price moves between the invocations
+    moved_candles: pd.DataFrame = long_span_candles.copy()
+    moved_candles.iloc[-1, moved_candles.columns.get_loc("close")] += 0.5
+
+    results: List[pd.DataFrame] = []
+    with patch.object(
+        Analyzer,
+        "_Analyzer__prepare_long_indicators",
+        autospec=True,
+        side_effect=Analyzer._Analyzer__prepare_long_indicators,
+    ) as mock:
+        for long_span in (long_span_candles, moved_candles):
+            FXBase.set_candles(candles.copy())
+            FXBase.set_long_span_candles(long_span)
+            prepare_indicators()
+            results.append(FXBase.get_candles())
+
+    # INFO: the complete candles are analyzed only once, and the latest one on each invocation
+    lengths: List[int] = [len(call.args[1]) for call in mock.call_args_list]
+    assert lengths.count(len(long_span_candles) - 1) == 1
+    assert len(lengths) == 3
+    assert warm_cache.LONG_INDICATORS.stats()["hits"] == 1
+    assert len(results[0]) == len(results[1])
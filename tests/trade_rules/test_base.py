@@ -2,7 +2,9 @@ import numpy as np
 import pandas as pd
 import pytest
 
+from src.lib.mathematics import generate_different_length_combinations
 import src.trade_rules.base as base
+from src.trader_config import FILTER_ELEMENTS
 
 
 @pytest.fixture(name="spread", scope="module")
@@ -99,3 +101,78 @@ def test_generate_stoc_allows_column():
 
     result = base.generate_stoc_allows_column(indicators, indicators["trend"])
     assert np.all(result == indicators["expected_result"])
+
+
+class TestVectorizedParity:
+    @pytest.fixture(name="random_indicators", scope="class")
+    def fixture_random_indicators(self) -> pd.DataFrame:
+        rng = np.random.default_rng(0)
+        size: int = 5000
+        indicators = pd.DataFrame(
+            {
+                "close": rng.choice([100.0, 100.1, 100.2], size),
+                "10EMA": rng.choice([100.0, 100.1, 100.2, np.nan], size),
+                "20SMA": rng.choice([100.0, 100.1, 100.2, np.nan], size),
+                "stoD_3": rng.choice([10.0, 20.0, 50.0, 80.0, 90.0, np.nan], size),
+                "stoSD_3": rng.choice([10.0, 20.0, 50.0, 80.0, 90.0, np.nan], size),
+            }
+        )
+        return indicators
+
+    def test_trend_codes(self, random_indicators: pd.DataFrame):
+        codes: np.ndarray = base.generate_trend_codes(
+            random_indicators, random_indicators["close"]
+        )
+
+        expected = [
+            base.identify_trend_type(row["close"], row["20SMA"], row["10EMA"])
+            for row in random_indicators.to_dict("records")
+        ]
+        assert codes.dtype == np.int8
+        assert base.decode_trend_codes(codes).tolist() == expected
+        np.testing.assert_array_equal(base.encode_trend_labels(expected), codes)
+
+    def test_stoc_allows_mask(self, random_indicators: pd.DataFrame):
+        codes: np.ndarray = base.generate_trend_codes(
+            random_indicators, random_indicators["close"]
+        )
+        trends: np.ndarray = base.decode_trend_codes(codes)
+
+        result: np.ndarray = base.generate_stoc_allows_mask(random_indicators, codes)
+
+        expected = [
+            base.stoc_allows_entry(row["stoD_3"], row["stoSD_3"], trend)
+            for row, trend in zip(random_indicators.to_dict("records"), trends)
+        ]
+        assert result.dtype == bool
+        assert result.tolist() == expected
+
+
+class TestFilterMask:
+    @pytest.fixture(name="random_filters", scope="class")
+    def fixture_random_filters(self) -> pd.DataFrame:
+        rng = np.random.default_rng(0)
+        size: int = 1000
+        filters = pd.DataFrame({name: rng.choice([True, False], size) for name in FILTER_ELEMENTS})
+        # INFO: an object column including missing values
+        filters["in_the_band"] = rng.choice(np.array([True, False, None, np.nan], dtype=object), size)
+        return filters
+
+    def test_all_combinations(self, random_filters: pd.DataFrame):
+        mask: np.ndarray = base.pack_filter_mask(random_filters)
+        assert mask.dtype == np.uint8
+
+        filter_sets = list(generate_different_length_combinations(items=FILTER_ELEMENTS))
+        assert len(filter_sets) == 2 ** len(FILTER_ELEMENTS)
+        for filters in filter_sets:
+            expected: np.ndarray = np.all(random_filters[list(filters)], axis=1).to_numpy()
+            result: np.ndarray = base.filter_mask_allows(mask, filters)
+            np.testing.assert_array_equal(result, expected)
+
+    def test_pack_only_given_filters(self, random_filters: pd.DataFrame):
+        filters = ["stoc_allows", "band_expansion"]
+        mask: np.ndarray = base.pack_filter_mask(random_filters[filters], filters)
+
+        expected: np.ndarray = np.all(random_filters[filters], axis=1).to_numpy()
+        np.testing.assert_array_equal(base.filter_mask_allows(mask, filters), expected)
+        assert not (base.filter_mask_allows(mask, ["in_the_band"])).any()
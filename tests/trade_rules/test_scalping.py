@@ -1,3 +1,4 @@
+import copy
 import math
 
 import numpy as np
@@ -46,6 +47,48 @@ def test_generate_down_repulsion_column():
     assert repulsion_series[3] == "short"
 
 
+class TestRepulsionParity:
+    @pytest.fixture(name="random_candles", scope="class")
+    def fixture_random_candles(self) -> pd.DataFrame:
+        rng = np.random.default_rng(0)
+        size: int = 3000
+        return pd.DataFrame(
+            {
+                "trend": rng.choice(["bull", "bear", None], size),
+                "high": rng.choice([100.2, 100.4, np.nan], size, p=[0.45, 0.45, 0.1]),
+                "low": rng.choice([99.8, 100.0, np.nan], size, p=[0.45, 0.45, 0.1]),
+                "10EMA": rng.choice([99.9, 100.1, 100.3, np.nan], size),
+            }
+        )
+
+    def test_generate_repulsion_column(self, random_candles: pd.DataFrame):
+        result: pd.Series = scalping.generate_repulsion_column(
+            random_candles, ema=random_candles["10EMA"]
+        )
+
+        expected = np.frompyfunc(scalping.repulsion_exist, 6, 1)(
+            random_candles["trend"],
+            random_candles["10EMA"].shift(1),
+            random_candles["high"].shift(2),
+            random_candles["high"].shift(1),
+            random_candles["low"].shift(2),
+            random_candles["low"].shift(1),
+        )
+        assert result.tolist() == expected.tolist()
+
+    def test_detect_latest_repulsion(self, random_candles: pd.DataFrame):
+        expected: pd.Series = scalping.generate_repulsion_column(
+            random_candles, ema=random_candles["10EMA"]
+        )
+
+        for end in range(3, 300):
+            candles: pd.DataFrame = random_candles.iloc[:end]
+            result = scalping.detect_latest_repulsion(
+                trend=candles["trend"].iat[-1], emas=candles["10EMA"], candles=candles
+            )
+            assert result == expected.iat[end - 1]
+
+
 examples_for_exitable = (
     ("long", 40, 90, True),
     ("long", 70, 80, True),
@@ -117,6 +160,55 @@ def test___trade_routine():
     assert dummy_dicts[index + 1]["position"] == dummy_dicts[index + 1]["entryable"]
 
 
+class TestCommitPositionsByArrays:
+    @staticmethod
+    def assert_same_positions(result: pd.DataFrame, expected: pd.DataFrame):
+        pd.testing.assert_frame_equal(result, expected)
+        # INFO: None and NaN in "position" are distinguished
+        assert list(map(repr, result["position"])) == list(map(repr, expected["position"]))
+
+    def test_parity_on_fixture(self):
+        expected: pd.DataFrame = scalping.commit_positions_by_loop(copy.deepcopy(DUMMY_FACTOR_DICTS))
+
+        result: pd.DataFrame = scalping.commit_positions_by_arrays(pd.DataFrame(DUMMY_FACTOR_DICTS))
+        self.assert_same_positions(result, expected)
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_parity_on_random_factors(self, seed: int):
+        rng = np.random.default_rng(seed)
+        size: int = 2000
+        closes: np.ndarray = 100.0 + np.cumsum(rng.normal(0.0, 0.1, size))
+        factors = pd.DataFrame(
+            {
+                "open": closes + rng.normal(0.0, 0.05, size),
+                "high": closes + rng.uniform(0.0, 0.2, size),
+                "low": closes - rng.uniform(0.0, 0.2, size),
+                "close": closes,
+                "time": pd.date_range("2020-01-01", periods=size, freq="H").astype(str),
+                "entryable": rng.choice(np.array(["long", "short", None, np.nan], dtype=object), size),
+                "entryable_price": closes,
+                "stoD_over_stoSD": rng.choice([True, False], size),
+                "sigma*2_band": closes + 1.0,
+                "sigma*-2_band": closes - 1.0,
+                "stoD_3": rng.uniform(0.0, 100.0, size),
+                "stoSD_3": rng.uniform(0.0, 100.0, size),
+                "support": closes - rng.uniform(0.0, 0.3, size),
+                "regist": closes + rng.uniform(0.0, 0.3, size),
+            }
+        )
+        # INFO: the last row never exits (an irregular entry on it can't be delayed)
+        factors.loc[size - 1, ["high", "low", "stoD_3"]] = [100.0, 100.0, np.nan]
+
+        expected: pd.DataFrame = scalping.commit_positions_by_loop(factors.to_dict("records"))
+
+        result: pd.DataFrame = scalping.commit_positions_by_arrays(factors)
+        self.assert_same_positions(result, expected)
+        assert (result["exit_reason"] == "Hit stoploss").any()
+        assert result["exit_reason"].str.startswith("Stochastics").any()
+        # INFO: irregular entries are delayed
+        assert result["entryable_price"].isna().any()
+
+
 def test___decide_exit_price():
     # - - - - - - - - - - - - - - - - - - - -
     #             long entry
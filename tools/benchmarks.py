@@ -0,0 +1,349 @@
+"""
+Micro benchmarks for the hot paths of backtests / lambda functions
+
+Usage:
+    $ python -m tools.benchmarks             # run all
+    $ python -m tools.benchmarks parabolic   # run only one
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from moto import mock_dynamodb, mock_sns
+import numpy as np
+import pandas as pd
+
+from src.clients import aws_registry, sns
+from src.clients.dynamodb_accessor import DynamodbAccessor
+from src.handlers import api_util
+from src.history_visualizer import Visualizer
+import src.lib.format_converter as converter
+import src.lib.indicator_kernels as kernels
+import src.lib.statistics_module as statistics
+from src.lib.mathematics import generate_different_length_combinations
+from src.result_processor import ResultProcessor
+import src.trade_rules.base as base_rules
+import src.trade_rules.scalping as scalping
+from src.trader_config import FILTER_ELEMENTS, TraderConfig
+from tools.fixtures import (
+    chart_data,
+    dynamo_items,
+    dynamo_records,
+    legacy_adjust_time_for_merging,
+    legacy_calc_profit,
+    legacy_parabolic,
+    legacy_to_candles_from_dynamo,
+    oanda_h4_candles,
+    random_positions,
+    random_tradehist,
+    random_transactions,
+    random_walk_candles,
+)
+
+
+def measure(func: Callable[[], object], repeat: int = 3) -> float:
+    """Return the best elapsed seconds of `repeat` trials"""
+    elapsed_list: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        func()
+        elapsed_list.append(time.perf_counter() - start)
+    return min(elapsed_list)
+
+
+def report(title: str, results: Dict[str, float]) -> Dict[str, float]:
+    print("[Benchmark] {}".format(title))
+    base: float = list(results.values())[0]
+    for name, elapsed in results.items():
+        print("    {:<24}: {:>10.4f} sec (x{:.1f})".format(name, elapsed, base / elapsed))
+    return results
+
+
+def bench_parabolic(size: int = 100_000) -> Dict[str, float]:
+    candles: pd.DataFrame = random_walk_candles(size)
+    highs: np.ndarray = candles["high"].to_numpy()
+    lows: np.ndarray = candles["low"].to_numpy()
+    return report(
+        "Parabolic SAR ({} candles)".format(size),
+        {
+            "row-by-row (legacy)": measure(lambda: legacy_parabolic(candles), repeat=1),
+            "array kernel": measure(lambda: kernels.parabolic_sar(highs, lows)),
+        },
+    )
+
+
+def bench_trend(size: int = 100_000) -> Dict[str, float]:
+    candles: pd.DataFrame = random_walk_candles(size)
+    indicators = pd.DataFrame(
+        {
+            "20SMA": candles["close"].rolling(20).mean(),
+            "10EMA": candles["close"].ewm(span=10).mean(),
+            "stoD_3": np.random.default_rng(0).uniform(0.0, 100.0, size),
+            "stoSD_3": np.random.default_rng(1).uniform(0.0, 100.0, size),
+        }
+    )
+
+    def per_row():
+        trend = np.frompyfunc(base_rules.identify_trend_type, 3, 1)(
+            candles["close"], indicators["20SMA"], indicators["10EMA"]
+        )
+        np.frompyfunc(base_rules.stoc_allows_entry, 3, 1)(
+            indicators["stoD_3"], indicators["stoSD_3"], trend
+        )
+
+    def masks():
+        codes = base_rules.generate_trend_codes(indicators, candles["close"])
+        base_rules.generate_stoc_allows_mask(indicators, codes)
+
+    return report(
+        "Trend and stochastic gating ({} rows)".format(size),
+        {"np.frompyfunc (legacy)": measure(per_row, repeat=1), "boolean masks": measure(masks)},
+    )
+
+
+def bench_repulsion(size: int = 100_000) -> Dict[str, float]:
+    candles: pd.DataFrame = random_walk_candles(size)
+    candles["trend"] = np.random.default_rng(0).choice(["bull", "bear", None], size)
+    ema: pd.Series = candles["close"].ewm(span=10).mean()
+
+    def per_row():
+        np.frompyfunc(scalping.repulsion_exist, 6, 1)(
+            candles["trend"],
+            ema.shift(1),
+            candles["high"].shift(2),
+            candles["high"].shift(1),
+            candles["low"].shift(2),
+            candles["low"].shift(1),
+        )
+
+    return report(
+        "Repulsion detection ({} rows)".format(size),
+        {
+            "np.frompyfunc (legacy)": measure(per_row, repeat=1),
+            "boolean masks": measure(lambda: scalping.generate_repulsion_column(candles, ema)),
+        },
+    )
+
+
+def bench_positions(size: int = 100_000) -> Dict[str, float]:
+    rng = np.random.default_rng(0)
+    factors: pd.DataFrame = random_walk_candles(size)
+    closes: np.ndarray = factors["close"].to_numpy()
+    factors = factors.assign(
+        time=pd.date_range("2020-01-01", periods=size, freq="H").astype(str),
+        entryable=rng.choice(np.array(["long", "short", None], dtype=object), size, p=[0.1, 0.1, 0.8]),
+        entryable_price=closes,
+        stoD_over_stoSD=rng.choice([True, False], size),
+        stoD_3=rng.uniform(0.0, 100.0, size),
+        stoSD_3=rng.uniform(0.0, 100.0, size),
+        support=closes - 0.1,
+        regist=closes + 0.1,
+    )
+    factors.loc[size - 1, "entryable"] = None
+
+    return report(
+        "Scalping position simulator ({} rows)".format(size),
+        {
+            "list of dicts (legacy)": measure(
+                lambda: scalping.commit_positions_by_loop(factors.to_dict("records")), repeat=1
+            ),
+            "typed arrays": measure(lambda: scalping.commit_positions_by_arrays(factors)),
+        },
+    )
+
+
+def bench_filters(size: int = 100_000) -> Dict[str, float]:
+    rng = np.random.default_rng(0)
+    candles = pd.DataFrame({name: rng.choice([True, False], size) for name in FILTER_ELEMENTS})
+    filter_sets: List[List[str]] = list(generate_different_length_combinations(FILTER_ELEMENTS))
+
+    def columns():
+        for filters in filter_sets:
+            np.all(candles[filters], axis=1)
+
+    def bitmask():
+        mask: np.ndarray = base_rules.pack_filter_mask(candles)
+        for filters in filter_sets:
+            base_rules.filter_mask_allows(mask, filters)
+
+    return report(
+        "Entry filters of {} combinations ({} rows)".format(len(filter_sets), size),
+        {"np.all (legacy)": measure(columns), "uint8 bitmask": measure(bitmask)},
+    )
+
+
+def bench_profit(size: int = 50_000) -> Dict[str, float]:
+    positions: pd.DataFrame = random_positions(size)
+    calc_profit = getattr(statistics, "__calc_profit")
+
+    return report(
+        "Profit with ROUND_HALF_UP ({} positions)".format(size),
+        {
+            "Decimal per row (legacy)": measure(lambda: legacy_calc_profit(positions.copy())),
+            "vectorized rounding": measure(lambda: calc_profit(positions.copy())),
+        },
+    )
+
+
+def bench_dynamo(size: int = 100_000) -> Dict[str, float]:
+    items = dynamo_items(dynamo_records(size))
+    deserializer = TypeDeserializer()
+
+    def deserialize() -> List[Dict[str, object]]:
+        # INFO: what boto3 resources do for each item of responses
+        return [{name: deserializer.deserialize(v) for name, v in item.items()} for item in items]
+
+    return report(
+        "DynamoDB items to candles ({} records)".format(size),
+        {
+            "json_normalize (legacy)": measure(
+                lambda: legacy_to_candles_from_dynamo(deserialize())
+            ),
+            "Decimal to columns": measure(lambda: converter.to_candles_from_dynamo(deserialize())),
+            "low-level to columns": measure(lambda: converter.to_candles_from_dynamo_items(items)),
+        },
+    )
+
+
+def bench_aws(size: int = 20) -> Dict[str, float]:
+    """Latency of preparing AWS clients on each call (mocked by moto, so without the network)"""
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+    with mock_dynamodb(), mock_sns():
+        DynamodbAccessor("USD_JPY").table  # INFO: create the table
+        os.environ["SNS_TOPIC_SEND_MAIL_ARN"] = boto3.client("sns").create_topic(Name="dummy")[
+            "TopicArn"
+        ]
+
+        def legacy_calls() -> None:
+            # INFO: what DynamodbAccessor.__init__ and sns.publish did on each call
+            for _ in range(size):
+                boto3.resource("dynamodb").Table("H1_CANDLES")
+                boto3.client("dynamodb").list_tables()
+                boto3.client("sns").publish(
+                    TopicArn=os.environ["SNS_TOPIC_SEND_MAIL_ARN"], Message="{}"
+                )
+
+        def registry_calls() -> None:
+            for _ in range(size):
+                DynamodbAccessor("USD_JPY").table
+                sns.publish({})
+
+        results: Dict[str, float] = report(
+            "AWS clients for an accessor and a message ({} calls)".format(size),
+            {"new clients (legacy)": measure(legacy_calls), "registry": measure(registry_calls)},
+        )
+    aws_registry.reset()
+    saved: float = (results["new clients (legacy)"] - results["registry"]) / size
+    print("    saved per call: {:.1f} msec".format(saved * 1000))
+    return results
+
+
+def bench_dst(size: int = 20_000) -> Dict[str, float]:
+    # INFO: 4 years of H4 candles, which have 8 switches of daylight saving time
+    candles: pd.DataFrame = oanda_h4_candles("2018-01-08 17:00", periods=6 * 365 * 4)
+    transactions: pd.DataFrame = random_transactions(candles, size)
+    # INFO: the methods don't use the attributes of Visualizer
+    visualizer: Visualizer = Visualizer.__new__(Visualizer)
+    adjust_time = getattr(visualizer, "_Visualizer__adjust_time_for_merging")
+
+    return report(
+        "H4 times of {} transactions".format(size),
+        {
+            "per row (legacy)": measure(
+                lambda: legacy_adjust_time_for_merging(candles.copy(), transactions.copy(), "H4")
+            ),
+            "searchsorted": measure(lambda: adjust_time(candles.copy(), transactions.copy(), "H4")),
+        },
+    )
+
+
+def bench_payload(size: int = 60 * 24) -> Dict[str, float]:
+    """Serialization of tradehist (60 days of H1 by default)"""
+    tradehist: pd.DataFrame = random_tradehist(size)
+
+    def legacy_records() -> str:
+        return json.dumps({"history": tradehist.replace({np.nan: None}).to_dict(orient="records")})
+
+    def records() -> str:
+        return json.dumps({"history": converter.to_nullable_records(tradehist)})
+
+    def columnar() -> str:
+        return json.dumps({"history": converter.to_nullable_columns(tradehist)})
+
+    results: Dict[str, float] = report(
+        "tradehist payload of {} rows x {} columns".format(*tradehist.shape),
+        {
+            "records (legacy)": measure(legacy_records),
+            "nullable records": measure(records),
+            "columnar": measure(columnar),
+            "columnar + gzip": measure(lambda: api_util.gzip_body(columnar())),
+        },
+    )
+    sizes: Dict[str, int] = {
+        "records": len(records()),
+        "columnar": len(columnar()),
+        "columnar + gzip": len(api_util.gzip_body(columnar())),
+    }
+    for name, size_bytes in sizes.items():
+        print("    {:<24}: {:>10,} bytes".format(name, size_bytes))
+    return results
+
+
+def bench_charts(size: int = 2_000) -> Dict[str, float]:
+    """Wall time of drawing the pngs of a backtest (10 charts by default)"""
+    data: Dict[str, pd.DataFrame] = chart_data(size)
+    for name, value in (("INSTRUMENT", "USD_JPY"), ("STOPLOSS_STRATEGY", "support")):
+        os.environ.setdefault(name, value)
+    processor: ResultProcessor = ResultProcessor("unittest", TraderConfig(operation="unittest"))
+    # INFO: the same as the answer 2 of "画像描画する？"
+    setattr(processor, "_ResultProcessor__static_options", {"figure_option": 2})
+    processor.reset_drawer()
+    original_workers = ResultProcessor.MAX_DRAWING_WORKERS
+
+    def draw(max_workers: int) -> None:
+        ResultProcessor.MAX_DRAWING_WORKERS = max_workers
+        processor._drive_drawing_charts(data["positions"], data["indicators"])
+
+    cwd: str = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.makedirs("tmp/images")
+        try:
+            charts_count: int = -(-size // ResultProcessor.MAX_ROWS_COUNT)
+            results: Dict[str, float] = report(
+                "{} charts on {} CPUs".format(charts_count, os.cpu_count()),
+                {
+                    "serial": measure(lambda: draw(1), repeat=1),
+                    "process pool": measure(lambda: draw(os.cpu_count() or 1), repeat=1),
+                },
+            )
+        finally:
+            os.chdir(cwd)
+            ResultProcessor.MAX_DRAWING_WORKERS = original_workers
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[], Dict[str, float]]] = {
+    "parabolic": bench_parabolic,
+    "trend": bench_trend,
+    "repulsion": bench_repulsion,
+    "positions": bench_positions,
+    "filters": bench_filters,
+    "profit": bench_profit,
+    "dynamo": bench_dynamo,
+    "aws": bench_aws,
+    "dst": bench_dst,
+    "payload": bench_payload,
+    "charts": bench_charts,
+}
+
+
+if __name__ == "__main__":
+    targets: List[str] = sys.argv[1:] or list(BENCHMARKS.keys())
+    for target in targets:
+        BENCHMARKS[target]()
@@ -0,0 +1,321 @@
+"""
+Generators of random data and the former implementations (references of parity),
+which are shared by tests and tools/benchmarks.py
+"""
+import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, List, Optional
+
+from boto3.dynamodb.types import TypeSerializer
+import numpy as np
+import pandas as pd
+
+from src.analyzer import Analyzer
+from src.candle_storage import FXBase
+from src.history_visualizer import DstSwitch
+import src.lib.format_converter as converter
+
+
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+#    Indicators
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+INITIAL_AF = 0.02
+MAX_AF = 0.2
+
+
+def legacy_parabolic(candles: pd.DataFrame) -> pd.DataFrame:
+    """The former row-by-row implementation of Analyzer.__calc_parabolic"""
+    acceleration_factor = INITIAL_AF
+    bull = True
+    extreme_price = candles.high[0]
+    temp_sar_array = [candles.low[0]]
+
+    candles_array = candles.to_dict("records")
+    for i, row in enumerate(candles_array):
+        current_high = row["high"]
+        current_low = row["low"]
+        last_sar = temp_sar_array[-1]
+
+        touch_lower_parabo = bull and (last_sar > current_low)
+        touch_upper_parabo = not bull and (last_sar < current_high)
+        if touch_lower_parabo or touch_upper_parabo:
+            temp_sar = extreme_price
+            acceleration_factor = INITIAL_AF
+            extreme_price = current_low if bull else current_high
+            bull = not bull
+        else:
+            temp_sar = last_sar + acceleration_factor * (extreme_price - last_sar)
+            if (bull and extreme_price < current_high) or not bull and (extreme_price > current_low):
+                acceleration_factor = min(acceleration_factor + INITIAL_AF, MAX_AF)
+
+            if bull:
+                temp_sar = min(temp_sar, candles_array[i - 1]["low"], candles_array[i - 2]["low"])
+                extreme_price = max(extreme_price, current_high)
+            else:
+                temp_sar = max(temp_sar, candles_array[i - 1]["high"], candles_array[i - 2]["high"])
+                extreme_price = min(extreme_price, current_low)
+
+        if i == 0:
+            temp_sar_array[-1] = temp_sar
+        else:
+            temp_sar_array.append(temp_sar)
+    return pd.DataFrame(data=temp_sar_array, columns=["SAR"])
+
+
+def random_walk_candles(size: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    closes = 110.0 + np.cumsum(rng.normal(0.0, 0.05, size))
+    opens = np.concatenate([[110.0], closes[:-1]])
+    return pd.DataFrame(
+        {
+            "open": opens,
+            "high": np.maximum(opens, closes) + rng.uniform(0.0, 0.03, size),
+            "low": np.minimum(opens, closes) - rng.uniform(0.0, 0.03, size),
+            "close": closes,
+        }
+    ).round(3)
+
+
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+#    Profits
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+def legacy_calc_profit(copied_positions: pd.DataFrame) -> pd.DataFrame:
+    """The former implementation of __calc_profit, which rounds each diff by Decimal"""
+
+    def round_really(x: float) -> float:
+        return float(Decimal(str(x)).quantize(Decimal("0.001"), rounding=ROUND_HALF_UP))
+
+    def pl_calculator(position_series: pd.Series, diffs: pd.Series) -> np.ndarray:
+        return np.nan_to_num(np.where(position_series == "sell_exit", diffs, diffs * -1))
+
+    copied_positions.loc[:, "profit"] = 0.0
+    is_soon_exit: pd.Series = (
+        copied_positions["exitable_price"].notnull() & copied_positions["entry_price"].notnull()
+    )
+    soon_exit_positions: pd.DataFrame = copied_positions[is_soon_exit]
+    exit_entry_diffs: pd.Series = (
+        soon_exit_positions.exitable_price - soon_exit_positions.entry_price
+    ).map(round_really)
+    copied_positions.loc[is_soon_exit, "profit"] = pl_calculator(
+        soon_exit_positions.position, exit_entry_diffs
+    )
+
+    continued_index: pd.Series = (
+        copied_positions["exitable_price"].notnull()
+        & copied_positions.shift(1)["exitable_price"].isna()
+    )
+    exit_entry_diffs = (
+        copied_positions.exitable_price - copied_positions.shift(1).entry_price
+    ).map(round_really)[continued_index]
+    copied_positions.loc[continued_index, "profit"] += pl_calculator(
+        copied_positions[continued_index].position, exit_entry_diffs
+    )
+    return copied_positions.astype({"profit": float})
+
+
+def random_positions(size: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prices: np.ndarray = np.round(110.0 + np.cumsum(rng.normal(0.0, 0.05, size)), 3)
+    return pd.DataFrame(
+        {
+            "position": rng.choice(["long", "short", "sell_exit", "buy_exit"], size),
+            # INFO: 5th decimals like x.xxx5 make ties of rounding
+            "entry_price": np.where(rng.random(size) < 0.5, np.nan, prices + 0.0005),
+            "exitable_price": np.where(rng.random(size) < 0.5, np.nan, prices),
+        }
+    )
+
+
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+#    DynamoDB items / tradehist
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+def legacy_to_candles_from_dynamo(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """The former implementation with pd.json_normalize and applymap(float)"""
+    result: pd.DataFrame = pd.json_normalize(records)
+    if records == []:
+        return result
+
+    time_series: pd.Series = result["time"].copy()
+    result.drop(["time", "pareName"], axis=1, inplace=True)
+    result = result.applymap(float)
+    result["time"] = time_series.map(converter.convert_to_m10)
+    return result
+
+
+def random_tradehist(size: int, seed: int = 0) -> pd.DataFrame:
+    """History like Visualizer.run, whose trade columns are mostly NaN / None"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range("2020-01-01 00:00:00", periods=size, freq="H")
+    closes = np.round(100 + rng.normal(0, 0.05, size).cumsum(), 3)
+    tradehist = pd.DataFrame(
+        {
+            "open": closes - 0.01,
+            "high": closes + 0.02,
+            "low": closes - 0.03,
+            "close": closes,
+            "time": times.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+    )
+    is_traded = rng.random(size) < 0.05
+    for name in ["long", "short", "exit", "stoploss", "price"]:
+        tradehist[name] = np.where(is_traded & (rng.random(size) < 0.5), closes, np.nan)
+    tradehist["units"] = np.where(is_traded, 10000.0, np.nan)
+    tradehist["id"] = np.where(is_traded, np.arange(size).astype(str), None)
+    tradehist["type"] = np.where(is_traded, "ORDER_FILL", None)
+    tradehist["dst"] = None
+    tradehist["pl"] = np.where(is_traded, np.round(rng.normal(0, 500, size)), 0.0)
+    tradehist["gross"] = tradehist["pl"].cumsum()
+    for name in ["sigma*-2_band", "sigma*2_band", "60EMA", "10EMA", "SAR", "20SMA"]:
+        tradehist[name] = closes + rng.normal(0, 0.1, size)
+        tradehist.loc[: rng.integers(5, 60), name] = np.nan
+    for name in ["stoD", "stoSD"]:
+        tradehist[name] = rng.uniform(0, 100, size)
+    return tradehist
+
+
+def dynamo_records(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Items returned by DynamoDB resources (numbers are Decimal)"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range("2020-01-01 00:03:00", periods=size, freq="7min")
+    prices = np.round(100 + rng.normal(0, 0.01, (size, 4)).cumsum(axis=0), 3)
+    return [
+        {
+            "pareName": "USD_JPY",
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S.000000000Z"),
+            **{name: Decimal(str(price)) for name, price in zip(["open", "high", "low", "close"], row)},
+        }
+        for time, row in zip(times, prices)
+    ]
+
+
+def dynamo_items(records: List[Dict[str, Any]]) -> List[Dict[str, Dict[str, str]]]:
+    """Items returned by DynamoDB low-level clients"""
+    serializer = TypeSerializer()
+    return [
+        {name: serializer.serialize(value) for name, value in record.items()} for record in records
+    ]
+
+
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+#    Charts
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+def chart_data(size: int) -> Dict[str, pd.DataFrame]:
+    """Indicators and wrangled positions of random candles, which are set on FXBase"""
+    candles: pd.DataFrame = random_walk_candles(size)
+    candles["time"] = pd.date_range("2019/09/03", periods=size, freq="5min").astype(str)
+    FXBase.set_candles(candles)
+    analyzer = Analyzer()
+    analyzer.calc_indicators(candles)
+
+    positions = pd.DataFrame(
+        {
+            "position": None,
+            "price": np.nan,
+            "stoploss": np.nan,
+            "exitable_price": np.nan,
+            "sequence": range(size),
+        }
+    )
+    # INFO: a long position in every 150 candles
+    for entry in range(30, size - 30, 150):
+        exit_: int = entry + 25
+        positions.loc[entry, ["position", "price"]] = ("long", candles["close"][entry])
+        positions.loc[exit_, ["position", "exitable_price"]] = ("sell_exit", candles["close"][exit_])
+        positions.loc[entry:exit_, "stoploss"] = candles["low"][entry]
+    positions["position"].fillna(method="ffill", inplace=True)
+    return {"indicators": analyzer.get_indicators(), "positions": positions}
+
+
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+#    Trade history (DST)
+#  - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+def legacy_adjust_time_for_merging(
+    candles: pd.DataFrame, history_df: pd.DataFrame, granularity: str
+) -> pd.DataFrame:
+    dict_dst_switches: Optional[List[DstSwitch]] = None
+    if granularity in ("H4",) and len(history_df) > 0:
+        candles["summer_time"] = pd.to_numeric(candles.time.str[12], downcast="signed") % 2 == 1
+        switch_points = candles[candles.summer_time != candles.summer_time.shift(1)]
+        dict_dst_switches = switch_points[["time", "summer_time"]].to_dict("records")
+        history_df = legacy_append_dst_column(history_df, dict_dst_switches)
+    else:
+        history_df.loc[:, "dst"] = None
+
+    history_df["time"] = [
+        legacy_convert_time_str_to(granularity, time, dict_dst_switches)
+        for time in history_df.time
+    ]
+    return history_df
+
+
+def legacy_append_dst_column(
+    original_df: pd.DataFrame, dst_switches: List[DstSwitch]
+) -> pd.DataFrame:
+    hist_df = original_df.copy()
+    switch_count = len(dst_switches)
+
+    for i, dst_switching_point in enumerate(dst_switches):
+        is_dst = dst_switching_point["summer_time"]
+        if i == (switch_count - 1):
+            target_row_index = dst_switching_point["time"] <= hist_df["time"]
+        else:
+            target_row_index = (dst_switching_point["time"] <= hist_df["time"]) & (
+                hist_df["time"] < dst_switches[i + 1]["time"]
+            )
+        hist_df.loc[target_row_index, "dst"] = is_dst
+
+    hist_df["dst"] = hist_df["dst"].astype(bool)
+    return hist_df
+
+
+def legacy_convert_time_str_to(
+    granularity: str, oanda_time: str, dict_dst_switches: Optional[List[DstSwitch]]
+) -> str:
+    time_str: str = oanda_time.replace("T", " ")
+    time: datetime.datetime = datetime.datetime.strptime(time_str[:13], "%Y-%m-%d %H")
+
+    if granularity in ("H4",):
+        if legacy_is_summer_time(time_str, dict_dst_switches):
+            minus = (time.hour + 3) % 4
+        else:
+            minus = time.hour % 4
+        time -= datetime.timedelta(hours=minus)
+
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def legacy_is_summer_time(time_str: str, dict_dst_switches: List[DstSwitch]) -> Optional[bool]:
+    for i, switch_dict in enumerate(dict_dst_switches):
+        if dict_dst_switches[-1]["time"] < time_str:
+            return dict_dst_switches[-1]["summer_time"]
+        elif switch_dict["time"] < time_str and time_str < dict_dst_switches[i + 1]["time"]:
+            return switch_dict["summer_time"]
+    return None
+
+
+def oanda_h4_candles(start: str, periods: int) -> pd.DataFrame:
+    """
+    H4 candles of Oanda, which start at 17:00 of New York
+    (odd hours of UTC in summer time, and even hours in winter time)
+    """
+    local_times = pd.date_range(start, periods=periods, freq="4H")
+    utc_times = (
+        local_times.tz_localize("America/New_York", ambiguous="NaT", nonexistent="NaT")
+        .dropna()
+        .tz_convert("UTC")
+        .tz_localize(None)
+    )
+    return pd.DataFrame({"time": utc_times.strftime("%Y-%m-%d %H:%M:%S")})
+
+
+def random_transactions(candles: pd.DataFrame, size: int, seed: int = 0) -> pd.DataFrame:
+    """Transactions at random times of Oanda's format, including ones just on candles"""
+    rng = np.random.default_rng(seed)
+    first, last = pd.Timestamp(candles["time"].iat[0]), pd.Timestamp(candles["time"].iat[-1])
+    nanoseconds = rng.integers(first.value, last.value, size)
+    times = pd.to_datetime(np.sort(nanoseconds)).strftime("%Y-%m-%dT%H:%M:%S.%f000Z")
+    # INFO: some transactions (ex. stoploss) happen just at the start of candles
+    on_candles = rng.choice(len(times), size // 10, replace=False)
+    times = times.to_numpy(dtype=object)
+    times[on_candles] = rng.choice(candles["time"].str.replace(" ", "T"), len(on_candles))
+    return pd.DataFrame({"time": times, "pl": rng.normal(0, 100, size)})
@@ -1,9 +1,9 @@
 from collections import OrderedDict
-from typing import Dict, List, Optional, Tuple, Type, Union
+import importlib
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Type, Union
 
 import pandas as pd
 
-from src.alpha_trader import AlphaTrader
 from src.lib import logic
 from src.lib.instance_builder import InstanceBuilder
 import src.lib.interface as i_face
@@ -12,10 +12,15 @@ from src.lib.mathematics import (
     generate_different_length_combinations,
     range_2nd_decimal,
 )
-from src.swing_trader import SwingTrader
+from src.lib.results_store import ResultsStore
 from src.trader import Trader
 from src.trader_config import FILTER_ELEMENTS, TraderConfig
 
+if TYPE_CHECKING:
+    from src.alpha_trader import AlphaTrader
+    from src.grid_runner import GridConfig
+    from src.swing_trader import SwingTrader
+
 RULE_DICT = OrderedDict(
     swing={"dummy": ""},
     # wait_close={"dummy": ""},
@@ -23,67 +28,78 @@ RULE_DICT = OrderedDict(
     cancel={"dummy": ""},
 )
 
-TRADER_CLASSES: Dict[str, Type["Trader"]] = {
-    "scalping": AlphaTrader,
-    "swing": SwingTrader,
-    # "wait_close": SwingTrader,
+# INFO: the classes are imported when they are selected,
+#   so that the live trading Lambda (using only RealTrader) doesn't load them
+TRADER_CLASSES: Dict[str, str] = {
+    "scalping": "src.alpha_trader.AlphaTrader",
+    "swing": "src.swing_trader.SwingTrader",
+    # "wait_close": "src.swing_trader.SwingTrader",
 }
 
 
 def select_trader_class() -> Tuple[str, Type["Trader"]]:
     rule_name = select_from_dict(RULE_DICT, menumsg="取引ルールを選択して下さい")
-    trader_class: Optional[Type[Trader]] = TRADER_CLASSES.get(rule_name)
-    if trader_class is None:
+    return rule_name, load_trader_class(rule_name)
+
+
+def load_trader_class(rule_name: str) -> Type["Trader"]:
+    class_path: Optional[str] = TRADER_CLASSES.get(rule_name)
+    if class_path is None:
         raise RuntimeError(f"rule_name is wrong. rule_name: {rule_name}")
 
-    return rule_name, trader_class
+    module_name, class_name = class_path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 def verify_various_entry_filters(
-    tr_instance: Union[AlphaTrader, SwingTrader], config: TraderConfig, rule: str
-) -> None:
+    tr_instance: Union["AlphaTrader", "SwingTrader"], config: TraderConfig, rule: str
+) -> pd.DataFrame:
     """
-    verify all available combinations of the elements in entry_filter
+    verify all available combinations of the elements in entry_filter,
+    sliding the value of StopLoss for each of them (see `verify_various_stoploss`)
     """
     filter_sets: Tuple[List[Optional[str]]] = generate_different_length_combinations(
         items=FILTER_ELEMENTS
     )
-
-    for filter_set in filter_sets:
-        print("[Trader] ** Now trying filter -> {} **".format(filter_set))
-        verify_various_stoploss(
-            tr_instance,
-            config,
-            rule=rule,
-            entry_filters=filter_set,
-        )
+    return _verify_grid(tr_instance, config, rule, filter_sets)
 
 
 def verify_various_stoploss(
-    tr_instance: Union[AlphaTrader, SwingTrader],
+    tr_instance: Union["AlphaTrader", "SwingTrader"],
     config: TraderConfig,
     rule: str,
     entry_filters: List[str] = [],
-) -> None:
+) -> pd.DataFrame:
     """
-    verify P/L sliding the value of StopLoss
+    verify P/L sliding the value of StopLoss on worker processes (see grid_runner.run_grid)
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: TRADE_RESULT_ITEMS + FILTER_ELEMENTS (a row per stoploss buffer)
     """
+    return _verify_grid(tr_instance, config, rule, [entry_filters])
+
+
+def _verify_grid(
+    tr_instance: Union["AlphaTrader", "SwingTrader"],
+    config: TraderConfig,
+    rule: str,
+    filter_sets: Iterable[Iterable[Optional[str]]],
+) -> pd.DataFrame:
+    """Run the whole sweep as a grid, whose results are appended to the ResultsStore at once"""
+    # INFO: imported here, so that the live trading Lambda doesn't load the process pool
+    from src.grid_runner import build_grid, run_grid
+
     stoploss_digit: float = config.stoploss_buffer_base
     stoploss_buffer_list: List[float] = range_2nd_decimal(
         stoploss_digit, stoploss_digit * 20, stoploss_digit * 2
     )
-
-    verification_dataframes_array: List[Optional[pd.DataFrame]] = []
-    for stoploss_buf in stoploss_buffer_list:
-        print("[Trader] Start verification with the stoploss buffer {}pips".format(stoploss_buf))
-        config.set_entry_rules("stoploss_buffer_pips", stoploss_buf)
-        df_positions = tr_instance.perform(rule=rule, entry_filters=entry_filters)
-        verification_dataframes_array.append(df_positions)
-
-    result = pd.concat(
-        verification_dataframes_array, axis=1, keys=stoploss_buffer_list, names=["SL_buffer"]
+    grid: List["GridConfig"] = build_grid(
+        rule, filter_sets, stoploss_buffer_list, [config.static_spread]
     )
-    result.to_csv("./tmp/csvs/sl_verify_{inst}.csv".format(inst=config.get_instrument()))
+    print("[Trader] ** Now trying {} runs **".format(len(grid)))
+    return run_grid(tr_instance, grid, store=ResultsStore())
 
 
 def is_tradeable(interface) -> Dict[str, Union[str, bool]]: